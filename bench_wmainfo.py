@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the WMA info parser.
+
+Usage:
+    python bench_wmainfo.py              # run every benchmark
+    python bench_wmainfo.py serialization
+
+Synthetic ASF files come from the test suite's build_asf() helper, so no
+media files are needed.
+"""
+
+import argparse
+import base64
+import json
+import pickle
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+from test_wmainfo import _guid, _utf16, asf_object, build_asf, fuzz_corpus, picture_value
+from wmainfo import (
+    DEFAULT_LIMITS, BytesSource, HeaderPack, HeaderPackWriter, TagIndex, WmaInfo, WmaInfoError,
+    decode_header_batch, parse_header,
+)
+
+
+def _timeit(func: Callable[[], Any], repeat: int) -> float:
+    """Return the best per-call time in seconds over a few rounds."""
+    best = float('inf')
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def _sample_wma() -> WmaInfo:
+    data = build_asf(extended=(
+        ('WM/AlbumTitle', 0, _utf16('Benchmark Album')),
+        ('WM/AlbumArtist', 0, _utf16('Benchmark Artist')),
+        ('WM/Genre', 0, _utf16('Electronic')),
+        ('WM/Year', 0, _utf16('2004')),
+        ('WM/TrackNumber', 3, struct.pack('<I', 7)),
+        ('WM/Picture', 1, picture_value('image/jpeg', 'Cover', b'\xff' * 512)),
+        ('IsVBR', 2, struct.pack('<I', 0)),
+    ))
+    wma = WmaInfo(BytesSource(data, name='/archive/artist/album/07 track.wma'))
+    wma.parse_stream()
+    wma.parse_index_objects()
+    return wma
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(type(value).__name__)
+
+
+def bench_serialization(repeat: int) -> None:
+    """Compare to_bytes(), pickle and JSON for throughput and size."""
+    wma = _sample_wma()
+
+    codecs: List[Tuple[str, Callable[[], bytes], Callable[[bytes], Any]]] = [
+        ('binary', wma.to_bytes, WmaInfo.from_bytes),
+        ('pickle(WmaInfo)', lambda: pickle.dumps(wma, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ('pickle(to_dict)',
+         lambda: pickle.dumps(wma.to_dict(), pickle.HIGHEST_PROTOCOL),
+         lambda b: WmaInfo.from_dict(pickle.loads(b))),
+        ('json(to_dict)',
+         lambda: json.dumps(wma.to_dict(), default=_json_default).encode('utf-8'),
+         lambda b: WmaInfo.from_dict(json.loads(b))),
+    ]
+
+    print(f"{'format':<18}{'bytes':>8}{'encode/s':>12}{'decode/s':>12}")
+    for name, encode, decode in codecs:
+        encoded = encode()
+        enc = _timeit(encode, repeat)
+        dec = _timeit(lambda: decode(encoded), repeat)
+        print(f"{name:<18}{len(encoded):>8}{1 / enc:>12,.0f}{1 / dec:>12,.0f}")
+
+
+def bench_tag_index(repeat: int, docs: int = 500_000) -> None:
+    """Build a TagIndex over synthetic records and time conjunctive queries."""
+    rng = random.Random(42)
+    artists = [f'Artist {i}' for i in range(20_000)]
+    genres = ['Rock', 'Pop', 'Jazz', 'Electronic', 'Classical', 'Hip Hop', 'Folk', 'Metal']
+
+    start = time.perf_counter()
+    index = TagIndex()
+    for i in range(docs):
+        record = SimpleNamespace(
+            tags={
+                'Title': f'Track {i}',
+                'AlbumArtist': rng.choice(artists),
+                'Genre': rng.choice(genres),
+                'Year': str(rng.randint(1960, 2010)),
+                'TrackNumber': rng.randint(1, 20),
+                'BeatsPerMinute': str(rng.randint(60, 180)),
+            },
+            info={'playtime_seconds': rng.randint(60, 600), 'bitrate': 128.0},
+        )
+        index.add(f'/media/{i}.wma', record)  # type: ignore[arg-type]
+    build = time.perf_counter() - start
+    print(f"built {docs:,} docs in {build:.2f}s ({docs / build:,.0f} docs/s)")
+
+    index.query(Year=2000)  # Build the sorted numeric arrays once
+    queries = [
+        {'AlbumArtist': 'Artist 42', 'BeatsPerMinute': (121, None)},
+        {'Genre': 'Jazz', 'Year': (1999, 2001), 'TrackNumber': 1},
+        {'Title': 'Track 123456'},
+        {'BeatsPerMinute': (179, None), 'playtime_seconds': (590, None)},
+    ]
+    for criteria in queries:
+        hits = len(index.query(**criteria))
+        per_query = _timeit(lambda: index.query(**criteria), max(1, repeat // 20))
+        print(f"{per_query * 1e6:>10.1f} us  {hits:>6} hits  {criteria}")
+
+
+def bench_threads(repeat: int) -> None:
+    """
+    Parse in-memory headers from a thread pool and report scaling.
+
+    On a standard build the GIL keeps the speedup near 1x; on a free-threaded
+    (no-GIL) build the stateless core should scale with the thread count.
+    """
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}, "
+          f"{os.cpu_count()} CPUs")
+
+    headers = [build_asf(title=f'Track {i}', data_size=0, index=False) for i in range(256)]
+    work = headers * max(1, repeat // 64)
+
+    def parse_all(threads: int) -> float:
+        chunks = [work[i::threads] for i in range(threads)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for _ in pool.map(lambda chunk: [parse_header(h) for h in chunk], chunks):
+                pass
+        return len(work) / (time.perf_counter() - start)
+
+    baseline = parse_all(1)
+    print(f"{'threads':>8}{'parses/s':>12}{'speedup':>9}")
+    for threads in (1, 2, 4, 8):
+        rate = baseline if threads == 1 else parse_all(threads)
+        print(f"{threads:>8}{rate:>12,.0f}{rate / baseline:>8.2f}x")
+
+
+def bench_batch(repeat: int, files: int = 100_000) -> None:
+    """Per-file parse_header() against decode_header_batch() on cached headers."""
+    headers = [parse_header(build_asf(title=f'Track {i}', max_bitrate=64000 + i)).header
+               for i in range(256)]
+    headers = (headers * (files // len(headers) + 1))[:files]
+
+    start = time.perf_counter()
+    for header in headers:
+        parse_header(header)
+    per_file = time.perf_counter() - start
+    print(f"{'parse_header':<22}{files / per_file:>12,.0f} headers/s")
+
+    backends = [('batch (stdlib)', False)]
+    try:
+        import numpy  # noqa: F401
+        backends.append(('batch (numpy)', True))
+    except ImportError:
+        print("numpy not installed; skipping the NumPy backend")
+    for name, use_numpy in backends:
+        start = time.perf_counter()
+        decode_header_batch(headers, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22}{files / elapsed:>12,.0f} headers/s  {per_file / elapsed:.1f}x")
+
+
+def bench_pack(repeat: int, files: int = 2000) -> None:
+    """Re-parse files from disk against re-parsing them from a header pack."""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(files):
+            path = os.path.join(tmp, f'{i}.wma')
+            with open(path, 'wb') as f:
+                f.write(build_asf(title=f'Track {i}', data_size=256 * 1024))
+            paths.append(path)
+        pack_path = os.path.join(tmp, 'headers.pack')
+
+        start = time.perf_counter()
+        with HeaderPackWriter(pack_path) as writer:
+            writer.extend(paths, workers=8)
+        elapsed = time.perf_counter() - start
+        media = sum(os.path.getsize(p) for p in paths)
+        print(f"packed {files:,} files in {elapsed:.2f}s: {os.path.getsize(pack_path):,} bytes "
+              f"of headers out of {media:,}")
+
+        start = time.perf_counter()
+        for path in paths:
+            WmaInfo(path)
+        from_files = time.perf_counter() - start
+        print(f"{'WmaInfo(path)':<22}{files / from_files:>12,.0f} files/s")
+
+        with HeaderPack(pack_path) as pack:
+            start = time.perf_counter()
+            for path in pack:
+                WmaInfo.from_pack(pack, path)
+            from_pack = time.perf_counter() - start
+            print(f"{'WmaInfo.from_pack':<22}{files / from_pack:>12,.0f} files/s  "
+                  f"{from_files / from_pack:.1f}x")
+
+            start = time.perf_counter()
+            pack.decode_batch()
+            batch = time.perf_counter() - start
+            print(f"{'pack.decode_batch':<22}{files / batch:>12,.0f} files/s  "
+                  f"{from_files / batch:.1f}x")
+
+
+def bench_worst_case(repeat: int) -> None:
+    """
+    Parse hostile headers and report the slowest one.
+
+    Covers the fuzz corpus from the test suite plus headers that sit right at
+    the default ParseLimits: as many objects as allowed, as many attributes
+    as allowed, and huge declared counts with nothing behind them.
+    """
+    def header(children: List[bytes], count: int = -1) -> bytes:
+        body = b''.join(children)
+        return (_guid('ASF_Header_Object')
+                + struct.pack('<QI', 30 + len(body), len(children) if count < 0 else count)
+                + b'\x01\x02' + body)
+
+    padding = asf_object('ASF_Padding_Object', b'')
+    attribute = struct.pack('<H', 4) + _utf16('A') + struct.pack('<HH', 0, 4) + _utf16('B')
+    crafted = {
+        'max objects': header([padding] * DEFAULT_LIMITS.max_objects),
+        'max attributes': header([asf_object(
+            'ASF_Extended_Content_Description_Object',
+            struct.pack('<H', DEFAULT_LIMITS.max_entries - 1)
+            + attribute * (DEFAULT_LIMITS.max_entries - 1))]),
+        'lying counts': header([padding], count=DEFAULT_LIMITS.max_objects),
+    }
+    samples = list(crafted.items()) + [(f'fuzz {i}', s) for i, s in enumerate(fuzz_corpus())]
+
+    def parse(data: bytes) -> None:
+        try:
+            wma = WmaInfo(BytesSource(data))
+            wma.markers()
+            wma.script_commands()
+        except WmaInfoError:
+            pass
+
+    rounds = max(1, repeat // 200)
+    times = []
+    for name, data in samples:
+        times.append((_timeit(lambda: parse(data), rounds), len(data), name))
+    times.sort(reverse=True)
+
+    print(f"{len(times)} inputs, mean {sum(t for t, _, _ in times) / len(times) * 1e6:,.1f} us")
+    print(f"{'slowest':<16}{'bytes':>10}{'us':>12}{'ns/byte':>10}")
+    for elapsed, size, name in times[:5]:
+        print(f"{name:<16}{size:>10,}{elapsed * 1e6:>12,.1f}{elapsed * 1e9 / size:>10,.1f}")
+
+
+BENCHMARKS: Dict[str, Callable[[int], None]] = {
+    'batch': bench_batch,
+    'pack': bench_pack,
+    'serialization': bench_serialization,
+    'tag_index': bench_tag_index,
+    'threads': bench_threads,
+    'worst_case': bench_worst_case,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run wmainfo benchmarks')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f"benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument('--repeat', type=int, default=2000, help='iterations per round')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    for name in args.names or BENCHMARKS:
+        print(f"### {name} ###\n")
+        BENCHMARKS[name](args.repeat)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@ from pathlib import Path
 from typing import Optional
 import sys
 
-from wmainfo import WmaInfo, WmaInfoError
+from wmainfo import DiscoveryStats, WmaInfo, WmaInfoError, discover
 
 
 def format_duration(seconds: int) -> str:
@@ -170,13 +170,14 @@ def main() -> None:
         elif file_path.is_dir():
             print(f"\n📂 Processing directory: {file_path}")
 
-            # Find all WMA/WMV files
-            media_files = list(file_path.rglob("*.wm[av]"))
+            # Find all ASF files by content, including misnamed ones
+            stats = DiscoveryStats()
+            media_files = [Path(p) for p in discover(file_path, workers=8, stats=stats)]
 
             if not media_files:
                 print(f"No WMA/WMV files found in {file_path}")
             else:
-                print(f"Found {len(media_files)} media files")
+                print(f"Found {stats}")
                 for media_file in sorted(media_files):
                     analyze_media_file(media_file)
         else:
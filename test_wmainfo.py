@@ -5,12 +5,304 @@ Unit tests for the modernized WMA info parser.
 
 import unittest
 import os
+import struct
 import tempfile
+import socket
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import Mock, patch, mock_open
-from typing import Optional
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
 
-from wmainfo import WmaInfo, WmaInfoError, ASFObject, StreamInfo
+from wmainfo import (
+    HeaderPack, HeaderPackWriter,
+    MalformedHeaderError, ParseLimitError, ParseLimits, TruncatedHeaderError,
+    WmaInfo, WmaInfoError, ASFObject, StreamInfo,
+    BytesSource, CoalescingSource, Marker, ScriptCommand, HTTPRangeSource, IncrementalParser,
+    LibraryIndex, ScanResult, TagIndex, find_duplicates, parse_header, scan,
+    scan_archive, decode_header_batch, MetadataServer, default_socket_path, query_server, main,
+    discover, DiscoveryStats,
+)
+
+
+def _guid(name: str) -> bytes:
+    """Return the on-disk bytes of a known ASF GUID."""
+    return uuid.UUID(WmaInfo._get_known_guids()[name]).bytes_le
+
+
+def _utf16(text: str) -> bytes:
+    """Encode a null-terminated UTF-16LE string."""
+    return text.encode('utf-16le') + b'\x00\x00'
+
+
+def asf_object(name: str, payload: bytes) -> bytes:
+    """Wrap a payload in an ASF object header."""
+    return _guid(name) + struct.pack('<Q', 24 + len(payload)) + payload
+
+
+def build_asf(
+        title: str = 'Test Title',
+        author: str = 'Test Author',
+        extended: Sequence[Tuple[str, int, bytes]] = (
+            ('WM/AlbumTitle', 0, _utf16('Test Album')),
+            ('WM/Year', 0, _utf16('2001')),
+            ('WM/TrackNumber', 3, struct.pack('<I', 7)),
+        ),
+        extra_objects: Sequence[bytes] = (),
+        data_size: int = 4096,
+        index: bool = True,
+        max_bitrate: int = 128_000,
+        file_id: str = '12345678-1234-5678-1234-567812345678',
+        padding: int = 64,
+) -> bytes:
+    """
+    Build a small but complete ASF file for tests.
+
+    Contains File Properties, Content Description, Extended Content
+    Description, an audio Stream Properties object, any `extra_objects`,
+    padding, a data object and (optionally) a simple index object.
+    """
+    file_id_bytes = uuid.UUID(file_id).bytes_le
+
+    def file_properties(file_size: int) -> bytes:
+        return asf_object('ASF_File_Properties_Object', file_id_bytes + struct.pack(
+            '<QQQQQQIIII',
+            file_size,
+            125_911_584_000_000_000,  # 2000-01-01
+            10,                       # data packets
+            2_000_000_000,            # play duration (200 s)
+            1_990_000_000,            # send duration
+            3000,                     # preroll (ms)
+            0x0002,                   # seekable
+            3200, 3200, max_bitrate,
+        ))
+
+    strings = [_utf16(v) if v else b'' for v in (title, author, '', '', '')]
+    content = asf_object(
+        'ASF_Content_Description_Object',
+        struct.pack('<5H', *(len(v) for v in strings)) + b''.join(strings)
+    )
+
+    ext_payload = struct.pack('<H', len(extended))
+    for name, value_type, value in extended:
+        encoded = _utf16(name)
+        ext_payload += struct.pack('<H', len(encoded)) + encoded
+        ext_payload += struct.pack('<HH', value_type, len(value)) + value
+    ext_content = asf_object('ASF_Extended_Content_Description_Object', ext_payload)
+
+    waveformatex = struct.pack('<HHIIHHH', 0x0161, 2, 44100, 16000, 2973, 16, 0)
+    stream = asf_object('ASF_Stream_Properties_Object', (
+        _guid('ASF_Audio_Media') + _guid('ASF_No_Error_Correction')
+        + struct.pack('<QIIHI', 0, len(waveformatex), 0, 1, 0) + waveformatex
+    ))
+    padding_object = asf_object('ASF_Padding_Object', b'\x00' * padding)
+
+    data = asf_object('ASF_Data_Object', (
+        file_id_bytes + struct.pack('<QH', 10, 0x0101) + b'\xAA' * data_size
+    ))
+    simple_index = asf_object('ASF_Simple_Index_Object', (
+        file_id_bytes + struct.pack('<QII', 10_000_000, 1, 2) + struct.pack('<IH', 0, 1) * 2
+    )) if index else b''
+
+    def assemble(file_size: int) -> bytes:
+        children = [file_properties(file_size), content, ext_content, stream,
+                    *extra_objects, padding_object]
+        body = b''.join(children)
+        header = (_guid('ASF_Header_Object') + struct.pack('<QI', 30 + len(body), len(children))
+                  + b'\x01\x02' + body)
+        return header + data + simple_index
+
+    return assemble(len(assemble(0)))
+
+
+def video_stream_object(width: int = 640, height: int = 480, fourcc: bytes = b'WMV3',
+                        stream_number: int = 2, extra: bytes = b'\x0f\xf1') -> bytes:
+    """Build an ASF_Stream_Properties_Object for a video stream."""
+    bitmap = struct.pack('<IiiHH4sIiiII', 40 + len(extra), width, height, 1, 24, fourcc,
+                         0, 0, 0, 0, 0) + extra
+    type_data = struct.pack('<IIBH', width, height, 2, len(bitmap)) + bitmap
+    return asf_object('ASF_Stream_Properties_Object', (
+        _guid('ASF_Video_Media') + _guid('ASF_No_Error_Correction')
+        + struct.pack('<QIIHI', 0, len(type_data), 0, stream_number, 0) + type_data
+    ))
+
+
+def stream_bitrate_object(rates: Sequence[Tuple[int, int]]) -> bytes:
+    """Build an ASF_Stream_Bitrate_Properties_Object from (stream, bits/s) pairs."""
+    payload = struct.pack('<H', len(rates))
+    for number, bitrate in rates:
+        payload += struct.pack('<HI', number, bitrate)
+    return asf_object('ASF_Stream_Bitrate_Properties_Object', payload)
+
+
+def extended_stream_object(stream_number: int, data_bitrate: int, buffer_size: int,
+                           time_per_frame: int, name: str = '',
+                           embedded: bytes = b'') -> bytes:
+    """Build an ASF_Extended_Stream_Properties_Object, optionally with a stream name."""
+    names = struct.pack('<HH', 0, len(_utf16(name))) + _utf16(name) if name else b''
+    payload = struct.pack('<QQIIIIIIIIHHQHH', 0, 0, data_bitrate, buffer_size, 0, 0, 0, 0,
+                          0, 0, stream_number, 0, time_per_frame, 1 if name else 0, 0)
+    return asf_object('ASF_Extended_Stream_Properties_Object', payload + names + embedded)
+
+
+def header_extension_object(nested: Sequence[bytes]) -> bytes:
+    """Build an ASF_Header_Extension_Object around already-built objects."""
+    data = b''.join(nested)
+    return asf_object('ASF_Header_Extension_Object',
+                      b'\x00' * 16 + struct.pack('<HI', 6, len(data)) + data)
+
+
+def marker_object(markers: Sequence[Tuple[float, str]], name: str = '') -> bytes:
+    """Build an ASF_Marker_Object from (seconds, description) pairs."""
+    table_name = _utf16(name) if name else b''
+    payload = b'\x00' * 16 + struct.pack('<IHH', len(markers), 0, len(table_name)) + table_name
+    for seconds, description in markers:
+        text = _utf16(description)
+        payload += struct.pack('<QQHIII', 0, int(seconds * 10_000_000), 14 + len(text),
+                               0, 0, len(text) // 2) + text
+    return asf_object('ASF_Marker_Object', payload)
+
+
+def script_command_object(types: Sequence[str],
+                          commands: Sequence[Tuple[int, int, str]]) -> bytes:
+    """Build an ASF_Script_Command_Object from type names and (ms, type, name) tuples."""
+    payload = b'\x00' * 16 + struct.pack('<HH', len(commands), len(types))
+    for type_name in types:
+        payload += struct.pack('<H', len(type_name) + 1) + _utf16(type_name)
+    for ms, type_index, name in commands:
+        payload += struct.pack('<IHH', ms, type_index, len(name) + 1) + _utf16(name)
+    return asf_object('ASF_Script_Command_Object', payload)
+
+
+def codec_list_object(entries: Sequence[Tuple[int, str, str, bytes]]) -> bytes:
+    """Build an ASF_Codec_List_Object from (type, name, description, info) tuples."""
+    payload = b'\x00' * 16 + struct.pack('<I', len(entries))
+    for codec_type, name, description, info in entries:
+        payload += struct.pack('<HH', codec_type, len(name) + 1) + _utf16(name)
+        payload += struct.pack('<H', len(description) + 1) + _utf16(description)
+        payload += struct.pack('<H', len(info)) + info
+    return asf_object('ASF_Codec_List_Object', payload)
+
+
+def picture_value(mime: str, description: str, data: bytes, picture_type: int = 3) -> bytes:
+    """Encode a WM/Picture attribute value."""
+    return (struct.pack('<BI', picture_type, len(data)) + _utf16(mime)
+            + _utf16(description) + data)
+
+
+def fuzz_corpus(seed: int = 20240601, count: int = 400) -> List[bytes]:
+    """
+    Deterministic corpus of hostile headers for robustness tests.
+
+    Mutates a header that exercises every decoded object: random byte
+    flips, truncations, and object size and count fields rewritten to
+    zero, tiny, off-by-one and huge values. A few hand-written worst cases
+    are appended.
+    """
+    import random
+
+    rng = random.Random(seed)
+    extension = header_extension_object([
+        extended_stream_object(1, 128000, 3000, 0, name='Audio'),
+        extended_stream_object(3, 64000, 2000, 400_000,
+                               embedded=video_stream_object(stream_number=3)),
+    ])
+    base = parse_header(build_asf(extra_objects=[
+        video_stream_object(),
+        codec_list_object([(2, 'Windows Media Audio 9.2', '128 kbps', b'\x61\x01')]),
+        stream_bitrate_object([(1, 128000), (2, 1_000_000)]),
+        extension,
+        marker_object([(0, 'Intro'), (30, 'Chorus')]),
+        script_command_object(['URL'], [(1000, 0, 'http://example.com/')]),
+    ])).header
+
+    # Offsets of every top-level object size field, and of the count fields
+    size_fields, pos = [], 30
+    while pos + 24 <= len(base):
+        size_fields.append(pos + 16)
+        pos += struct.unpack_from('<Q', base, pos + 16)[0]
+
+    corpus = []
+    for _ in range(count):
+        sample = bytearray(base)
+        mutation = rng.randrange(4)
+        if mutation == 0:
+            for _ in range(rng.randint(1, 8)):
+                sample[rng.randrange(30, len(sample))] = rng.randrange(256)
+        elif mutation == 1:
+            del sample[rng.randrange(len(sample)):]
+        elif mutation == 2:
+            field = rng.choice(size_fields)
+            size = struct.unpack_from('<Q', sample, field)[0]
+            struct.pack_into('<Q', sample, field, rng.choice(
+                [0, 1, 23, 24, size - 1, size + 1, len(sample), 2 ** 63, 2 ** 64 - 1]))
+        else:
+            struct.pack_into('<I', sample, 24, rng.choice([0, 5, 100, 2 ** 16, 2 ** 32 - 1]))
+        corpus.append(bytes(sample))
+
+    # Hand-written worst cases
+    zero_child = _guid('ASF_Header_Object') + struct.pack('<QI', 54, 2 ** 32 - 1) + b'\x01\x02' \
+        + _guid('ASF_Padding_Object') + struct.pack('<Q', 0)
+    many_attributes = asf_object('ASF_Extended_Content_Description_Object',
+                                 struct.pack('<H', 65535) + b'\x00' * 8)
+    corpus.append(zero_child)
+    corpus.append(_guid('ASF_Header_Object') + struct.pack('<QI', 30 + len(many_attributes), 1)
+                  + b'\x01\x02' + many_attributes)
+    corpus.append(_guid('ASF_Header_Object') + struct.pack('<QI', 2 ** 64 - 1, 1) + b'\x01\x02')
+    return corpus
+
+
+class RangeServer:
+    """
+    Local stand-in for an object store: serves one payload with Range support.
+
+    Use as a context manager; `url` is valid inside the block and `requests`
+    counts the GET requests served.
+    """
+
+    def __init__(self, payload: bytes, honour_range: bool = True) -> None:
+        self.payload = payload
+        self.honour_range = honour_range
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                server.requests += 1
+                data = server.payload
+                range_header = self.headers.get('Range')
+                if server.honour_range and range_header:
+                    start_s, end_s = range_header.split('=', 1)[1].split('-')
+                    start = int(start_s)
+                    end = min(int(end_s), len(data) - 1)
+                    if start >= len(data):
+                        self.send_response(416)
+                        self.send_header('Content-Range', f'bytes */{len(data)}')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+                    data = data[start:end + 1]
+                else:
+                    self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}/media.wma'
+
+    def __enter__(self) -> 'RangeServer':
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
 
 
 class TestWmaInfo(unittest.TestCase):
@@ -189,6 +481,1204 @@ class TestWmaInfo(unittest.TestCase):
             wma.parse_stream()
 
 
+class TestParserCore(unittest.TestCase):
+    """Test cases for the stateless parse_header() core."""
+
+    def test_parse_header_matches_wmainfo(self) -> None:
+        """parse_header() on raw bytes gives the same results as WmaInfo."""
+        data = build_asf()
+        parsed = parse_header(data)
+        wma = WmaInfo(BytesSource(data))
+
+        self.assertEqual(parsed.tags, wma.tags)
+        self.assertEqual(parsed.info, wma.info)
+        self.assertEqual(parsed.header_objects, wma.header_objects)
+        self.assertEqual(len(parsed.header), wma.header_objects['ASF_Header_Object'].size)
+
+    def test_parse_stream_decodes_payload(self) -> None:
+        """parse_stream() decodes the stream object's payload."""
+        wma = WmaInfo(BytesSource(build_asf()))
+        wma.parse_stream()
+
+        assert wma.stream is not None
+        self.assertEqual(wma.stream.stream_type_name, 'ASF_Audio_Media')
+        self.assertEqual(wma.stream.error_correct_name, 'ASF_No_Error_Correction')
+        self.assertEqual(wma.stream.stream_number, 1)
+        self.assertEqual(wma.stream.audio_channels, 2)
+        self.assertEqual(wma.stream.audio_sample_rate, 44100)
+        self.assertEqual(wma.stream.audio_bitrate, 128000)
+        self.assertEqual(wma.stream.audio_bits_per_sample, 16)
+
+    def test_objects_after_drm_object(self) -> None:
+        """Objects following a content encryption object are still decoded."""
+        drm = asf_object('ASF_Content_Encryption_Object', b'\x00' * 40)
+        wma = WmaInfo(BytesSource(build_asf(extra_objects=[drm])))
+
+        self.assertTrue(wma.has_drm())
+        self.assertIn('ASF_Padding_Object', wma.header_objects)
+        self.assertNotIn('Unknown', wma.header_objects)
+
+    def test_streams_and_codecs_in_one_pass(self) -> None:
+        """Audio, video and codec list details are decoded with the header."""
+        codecs = codec_list_object([
+            (1, 'Windows Media Video 9', 'Professional', b'WMV3'),
+            (2, 'Windows Media Audio 9.2', '128 kbps, 44 kHz, stereo', b'\x61\x01'),
+        ])
+        wma = WmaInfo(BytesSource(build_asf(extra_objects=[video_stream_object(), codecs])))
+
+        audio, video = wma.streams
+        self.assertEqual(audio.stream_type_name, 'ASF_Audio_Media')
+        self.assertEqual(audio.audio_format_tag, 0x0161)
+        self.assertEqual(audio.audio_block_align, 2973)
+        self.assertEqual(audio.audio_extra_data, b'')
+        self.assertEqual(video.stream_type_name, 'ASF_Video_Media')
+        self.assertEqual(video.stream_number, 2)
+        self.assertEqual((video.video_width, video.video_height), (640, 480))
+        self.assertEqual(video.video_compression, 'WMV3')
+        self.assertEqual(video.video_bits_per_pixel, 24)
+        self.assertEqual(video.video_extra_data, b'\x0f\xf1')
+
+        self.assertEqual([c.type_name for c in wma.codecs], ['video', 'audio'])
+        self.assertEqual(wma.codecs[0].name, 'Windows Media Video 9')
+        self.assertEqual(wma.codecs[1].description, '128 kbps, 44 kHz, stereo')
+        self.assertEqual(wma.codecs[1].information, b'\x61\x01')
+
+        copy = WmaInfo.from_bytes(wma.to_bytes())
+        self.assertEqual(copy.streams, wma.streams)
+        self.assertEqual(copy.codecs, wma.codecs)
+        self.assertEqual(WmaInfo.from_dict(wma.to_dict()).codecs, wma.codecs)
+
+    def test_per_stream_bitrates_and_frame_rates(self) -> None:
+        """Bitrate and frame figures come from the header, whatever the object order."""
+        extension = header_extension_object([
+            extended_stream_object(1, 128000, 3000, 0),
+            extended_stream_object(2, 1_500_000, 5000, 333_667, name='Main video'),
+            extended_stream_object(3, 64000, 2000, 400_000,
+                                   embedded=video_stream_object(stream_number=3)),
+        ])
+        bitrates = stream_bitrate_object([(1, 127_500), (2, 1_480_000), (3, 63_000)])
+        data = build_asf(extra_objects=[bitrates, extension, video_stream_object()])
+        wma = WmaInfo(BytesSource(data))
+
+        audio, hidden, video = wma.streams
+        self.assertEqual((audio.stream_number, hidden.stream_number, video.stream_number),
+                         (1, 3, 2))
+        self.assertEqual(audio.average_bitrate, 127_500)
+        self.assertEqual(audio.data_bitrate, 128000)
+        self.assertEqual(audio.buffer_size, 3000)
+        self.assertIsNone(audio.frame_rate)
+        self.assertEqual(video.average_bitrate, 1_480_000)
+        self.assertAlmostEqual(video.frame_rate, 29.97, places=2)
+        self.assertEqual(hidden.video_width, 640)
+        self.assertEqual(hidden.frame_rate, 25.0)
+
+        wma.parse_stream()
+        self.assertEqual(wma.stream, video)  # The last top-level stream object
+        self.assertEqual(WmaInfo.from_bytes(wma.to_bytes()).streams, wma.streams)
+
+    def test_marker_and_script_command_tables(self) -> None:
+        """Markers and script commands are decoded on demand and searchable by time."""
+        markers = marker_object([(0, 'Intro'), (95.5, 'Verse'), (30, 'Chorus')], name='Chapters')
+        commands = script_command_object(
+            ['URL', 'FILENAME'],
+            [(1000, 0, 'http://example.com/'), (500, 1, 'cover.jpg'), (2000, 5, 'bogus')])
+        wma = WmaInfo(BytesSource(build_asf(extra_objects=[markers, commands])))
+
+        table = wma.markers()
+        self.assertIs(wma.markers(), table)
+        self.assertEqual(table.name, 'Chapters')
+        self.assertEqual(list(table.times), [0.0, 30.0, 95.5])
+        self.assertEqual(table[-1], Marker(95.5, 'Verse'))
+        self.assertIsNone(table.at(-1))
+        self.assertEqual(table.at(0).name, 'Intro')
+        self.assertEqual(table.at(94).name, 'Chorus')
+        self.assertEqual(table.at(1e9).name, 'Verse')
+        self.assertEqual([m.name for m in table.between(0, 95.5)], ['Intro', 'Chorus'])
+
+        scripts = wma.script_commands()
+        self.assertEqual(scripts.types, ['URL', 'FILENAME'])
+        self.assertEqual(list(scripts), [
+            ScriptCommand(0.5, 'FILENAME', 'cover.jpg'),
+            ScriptCommand(1.0, 'URL', 'http://example.com/'),
+            ScriptCommand(2.0, '', 'bogus'),
+        ])
+        self.assertEqual(scripts.at(1.5).command, 'http://example.com/')
+
+        plain = WmaInfo(BytesSource(build_asf()))
+        self.assertEqual(len(plain.markers()), 0)
+        self.assertIsNone(plain.script_commands().at(10))
+        with self.assertRaises(WmaInfoError):
+            WmaInfo.from_bytes(wma.to_bytes()).markers()
+
+    def test_truncated_header(self) -> None:
+        """A header cut short inside an object raises WmaInfoError."""
+        data = build_asf()
+        size = WmaInfo(BytesSource(data)).header_objects['ASF_Header_Object'].size
+        with self.assertRaises(WmaInfoError):
+            parse_header(data[:size - 200])
+
+    def test_concurrent_parsing(self) -> None:
+        """Many threads can decode one buffer and share one instance."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        data = build_asf()
+        expected = parse_header(data).info
+        wma = WmaInfo(BytesSource(data))
+        source = CoalescingSource(BytesSource(data), block_size=512)
+
+        def work(i: int) -> bool:
+            wma.parse_stream()
+            ok = parse_header(data).info == expected
+            ok = ok and WmaInfo(source).info == expected
+            return ok and wma.stream is not None and wma.stream.audio_channels == 2
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertTrue(all(pool.map(work, range(200))))
+
+
+class TestHeaderBatch(unittest.TestCase):
+    """Test cases for the columnar decode_header_batch()."""
+
+    def setUp(self) -> None:
+        self.headers = [
+            parse_header(build_asf(title=f'Track {i}', max_bitrate=64000 * (i + 1),
+                                   extra_objects=[video_stream_object()] * (i % 2))).header
+            for i in range(5)
+        ]
+        self.parsed = [parse_header(h) for h in self.headers]
+
+    def backends(self) -> List[bool]:
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return [False]
+        return [False, True]
+
+    def test_columns_match_per_file_decoding(self) -> None:
+        """Every column value equals the per-file info field or StreamInfo attribute."""
+        for use_numpy in self.backends():
+            batch = decode_header_batch(self.headers, use_numpy=use_numpy)
+            self.assertEqual(len(batch), 5)
+            for field, column in batch.files.items():
+                self.assertEqual(column, [p.info[field] for p in self.parsed], field)
+
+            streams = [(i, s) for i, p in enumerate(self.parsed) for s in p.streams]
+            self.assertEqual(batch.streams['file'], [i for i, _ in streams])
+            for field, column in batch.streams.items():
+                if field != 'file':
+                    self.assertEqual(column, [getattr(s, field) for _, s in streams], field)
+
+    def test_packed_buffer_with_offsets(self) -> None:
+        """One packed buffer plus an offset table gives the same columns."""
+        packed = bytearray(b'\x00' * 7)
+        offsets = []
+        for header in self.headers:
+            offsets.append(len(packed))
+            packed += header + b'\xee' * 3
+        for use_numpy in self.backends():
+            batch = decode_header_batch(bytes(packed), offsets, use_numpy=use_numpy)
+            self.assertEqual(batch, decode_header_batch(self.headers, use_numpy=False))
+
+    def test_rejects_bad_headers(self) -> None:
+        """Non-ASF and truncated buffers raise WmaInfoError."""
+        with self.assertRaises(WmaInfoError):
+            decode_header_batch([self.headers[0], b'\x00' * 64])
+        with self.assertRaises(WmaInfoError):
+            decode_header_batch([self.headers[0][:200]])
+
+    def test_single_buffer_is_one_header(self) -> None:
+        """A lone header buffer without offsets decodes as a batch of one."""
+        for use_numpy in self.backends():
+            self.assertEqual(decode_header_batch(self.headers[0], use_numpy=use_numpy),
+                             decode_header_batch([self.headers[0]], use_numpy=use_numpy))
+
+    def test_header_without_file_properties(self) -> None:
+        """A header lacking File Properties gets None in the file columns, not an error."""
+        header = bytearray(self.headers[1])
+        pos = header.find(_guid('ASF_File_Properties_Object'))
+        header[pos:pos + 16] = b'\x11' * 16
+        self.assertNotIn('filesize', parse_header(bytes(header)).info)
+
+        headers = [self.headers[0], bytes(header), self.headers[2]]
+        for use_numpy in self.backends():
+            batch = decode_header_batch(headers, use_numpy=use_numpy)
+            self.assertEqual(len(batch), 3)
+            for field, column in batch.files.items():
+                self.assertEqual(column, [self.parsed[0].info[field], None,
+                                          self.parsed[2].info[field]], field)
+            self.assertEqual(batch.streams['file'],
+                             [i for i in range(3) for _ in self.parsed[i].streams])
+
+    def test_declared_size_stays_inside_record(self) -> None:
+        """A header size past the next record or the limit is rejected, not followed."""
+        first, second = self.headers[0], self.headers[1]
+        oversized = first[:16] + struct.pack('<Q', len(first) + len(second)) + first[24:]
+        packed = oversized + second
+        for use_numpy in self.backends():
+            with self.assertRaisesRegex(MalformedHeaderError, 'header 0'):
+                decode_header_batch(packed, [0, len(first)], use_numpy=use_numpy)
+            with self.assertRaises(ParseLimitError):
+                decode_header_batch([first], use_numpy=use_numpy,
+                                    limits=ParseLimits(max_header_size=len(first) - 1))
+
+
+class TestIncrementalParser(unittest.TestCase):
+    """Test cases for the push-based IncrementalParser."""
+
+    def test_byte_at_a_time_matches_parse_header(self) -> None:
+        """Feeding one byte at a time gives the same results as parse_header()."""
+        data = build_asf(extra_objects=[video_stream_object()])
+        expected = parse_header(data)
+        size = expected.header_objects['ASF_Header_Object'].size
+
+        parser = IncrementalParser('upload.wma')
+        self.assertEqual(parser.feed(data[:10]), 20)
+        for i in range(10, size - 1):
+            self.assertGreater(parser.feed(data[i:i + 1]), 0)
+        self.assertFalse(parser.complete)
+        self.assertEqual(parser.feed(data[size - 1:]), 0)
+
+        result = parser.result()
+        self.assertEqual(result, expected)
+        self.assertEqual(len(parser._buffer), size)
+        self.assertEqual(parser.bytes_fed, len(data))
+
+        wma = parser.to_wmainfo()
+        self.assertEqual(wma.tags, expected.tags)
+        self.assertEqual(wma.streams, expected.streams)
+
+    def test_partial_results_before_completion(self) -> None:
+        """File properties and the DRM flag are visible once their objects arrive."""
+        drm = asf_object('ASF_Content_Encryption_Object', b'\x00' * 40)
+        data = build_asf(extra_objects=[drm])
+        layout = parse_header(data).header_objects
+        drm_end = layout['ASF_Content_Encryption_Object'].offset + len(drm)
+        props_end = (layout['ASF_File_Properties_Object'].offset +
+                     layout['ASF_File_Properties_Object'].size)
+
+        parser = IncrementalParser()
+        parser.feed(data[:props_end - 1])
+        self.assertEqual(parser.info, {})
+        parser.feed(data[props_end - 1:props_end])
+        self.assertEqual(parser.info['max_bitrate'], 128000)
+        self.assertFalse(parser.drm)
+
+        parser.feed(data[props_end:drm_end])
+        self.assertTrue(parser.drm)
+        self.assertFalse(parser.complete)
+        with self.assertRaises(WmaInfoError):
+            parser.result()
+
+    def test_rejects_non_asf_early(self) -> None:
+        """Non-ASF data is rejected as soon as the first 16 bytes arrive."""
+        parser = IncrementalParser()
+        parser.feed(b'ID3\x04\x00\x00\x00')
+        with self.assertRaises(WmaInfoError):
+            parser.feed(b'\x00' * 9)
+
+    def test_rejects_oversized_header(self) -> None:
+        """A header claiming more than limits.max_header_size is rejected."""
+        data = build_asf()
+        with self.assertRaises(ParseLimitError):
+            IncrementalParser(limits=ParseLimits(max_header_size=100)).feed(data[:30])
+
+
+class TestHostileInput(unittest.TestCase):
+    """Test cases for bounded, fail-fast parsing of untrusted headers."""
+
+    def test_fuzz_corpus(self) -> None:
+        """Every fuzzed header parses or raises WmaInfoError, within a time bound."""
+        import time
+
+        for i, sample in enumerate(fuzz_corpus()):
+            start = time.perf_counter()
+            try:
+                wma = WmaInfo(BytesSource(sample))
+                wma.parse_stream()
+                list(wma.markers())
+                list(wma.script_commands())
+            except WmaInfoError:
+                pass
+
+            parser = IncrementalParser()
+            try:
+                for offset in range(0, len(sample), 7):
+                    if parser.feed(sample[offset:offset + 7]) == 0:
+                        break
+            except WmaInfoError:
+                pass
+
+            try:
+                decode_header_batch([sample])
+            except WmaInfoError:
+                pass
+            self.assertLess(time.perf_counter() - start, 0.5, f"sample {i}")
+
+    def test_specific_errors(self) -> None:
+        """Each kind of failure raises its own WmaInfoError subclass."""
+        data = build_asf()
+        header_size = parse_header(data).header_objects['ASF_Header_Object'].size
+
+        with self.assertRaises(TruncatedHeaderError):
+            parse_header(data[:header_size - 1])
+
+        zero_child = (_guid('ASF_Header_Object') + struct.pack('<QI', 54, 1) + b'\x01\x02'
+                      + _guid('ASF_Padding_Object') + struct.pack('<Q', 0))
+        with self.assertRaises(MalformedHeaderError):
+            parse_header(zero_child)
+
+        overrun = bytearray(data)
+        struct.pack_into('<Q', overrun, 30 + 16, header_size)  # File Properties size
+        with self.assertRaises(MalformedHeaderError):
+            parse_header(bytes(overrun))
+
+        too_many = bytearray(data)
+        struct.pack_into('<I', too_many, 24, 2 ** 32 - 1)
+        with self.assertRaises(ParseLimitError):
+            WmaInfo(BytesSource(bytes(too_many)))
+
+    def test_configurable_limits(self) -> None:
+        """ParseLimits bounds header size, entries and string lengths."""
+        data = build_asf(extra_objects=[marker_object([(i, 'm') for i in range(5)])])
+        self.assertEqual(len(WmaInfo(BytesSource(data)).markers()), 5)
+
+        cases = [
+            ParseLimits(max_header_size=100),
+            ParseLimits(max_objects=3),
+            ParseLimits(max_entries=2),
+            ParseLimits(max_string_length=8),
+        ]
+        for limits in cases:
+            with self.assertRaises(ParseLimitError, msg=str(limits)):
+                wma = WmaInfo(BytesSource(data), limits=limits)
+                wma.markers()
+            with self.assertRaises(ParseLimitError, msg=str(limits)):
+                parser = IncrementalParser(limits=limits)
+                parser.feed(data)
+                parser.to_wmainfo().markers()
+
+        # Marker entries are only counted when read, after the header is complete
+        parser = IncrementalParser(limits=ParseLimits(max_entries=4))
+        parser.feed(data)
+        wma = parser.to_wmainfo()
+        with self.assertRaises(ParseLimitError):
+            wma.markers()
+
+
+class TestRandomAccessSources(unittest.TestCase):
+    """Test cases for parsing through RandomAccessSource implementations."""
+
+    def setUp(self) -> None:
+        self.picture = picture_value('image/jpeg', 'Cover', b'\xff\xd8JPEGDATA\xff\xd9')
+        self.data = build_asf(extended=(
+            ('WM/AlbumTitle', 0, _utf16('Test Album')),
+            ('WM/Picture', 1, self.picture),
+        ))
+        self.test_file = Path(tempfile.mktemp(suffix='.wma'))
+        self.test_file.write_bytes(self.data)
+
+    def tearDown(self) -> None:
+        if self.test_file.exists():
+            self.test_file.unlink()
+
+    def test_bytes_source_matches_file(self) -> None:
+        """Parsing from memory gives the same result as parsing the file."""
+        from_file = WmaInfo(self.test_file)
+        from_bytes = WmaInfo(BytesSource(self.data, name='memory.wma'))
+
+        self.assertEqual(from_bytes.tags, from_file.tags)
+        self.assertEqual(from_bytes.info, from_file.info)
+        self.assertEqual(from_bytes.tags['Title'], 'Test Title')
+        self.assertEqual(from_bytes.file_path, Path('memory.wma'))
+
+    def test_file_source_closed_after_parse(self) -> None:
+        """The file handle opened for parsing is released afterwards."""
+        wma = WmaInfo(self.test_file)
+        self.assertIsNone(wma._source._fh)
+
+    def test_coalescing_reads_header_once(self) -> None:
+        """A header parse through the block cache costs a single read."""
+        calls: List[Tuple[int, int]] = []
+        inner = BytesSource(self.data)
+        original = inner.read_at
+
+        def counting_read_at(offset: int, length: int) -> bytes:
+            calls.append((offset, length))
+            return original(offset, length)
+
+        inner.read_at = counting_read_at  # type: ignore[assignment]
+        wma = WmaInfo(CoalescingSource(inner))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(wma.tags['AlbumTitle'], 'Test Album')
+
+    def test_coalescing_merges_adjacent_misses(self) -> None:
+        """Adjacent missing blocks are fetched with one underlying read."""
+        source = CoalescingSource(BytesSource(bytes(range(256)) * 4), block_size=16)
+        self.assertEqual(source.read_at(10, 100), (bytes(range(256)) * 4)[10:110])
+        self.assertEqual(source.read_at(1000, 100), (bytes(range(256)) * 4)[1000:])
+        self.assertEqual(source.read_at(5000, 10), b'')
+
+    def test_http_range_parse(self) -> None:
+        """A remote header parse costs at most two range requests."""
+        with RangeServer(self.data) as server:
+            source = CoalescingSource(HTTPRangeSource(server.url))
+            wma = WmaInfo(source)
+
+            self.assertLessEqual(server.requests, 2)
+            self.assertEqual(wma.tags['Title'], 'Test Title')
+            self.assertEqual(wma.info['filesize'], len(self.data))
+
+    def test_http_without_range_support(self) -> None:
+        """Servers that ignore Range still produce a correct parse."""
+        with RangeServer(self.data, honour_range=False) as server:
+            wma = WmaInfo(CoalescingSource(HTTPRangeSource(server.url)))
+            self.assertEqual(wma.tags['Author'], 'Test Author')
+
+    def test_index_objects_via_source(self) -> None:
+        """Index objects after the data object are found through the source."""
+        with RangeServer(self.data) as server:
+            wma = WmaInfo(CoalescingSource(HTTPRangeSource(server.url), block_size=1024))
+            wma.parse_index_objects()
+
+        self.assertIn('ASF_Simple_Index_Object', wma.index_objects)
+        index = wma.index_objects['ASF_Simple_Index_Object']
+        self.assertEqual(index.offset + index.size, len(self.data))
+
+    def test_read_picture(self) -> None:
+        """WM/Picture payloads are read and decoded through the source."""
+        for wma in (WmaInfo(self.test_file), WmaInfo(BytesSource(self.data))):
+            picture = wma.read_picture()
+            assert picture is not None
+            self.assertEqual(picture.mime_type, 'image/jpeg')
+            self.assertEqual(picture.description, 'Cover')
+            self.assertEqual(picture.picture_type, 3)
+            self.assertEqual(picture.data, b'\xff\xd8JPEGDATA\xff\xd9')
+
+    def test_read_picture_absent(self) -> None:
+        """read_picture returns None when there is no WM/Picture."""
+        wma = WmaInfo(BytesSource(build_asf()))
+        self.assertIsNone(wma.read_picture())
+
+
+class TestSerialization(unittest.TestCase):
+    """Test cases for to_dict/from_dict and the binary encoding."""
+
+    def setUp(self) -> None:
+        self.data = build_asf(extended=(
+            ('WM/AlbumTitle', 0, _utf16('Album \u00e9\u4e2d')),
+            ('WM/TrackNumber', 3, struct.pack('<I', 7)),
+            ('WM/Picture', 1, picture_value('image/png', '', b'PNG')),
+            ('IsVBR', 2, struct.pack('<I', 1)),
+            ('WM/Custom', 6, b'\x00\x01raw'),
+            ('WM/Huge', 4, struct.pack('<Q', 2**64 - 1)),
+        ))
+        self.wma = WmaInfo(BytesSource(self.data, name='album/track.wma'))
+        self.wma.parse_stream()
+        self.wma.parse_index_objects()
+
+    def assertSameResult(self, copy: WmaInfo) -> None:
+        self.assertEqual(copy.file_path, self.wma.file_path)
+        self.assertEqual(copy.drm, self.wma.drm)
+        self.assertEqual(copy.tags, self.wma.tags)
+        self.assertEqual(copy.info, self.wma.info)
+        self.assertEqual(copy.header_objects, self.wma.header_objects)
+        self.assertEqual(copy.index_objects, self.wma.index_objects)
+        self.assertEqual(copy.stream, self.wma.stream)
+        self.assertEqual(copy.streams, self.wma.streams)
+        self.assertEqual(copy.header_objects['ASF_Header_Object'].num_objects,
+                         self.wma.header_objects['ASF_Header_Object'].num_objects)
+
+    def test_dict_round_trip(self) -> None:
+        """from_dict(to_dict()) reproduces the parse results."""
+        self.assertSameResult(WmaInfo.from_dict(self.wma.to_dict()))
+
+    def test_bytes_round_trip(self) -> None:
+        """from_bytes(to_bytes()) reproduces the parse results and value types."""
+        copy = WmaInfo.from_bytes(self.wma.to_bytes())
+        self.assertSameResult(copy)
+        self.assertIs(copy.info['IsVBR'], True)
+        self.assertIsInstance(copy.info['Custom'], bytes)
+        self.assertIsInstance(copy.info['bitrate'], float)
+        self.assertEqual(copy.info['Huge'], 2**64 - 1)
+
+    def test_bytes_round_trip_without_stream(self) -> None:
+        """An unparsed stream round-trips as None."""
+        wma = WmaInfo(BytesSource(self.data))
+        self.assertIsNone(WmaInfo.from_bytes(wma.to_bytes()).stream)
+
+    def test_encoding_smaller_than_pickle(self) -> None:
+        """The binary encoding is smaller than pickling the instance."""
+        import pickle
+        self.assertLess(len(self.wma.to_bytes()), len(pickle.dumps(self.wma)))
+
+    def test_rejects_other_versions(self) -> None:
+        """Data from an incompatible version or a truncated buffer is rejected."""
+        encoded = self.wma.to_bytes()
+        with self.assertRaises(WmaInfoError):
+            WmaInfo.from_bytes(encoded[:4] + b'\x63' + encoded[5:])
+        with self.assertRaises(WmaInfoError):
+            WmaInfo.from_bytes(encoded[:len(encoded) // 2])
+        with self.assertRaises(WmaInfoError):
+            WmaInfo.from_dict(dict(self.wma.to_dict(), version=99))
+
+    def test_every_truncation_rejected(self) -> None:
+        """Each proper prefix of an encoding raises WmaInfoError, never IndexError."""
+        encoded = self.wma.to_bytes()
+        self.assertTrue(self.wma.streams)
+        for n in range(len(encoded)):
+            with self.assertRaises(WmaInfoError, msg=f"prefix of {n} bytes"):
+                WmaInfo.from_bytes(encoded[:n])
+
+    def test_unknown_key_id_rejected(self) -> None:
+        """A tag key id outside the well-known table is reported as corrupt."""
+        encoded = bytearray(self.wma.to_bytes())
+        encoded[6 + struct.calcsize('<IIIIBIII')] = 0xFF  # First tag's key id
+        with self.assertRaises(WmaInfoError):
+            WmaInfo.from_bytes(bytes(encoded))
+
+    def test_restored_instance_reads_from_path(self) -> None:
+        """A restored instance can still read lazily from its original path."""
+        test_file = Path(tempfile.mktemp(suffix='.wma'))
+        try:
+            test_file.write_bytes(self.data)
+            wma = WmaInfo(test_file)
+            for copy in (WmaInfo.from_bytes(wma.to_bytes()), WmaInfo.from_dict(wma.to_dict())):
+                copy.parse_index_objects()
+                self.assertIn('ASF_Simple_Index_Object', copy.index_objects)
+                picture = copy.read_picture()
+                self.assertIsNotNone(picture)
+                self.assertEqual(picture, wma.read_picture())
+        finally:
+            test_file.unlink()
+
+
+class TestScan(unittest.TestCase):
+    """Test cases for the batch scan API."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.paths = []
+        for i in range(5):
+            path = self.root / f'{i}.wma'
+            path.write_bytes(build_asf(title=f'Track {i}'))
+            self.paths.append(path)
+        (self.root / 'broken.wma').write_bytes(b'INVALID' * 10)
+        self.paths.insert(2, self.root / 'broken.wma')
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_discover_sniffs_content(self) -> None:
+        """discover() finds ASF files by content, whatever their names."""
+        nested = self.root / 'a' / 'b'
+        nested.mkdir(parents=True)
+        (nested / 'misnamed.asf').write_bytes(build_asf(title='Nested'))
+        (nested / 'no_extension').write_bytes(build_asf())
+        (nested / 'fake.wma').write_bytes(b'RIFF' * 8)
+        (self.root / 'short.wma').write_bytes(b'\x30')
+        expected = sorted(str(p) for p in self.paths if p.name != 'broken.wma')
+        expected += [str(nested / 'misnamed.asf'), str(nested / 'no_extension')]
+
+        for workers in (0, 4):
+            stats = DiscoveryStats()
+            found = list(discover(self.root, workers=workers, batch_size=3, stats=stats))
+            self.assertEqual(sorted(found), sorted(expected))
+            self.assertEqual((stats.directories, stats.files, stats.candidates), (3, 10, 7))
+            self.assertGreater(stats.files_per_second, 0)
+
+        titles = {r.wma.tags['Title'] for r in scan(discover(self.root), workers=2)}
+        self.assertIn('Nested', titles)
+
+    def test_scan_reports_errors_in_order(self) -> None:
+        """Results come back in input order with failures captured."""
+        for workers in (0, 3):
+            results = list(scan(self.paths, workers=workers))
+            self.assertEqual([r.path for r in results], self.paths)
+            self.assertEqual([r.ok for r in results], [True, True, False, True, True, True])
+            self.assertIsInstance(results[2].error, WmaInfoError)
+            self.assertEqual(results[3].wma.tags['Title'], 'Track 2')
+
+
+class TestArchiveScan(unittest.TestCase):
+    """Test cases for scanning zip and tar archives in place."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.members = [
+            ('album/01.wma', build_asf(title='One')),
+            ('album/cover.jpg', b'\xff\xd8' * 100),
+            ('album/02.WMA', build_asf(title='Two')),
+            ('album/broken.wma', build_asf(title='Broken')[:300]),
+        ]
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def check(self, archive: Path) -> None:
+        results = list(scan_archive(archive))
+        self.assertEqual([r.member for r in results],
+                         ['album/01.wma', 'album/02.WMA', 'album/broken.wma'])
+        self.assertTrue(all(r.path == archive for r in results))
+        self.assertEqual([r.ok for r in results], [True, True, False])
+        self.assertIsInstance(results[2].error, WmaInfoError)
+
+        wma = results[1].wma
+        self.assertEqual(wma.tags['Title'], 'Two')
+        self.assertEqual(wma.streams[0].audio_channels, 2)
+        self.assertEqual(wma.info['filesize'], len(self.members[2][1]))
+
+    def test_zip(self) -> None:
+        """Stored and deflated zip members are parsed without extraction."""
+        import zipfile
+
+        archive = self.root / 'bundle.zip'
+        with zipfile.ZipFile(archive, 'w') as zf:
+            for i, (name, data) in enumerate(self.members):
+                zf.writestr(name, data, zipfile.ZIP_DEFLATED if i % 2 else zipfile.ZIP_STORED)
+        self.check(archive)
+
+    def test_zip_unreadable_members(self) -> None:
+        """Encrypted members and unknown methods fail alone, not the whole scan."""
+        import zipfile
+
+        archive = self.root / 'locked.zip'
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('a/encrypted.wma', build_asf())
+            zf.writestr('a/exotic.wma', build_asf())
+            # Recorded in the central directory only, which is what open() checks
+            zf.getinfo('a/encrypted.wma').flag_bits |= 0x1
+            zf.getinfo('a/exotic.wma').compress_type = 99
+            zf.writestr('a/fine.wma', build_asf(title='Fine'))
+
+        results = list(scan_archive(archive))
+        self.assertEqual([r.member for r in results],
+                         ['a/encrypted.wma', 'a/exotic.wma', 'a/fine.wma'])
+        self.assertIsInstance(results[0].error, RuntimeError)
+        self.assertIsInstance(results[1].error, NotImplementedError)
+        self.assertEqual(results[2].wma.tags['Title'], 'Fine')
+
+    def test_tar(self) -> None:
+        """Plain and compressed tars are both supported."""
+        import io
+        import tarfile
+
+        for mode, suffix in (('w', '.tar'), ('w:gz', '.tar.gz'), ('w:bz2', '.tar.bz2')):
+            archive = self.root / f'bundle{suffix}'
+            with tarfile.open(archive, mode) as tf:
+                for name, data in self.members:
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    tf.addfile(info, io.BytesIO(data))
+            self.check(archive)
+
+    def test_truncated_tar(self) -> None:
+        """A cut-off tar reports the damage as a result instead of raising."""
+        import io
+        import tarfile
+
+        for mode, suffix in (('w', '.tar'), ('w:gz', '.tar.gz')):
+            buf = io.BytesIO()
+            with tarfile.open(fileobj=buf, mode=mode) as tf:
+                for i in range(4):
+                    # Random padding keeps the compressed size proportional
+                    data = build_asf(title=f'Track {i}') + os.urandom(8192)
+                    info = tarfile.TarInfo(f'{i}.wma')
+                    info.size = len(data)
+                    tf.addfile(info, io.BytesIO(data))
+            archive = self.root / f'cut{suffix}'
+            archive.write_bytes(buf.getvalue()[:len(buf.getvalue()) * 7 // 10])
+
+            results = list(scan_archive(archive))
+            self.assertEqual(results[0].wma.tags['Title'], 'Track 0', msg=suffix)
+            self.assertIsNone(results[-1].member, msg=suffix)
+            self.assertIsInstance(results[-1].error, WmaInfoError, msg=suffix)
+
+    def test_not_an_archive(self) -> None:
+        """Files that are neither zip nor tar raise WmaInfoError."""
+        path = self.root / 'plain.wma'
+        path.write_bytes(build_asf())
+        with self.assertRaises(WmaInfoError):
+            list(scan_archive(path))
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'needs Unix sockets')
+class TestMetadataServer(unittest.TestCase):
+    """Test cases for the `wmainfo serve` daemon and its client."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.socket_path = str(self.root / 'wmainfo.sock')
+        self.file = self.root / 'song.wma'
+        self.file.write_bytes(build_asf(title='Warm'))
+
+        self.server = MetadataServer(self.socket_path, cache_size=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def test_query_and_cache(self) -> None:
+        """Repeated queries are answered from the cache until the file changes."""
+        missing = self.root / 'missing.wma'
+        first, failed = query_server([self.file, missing], self.socket_path)
+        self.assertEqual(first.wma.tags['Title'], 'Warm')
+        self.assertEqual(first.wma.streams[0].audio_channels, 2)
+        self.assertIsInstance(failed.error, WmaInfoError)
+
+        query_server([self.file], self.socket_path)
+        self.assertEqual((self.server.hits, self.server.misses), (1, 1))
+
+        self.file.write_bytes(build_asf(title='Changed title'))
+        changed = query_server([self.file], self.socket_path)[0]
+        self.assertEqual(changed.wma.tags['Title'], 'Changed title')
+        self.assertEqual(self.server.misses, 2)
+
+    def test_line_protocol(self) -> None:
+        """Single-file and malformed requests over a raw connection."""
+        import json
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            reader = sock.makefile('rb')
+            sock.sendall(json.dumps({'path': str(self.file)}).encode() + b'\n')
+            self.assertIn('data', json.loads(reader.readline()))
+            sock.sendall(b'not json\n')
+            self.assertIn('error', json.loads(reader.readline()))
+            reader.close()
+
+    def test_client_stays_light(self) -> None:
+        """Querying a server does not import the archive, server or NumPy modules."""
+        import subprocess
+        import sys
+
+        query = f"wmainfo.query_server([{str(self.file)!r}], {self.socket_path!r})"
+        code = (f"import sys, wmainfo; print({query}[0].wma.tags['Title']); "
+                "print(sorted({'numpy', 'socketserver', 'tarfile', 'zipfile'} & set(sys.modules)))")
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        self.assertEqual(out.stdout.split('\n')[:2], ['Warm', '[]'])
+
+    def test_second_server_refused(self) -> None:
+        """Only one server can listen on a socket path."""
+        with self.assertRaises(WmaInfoError):
+            MetadataServer(self.socket_path)
+
+    def test_socket_is_private(self) -> None:
+        """The socket is mode 0600 and the client refuses one owned by another user."""
+        import stat
+
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+        with patch('os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(PermissionError):
+                query_server([self.file], self.socket_path)
+
+    def test_non_socket_path_left_alone(self) -> None:
+        """A regular file at the socket path is neither replaced nor deleted."""
+        victim = self.root / 'notes.txt'
+        victim.write_bytes(b'keep me')
+        with self.assertRaises(WmaInfoError):
+            MetadataServer(str(victim))
+        self.assertEqual(victim.read_bytes(), b'keep me')
+
+    def test_default_socket_path(self) -> None:
+        """$XDG_RUNTIME_DIR is preferred, else a private per-user temp directory."""
+        env = {'XDG_RUNTIME_DIR': str(self.root)}
+        with patch.dict(os.environ, env), patch.dict(os.environ):
+            os.environ.pop('WMAINFO_SOCKET', None)
+            self.assertEqual(default_socket_path(), str(self.root / 'wmainfo.sock'))
+            del os.environ['XDG_RUNTIME_DIR']
+            with patch('tempfile.tempdir', self.tmp.name):
+                path = default_socket_path()
+                with MetadataServer(path):
+                    directory = os.path.dirname(path)
+                    self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+                os.chmod(directory, 0o755)
+                with self.assertRaises(WmaInfoError):
+                    MetadataServer(path)
+
+    def test_cli_uses_server_and_falls_back(self) -> None:
+        """The CLI queries the server, or parses locally when none is running."""
+        import io
+        from contextlib import redirect_stdout
+
+        for socket_path in (self.socket_path, str(self.root / 'absent.sock')):
+            argv = ['wmainfo', str(self.file), '--socket', socket_path, '--no-objects']
+            with patch('sys.argv', argv), redirect_stdout(io.StringIO()) as out:
+                main()
+            self.assertRegex(out.getvalue(), r'Title: +Warm')
+        self.assertEqual(self.server.misses, 1)
+
+
+class TestLibraryIndex(unittest.TestCase):
+    """Test cases for the incremental LibraryIndex."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'media'
+        (self.root / 'a' / 'b').mkdir(parents=True)
+        self.files = [self.root / 'one.wma', self.root / 'a' / 'two.wmv',
+                      self.root / 'a' / 'b' / 'three.asf']
+        for i, path in enumerate(self.files):
+            path.write_bytes(build_asf(title=f'Title {i}'))
+        (self.root / 'notes.txt').write_text('not media')
+        self.index = LibraryIndex(Path(self.tmp.name) / 'library.db')
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_initial_update(self) -> None:
+        """The first run parses and stores every media file."""
+        stats = self.index.update(self.root)
+
+        self.assertEqual((stats.added, stats.updated, stats.removed), (3, 0, 0))
+        self.assertEqual(len(self.index), 3)
+        wma = self.index.get(self.files[1])
+        assert wma is not None
+        self.assertEqual(wma.tags['Title'], 'Title 1')
+
+    def test_unchanged_files_not_opened(self) -> None:
+        """A rescan of an unchanged tree parses nothing."""
+        self.index.update(self.root)
+        with patch('wmainfo.WmaInfo.__init__', side_effect=AssertionError('parsed')):
+            stats = self.index.update(self.root)
+        self.assertEqual((stats.added, stats.updated, stats.unchanged), (0, 0, 3))
+
+    def test_other_serialization_version_reparsed(self) -> None:
+        """Rows written with another encoding version are dropped and parsed again."""
+        import sqlite3
+
+        self.index.update(self.root)
+        self.index.close()
+        with sqlite3.connect(str(self.index.db_path)) as db:
+            db.execute("PRAGMA user_version = 1")
+        self.index = LibraryIndex(self.index.db_path)
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.update(self.root).added, 3)
+
+    def test_modified_and_deleted_files(self) -> None:
+        """Modified files are reparsed and deleted files dropped."""
+        self.index.update(self.root)
+        self.files[0].write_bytes(build_asf(title='Retagged'))
+        os.utime(self.files[0], ns=(1, 1))
+        self.files[2].unlink()
+
+        stats = self.index.update(self.root, workers=2)
+
+        self.assertEqual((stats.added, stats.updated, stats.removed, stats.unchanged),
+                         (0, 1, 1, 1))
+        wma = self.index.get(self.files[0])
+        assert wma is not None
+        self.assertEqual(wma.tags['Title'], 'Retagged')
+        self.assertIsNone(self.index.get(self.files[2]))
+        self.assertEqual(len(self.index), 2)
+
+    def test_failures_recorded(self) -> None:
+        """Unparseable files are remembered and not retried until they change."""
+        (self.root / 'bad.wma').write_bytes(b'INVALID' * 10)
+        stats = self.index.update(self.root)
+        self.assertEqual(stats.failed, 1)
+        self.assertEqual([Path(p).name for p, _ in self.index.errors()], ['bad.wma'])
+
+        stats = self.index.update(self.root)
+        self.assertEqual((stats.failed, stats.unchanged), (0, 4))
+
+    def test_sibling_trees_untouched(self) -> None:
+        """Updating one root does not drop entries from a sibling root."""
+        other = Path(self.tmp.name) / 'media2'
+        other.mkdir()
+        (other / 'x.wma').write_bytes(build_asf())
+        self.index.update(other)
+        self.index.update(self.root)
+
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(len(list(self.index)), 4)
+
+    def test_transient_errors_keep_entries(self) -> None:
+        """Files that cannot be stat()ed or listed this run stay indexed."""
+        import wmainfo
+
+        self.index.update(self.root)
+        walk_entries = wmainfo._walk_entries
+        scandir = os.scandir
+
+        def flaky_entries(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            for entry in walk_entries(*args, **kwargs):
+                if entry.path == str(self.files[0]):
+                    flaky = Mock(path=entry.path, stat=Mock(side_effect=PermissionError(13, 'no')))
+                    flaky.name = entry.name
+                    yield flaky
+                else:
+                    yield entry
+
+        def flaky_scandir(path: Any) -> Any:
+            if os.fspath(path) == str(self.root / 'a' / 'b'):
+                raise OSError(5, 'Input/output error')
+            return scandir(path)
+
+        with patch('wmainfo._walk_entries', flaky_entries), patch('os.scandir', flaky_scandir):
+            stats = self.index.update(self.root)
+
+        self.assertEqual((stats.failed, stats.removed, stats.unchanged), (1, 0, 1))
+        self.assertEqual(len(self.index), 3)
+        self.assertIsNotNone(self.index.get(self.files[0]))
+        self.assertIsNotNone(self.index.get(self.files[2]))
+
+
+class TestHeaderPack(unittest.TestCase):
+    """Test cases for header packs and WmaInfo.from_pack()."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.files = []
+        for i in range(3):
+            path = self.root / f'{i}.wma'
+            path.write_bytes(build_asf(title=f'Title {i}', max_bitrate=64000 * (i + 1)))
+            self.files.append(path)
+        self.pack_path = self.root / 'headers.pack'
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_reparse_without_media(self) -> None:
+        """Packed headers parse like the files, and no file is opened."""
+        with HeaderPackWriter(self.pack_path) as writer:
+            failures = writer.extend(self.files + [self.root / 'missing.wma'], workers=2)
+        self.assertEqual([Path(path).name for path, _ in failures], ['missing.wma'])
+        self.assertLess(self.pack_path.stat().st_size, sum(p.stat().st_size for p in self.files))
+
+        expected = []
+        for path in self.files:
+            wma = WmaInfo(path)
+            wma.parse_index_objects()
+            expected.append(wma.to_dict())
+
+        with patch('wmainfo.FileSource', side_effect=AssertionError('opened')), \
+                HeaderPack(self.pack_path) as pack:
+            self.assertEqual(list(pack), [str(p) for p in self.files])
+            self.assertIn(self.files[0], pack)
+            for path, want in zip(self.files, expected):
+                wma = WmaInfo.from_pack(pack, path)
+                wma.parse_index_objects()
+                self.assertEqual(wma.to_dict(), want)
+                with self.assertRaises(WmaInfoError):
+                    pack.source(path).read_at(wma.header_objects['ASF_Header_Object'].size + 24, 1)
+            self.assertEqual(pack.decode_batch().files['max_bitrate'], [64000, 128000, 192000])
+            with self.assertRaises(KeyError):
+                WmaInfo.from_pack(pack, self.root / 'missing.wma')
+
+    def test_append_and_torn_index(self) -> None:
+        """Appends supersede earlier entries; a torn index tail is ignored."""
+        with HeaderPackWriter(self.pack_path) as writer:
+            writer.add(self.files[0])
+            writer.add(self.files[1], include_index=True)
+        self.files[0].write_bytes(build_asf(title='Retagged'))
+        with HeaderPackWriter(self.pack_path) as writer:
+            writer.add(self.files[0])
+        index_path = Path(f'{self.pack_path}.idx')
+        with open(index_path, 'ab') as f:
+            f.write(b'\x01\x02\x03')  # Interrupted write
+
+        with HeaderPack(self.pack_path) as pack:
+            self.assertEqual(list(pack), [str(self.files[1]), str(self.files[0])])
+            self.assertEqual(WmaInfo.from_pack(pack, self.files[0]).tags['Title'], 'Retagged')
+
+        with HeaderPackWriter(self.pack_path) as writer:
+            writer.add(self.files[2])
+        with HeaderPack(self.pack_path) as pack:
+            self.assertEqual(len(pack), 3)
+            self.assertEqual(WmaInfo.from_pack(pack, self.files[2]).tags['Title'], 'Title 2')
+
+    def test_refuses_non_pack_files(self) -> None:
+        """Opening a media file or a foreign index as a pack fails without writing."""
+        original = self.files[0].read_bytes()
+        with self.assertRaises(WmaInfoError):
+            HeaderPackWriter(self.files[0])
+        self.assertEqual(self.files[0].read_bytes(), original)
+        self.assertFalse(Path(f'{self.files[0]}.idx').exists())
+
+        index_path = Path(f'{self.pack_path}.idx')
+        index_path.write_bytes(b'not an index')
+        with self.assertRaises(WmaInfoError):
+            HeaderPackWriter(self.pack_path)
+        self.assertFalse(self.pack_path.exists())
+        self.assertEqual(index_path.read_bytes(), b'not an index')
+
+    def test_cli(self) -> None:
+        """`wmainfo pack` packs a directory tree."""
+        import io
+        from contextlib import redirect_stdout
+
+        argv = ['wmainfo', 'pack', str(self.pack_path), str(self.root)]
+        with patch('sys.argv', argv), redirect_stdout(io.StringIO()) as out:
+            main()
+        self.assertIn('Packed 3 headers', out.getvalue())
+        with HeaderPack(self.pack_path) as pack:
+            self.assertEqual(sorted(pack), sorted(str(p) for p in self.files))
+
+
+class TestDuplicates(unittest.TestCase):
+    """Test cases for header fingerprints and find_duplicates()."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write(self, name: str, data: bytes) -> Path:
+        path = self.root / name
+        path.write_bytes(data)
+        return path
+
+    def test_fingerprint_ignores_padding(self) -> None:
+        """Moving bytes between padding and data keeps the fingerprint."""
+        a = WmaInfo(BytesSource(build_asf(padding=64, data_size=4096)))
+        b = WmaInfo(BytesSource(build_asf(padding=1064, data_size=3096)))
+        c = WmaInfo(BytesSource(build_asf(title='Other', padding=64, data_size=4096)))
+
+        self.assertEqual(a.info['filesize'], b.info['filesize'])
+        self.assertEqual(a.header_fingerprint(), b.header_fingerprint())
+        self.assertNotEqual(a.header_fingerprint(), c.header_fingerprint())
+
+    def test_fingerprint_requires_header(self) -> None:
+        """Instances restored from serialized data cannot be fingerprinted."""
+        wma = WmaInfo.from_bytes(WmaInfo(BytesSource(build_asf())).to_bytes())
+        with self.assertRaises(WmaInfoError):
+            wma.header_fingerprint()
+
+    def test_find_duplicates(self) -> None:
+        """Copies group by fingerprint and re-tagged copies by file ID."""
+        original = self.write('original.wma', build_asf())
+        copy = self.write('copy.wma', build_asf())
+        retagged = self.write('retagged.wma', build_asf(title='Fixed Title'))
+        other = self.write('other.wma', build_asf(file_id='87654321-4321-8765-4321-876543218765'))
+        broken = self.write('broken.wma', b'INVALID' * 10)
+
+        report = find_duplicates([original, copy, retagged, other, broken])
+
+        self.assertEqual((report.scanned, report.failed), (4, 1))
+        self.assertEqual(list(report.by_file_id.values()), [[original, copy, retagged]])
+        self.assertEqual(list(report.by_fingerprint.values()), [[original, copy]])
+
+
+class TestTagIndex(unittest.TestCase):
+    """Test cases for the in-memory TagIndex."""
+
+    def setUp(self) -> None:
+        records = [
+            ('a.wma', 'Artist X', 'Rock', '2001', 3, '128'),
+            ('b.wma', 'artist  x', 'Pop', '1999', 1, '90'),
+            ('c.wma', 'Artist X', 'Rock', '2005-06-01', 7, '140'),
+            ('d.wma', 'Artist Y', 'Rock', '2001', 2, ''),
+            ('e.wma', 'Ａｒｔｉｓｔ X', 'Jazz', '1980', 5, '121.5'),
+        ]
+        self.index = TagIndex()
+        for path, artist, genre, year, track, bpm in records:
+            wma = WmaInfo.__new__(WmaInfo)
+            wma.tags = {'AlbumArtist': artist, 'Genre': genre, 'Year': year,
+                        'TrackNumber': track, 'BeatsPerMinute': bpm}
+            wma.info = {'bitrate': 128.0, 'playtime_seconds': 200 + track}
+            self.index.add(path, wma)
+
+    def names(self, **criteria: object) -> List[str]:
+        return [p.name for p in self.index.query(**criteria)]
+
+    def test_text_equality_is_normalized(self) -> None:
+        """Text matches ignore case and width and collapse whitespace."""
+        self.assertEqual(self.names(AlbumArtist='ARTIST X'),
+                         ['a.wma', 'b.wma', 'c.wma', 'e.wma'])
+        self.assertEqual(self.names(AlbumArtist='Nobody'), [])
+
+    def test_numeric_ranges(self) -> None:
+        """Numeric fields support equality and open or closed ranges."""
+        self.assertEqual(self.names(BeatsPerMinute=(121, None)), ['a.wma', 'c.wma', 'e.wma'])
+        self.assertEqual(self.names(BeatsPerMinute=(121, 130)), ['a.wma', 'e.wma'])
+        self.assertEqual(self.names(Year=2001), ['a.wma', 'd.wma'])
+        self.assertEqual(self.names(Year=(None, 1999)), ['b.wma', 'e.wma'])
+        self.assertEqual(self.names(TrackNumber=(2, 5)), ['a.wma', 'd.wma', 'e.wma'])
+
+    def test_conjunctive_query(self) -> None:
+        """All criteria must match."""
+        self.assertEqual(
+            self.names(AlbumArtist='Artist X', Genre='rock', BeatsPerMinute=(120, None)),
+            ['a.wma', 'c.wma']
+        )
+        self.assertEqual(self.names(Genre='Rock', playtime_seconds=(203, 210)), ['a.wma', 'c.wma'])
+        self.assertEqual(self.names(Genre='Rock', Year=(2002, None), TrackNumber=1), [])
+
+    def test_bitmap_intersection(self) -> None:
+        """Large conjunctive queries intersect bitmaps and agree with a linear scan."""
+        import random
+
+        rng = random.Random(7)
+        index = TagIndex()
+        records = []
+        for i in range(3000):
+            wma = WmaInfo.__new__(WmaInfo)
+            wma.tags = {'Genre': rng.choice(['Rock', 'Pop', 'Jazz']),
+                        'Year': rng.randint(1990, 2000), 'BeatsPerMinute': rng.uniform(60, 180)}
+            wma.info = {'playtime_seconds': rng.randint(60, 600)}
+            records.append(wma.tags)
+            index.add(f'{i}.wma', wma)
+
+        queries = [
+            {'Genre': 'rock', 'Year': (1995, None)},
+            {'Year': (1992, 1997), 'BeatsPerMinute': (100.5, 150.25)},
+            {'Genre': 'Jazz', 'Year': 1990, 'BeatsPerMinute': (None, 170)},
+            {'BeatsPerMinute': (70, 179), 'playtime_seconds': (101, 557)},
+            {'BeatsPerMinute': (61, 90), 'playtime_seconds': (333, None)},
+        ]
+        for criteria in queries:
+            index.BITMAP_THRESHOLD = len(index)  # Check each candidate
+            expected = index.query_ids(**criteria)
+            index.BITMAP_THRESHOLD = 0
+            self.assertEqual(index.query_ids(**criteria), expected, msg=str(criteria))
+            self.assertGreater(len(expected), 0)
+        del index.BITMAP_THRESHOLD
+
+        low, high = 100.5, 150.25
+        self.assertEqual(
+            index.query_ids(Year=(1992, 1997), BeatsPerMinute=(low, high)),
+            [i for i, tags in enumerate(records)
+             if 1992 <= tags['Year'] <= 1997 and low <= tags['BeatsPerMinute'] <= high]
+        )
+        self.assertEqual(index.query_ids(Genre='Jazz', Year=(2001, None)), [])
+
+    def test_unknown_field(self) -> None:
+        """Querying a field that is not indexed raises ValueError."""
+        with self.assertRaises(ValueError):
+            self.index.query(Lyrics='la la')
+
+    def test_index_grows_after_query(self) -> None:
+        """Adding documents after a query refreshes the sorted arrays."""
+        self.assertEqual(self.names(Year=(2010, None)), [])
+        wma = WmaInfo.__new__(WmaInfo)
+        wma.tags, wma.info = {'Year': 2020}, {}
+        self.index.add('f.wma', wma)
+        self.assertEqual(self.names(Year=(2010, None)), ['f.wma'])
+
+    def test_from_scan_results(self) -> None:
+        """Indexes build directly from scan() results, skipping failures."""
+        ok = WmaInfo(BytesSource(build_asf(title='Song')))
+        index = TagIndex.from_results([
+            ScanResult(Path('ok.wma'), wma=ok),
+            ScanResult(Path('bad.wma'), error=WmaInfoError('bad')),
+        ])
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.query(Title='song', Year=2001), [Path('ok.wma')])
+
+
 class TestASFObject(unittest.TestCase):
     """Test cases for ASFObject dataclass."""
 
@@ -7,6 +7,9 @@ Description:
     * Identifies all ASF objects and shows each object's size
     * Returns info such as bitrate, size, length, creation date, etc.
     * Returns meta-tags from ASF_Content_Description_Object
+    * Parses from local files or any random-access source (e.g. HTTP ranges)
+    * Batch scanning and an incremental on-disk library index
+    * Header packs for reprocessing large archives without reading media
 
 Note:
     Originally based on Dan Sully's Audio-WMA Perl module
@@ -16,13 +19,31 @@ Note:
 License: Artistic/Perl
 """
 
+import base64
+import dataclasses
+import json
+import os
 import re
+import socket
+import stat
+import sys
+import threading
 import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
 from dataclasses import dataclass
+from functools import lru_cache, partial
+from itertools import chain, repeat
+from operator import attrgetter, itemgetter
 from pathlib import Path
 import struct
 from struct import unpack
-from typing import Dict, Optional, Union, BinaryIO, Any
+from typing import (
+    Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple, Type, Union,
+    BinaryIO, Any
+)
 
 
 class WmaInfoError(Exception):
@@ -30,6 +51,39 @@ class WmaInfoError(Exception):
     pass
 
 
+class MalformedHeaderError(WmaInfoError):
+    """The header's structure is inconsistent: bad object sizes, overruns."""
+
+
+class TruncatedHeaderError(MalformedHeaderError):
+    """The data ends before the header does."""
+
+
+class ParseLimitError(WmaInfoError):
+    """The header exceeds one of the configured ParseLimits."""
+
+
+@dataclass(frozen=True)
+class ParseLimits:
+    """
+    Bounds on the work done for one header, for untrusted input.
+
+    Attributes:
+        max_header_size: Largest ASF_Header_Object accepted, in bytes
+        max_objects: Most child objects in the header or a header extension
+        max_entries: Most entries in any one table (attributes, codecs,
+            stream records, markers, script commands)
+        max_string_length: Longest single string or value, in bytes
+    """
+    max_header_size: int = 16 * 1024 * 1024
+    max_objects: int = 1024
+    max_entries: int = 65536
+    max_string_length: int = 1024 * 1024
+
+
+DEFAULT_LIMITS = ParseLimits()
+
+
 @dataclass
 class ASFObject:
     """Represents an ASF object with its properties."""
@@ -37,6 +91,10 @@ class ASFObject:
     size: int
     offset: int
     name: Optional[str] = None
+    # ASF_Header_Object only
+    num_objects: Optional[int] = None
+    reserved1: Optional[int] = None
+    reserved2: Optional[int] = None
 
     def __repr__(self) -> str:
         return f"ASFObject(name={self.name}, guid={self.guid}, size={self.size}, offset={self.offset})"
@@ -61,6 +119,1548 @@ class StreamInfo:
     audio_sample_rate: Optional[int] = None
     audio_bitrate: Optional[int] = None
     audio_bits_per_sample: Optional[int] = None
+    audio_format_tag: Optional[int] = None
+    audio_block_align: Optional[int] = None
+    audio_extra_data: Optional[bytes] = None
+    # Video specific
+    video_width: Optional[int] = None
+    video_height: Optional[int] = None
+    video_bits_per_pixel: Optional[int] = None
+    video_compression: Optional[str] = None
+    video_extra_data: Optional[bytes] = None
+    # From ASF_Stream_Bitrate_Properties_Object / ASF_Extended_Stream_Properties_Object
+    average_bitrate: Optional[int] = None
+    data_bitrate: Optional[int] = None
+    buffer_size: Optional[int] = None
+    average_time_per_frame: Optional[int] = None
+    frame_rate: Optional[float] = None
+
+
+@dataclass
+class CodecInfo:
+    """Entry from the ASF_Codec_List_Object."""
+    codec_type: int
+    name: str
+    description: str
+    information: bytes = b""
+
+    @property
+    def type_name(self) -> str:
+        return {1: 'video', 2: 'audio'}.get(self.codec_type, 'unknown')
+
+
+@dataclass
+class Picture:
+    """Attached picture decoded from a WM/Picture attribute."""
+    mime_type: str
+    picture_type: int
+    description: str
+    data: bytes
+
+
+@dataclass
+class Marker:
+    """One entry of the ASF_Marker_Object (e.g. a chapter)."""
+    time: float
+    name: str
+
+
+@dataclass
+class ScriptCommand:
+    """One entry of the ASF_Script_Command_Object."""
+    time: float
+    type: str
+    command: str
+
+
+class _TimedTable(ABC):
+    """
+    Time-sorted entries backed by the header buffer.
+
+    Presentation times (seconds) live in a typed array for binary search;
+    names stay as UTF-16 in the buffer and are only decoded on access.
+    """
+
+    def __init__(self, buf: bytes, times: array, name_offsets: array, name_lengths: array):
+        order = sorted(range(len(times)), key=times.__getitem__)
+        self._order: Optional[List[int]] = None  # None: already sorted, as ASF files normally are
+        if order != list(range(len(times))):
+            times = array(times.typecode, (times[i] for i in order))
+            name_offsets = array(name_offsets.typecode, (name_offsets[i] for i in order))
+            name_lengths = array(name_lengths.typecode, (name_lengths[i] for i in order))
+            self._order = order
+        self._buf = buf
+        self.times = times
+        self._name_offsets = name_offsets
+        self._name_lengths = name_lengths
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self.times)):
+            yield self._entry(i)
+
+    def __getitem__(self, i: int) -> Any:
+        if i < 0:
+            i += len(self.times)
+        if not 0 <= i < len(self.times):
+            raise IndexError("table index out of range")
+        return self._entry(i)
+
+    def index_at(self, t: float) -> int:
+        """Index of the last entry at or before `t` seconds (-1 if none)."""
+        return bisect_right(self.times, t) - 1
+
+    def at(self, t: float) -> Any:
+        """The last entry at or before `t` seconds, or None."""
+        i = self.index_at(t)
+        return self._entry(i) if i >= 0 else None
+
+    def between(self, start: float, end: float) -> List[Any]:
+        """Entries with start <= time < end."""
+        return [self._entry(i) for i in range(bisect_left(self.times, start),
+                                              bisect_left(self.times, end))]
+
+    def _name(self, i: int) -> str:
+        offset = self._name_offsets[i]
+        return _decode_utf16(self._buf[offset:offset + self._name_lengths[i]])
+
+    @abstractmethod
+    def _entry(self, i: int) -> Any:
+        """Build the public entry object for sorted position `i`."""
+
+
+class MarkerTable(_TimedTable):
+    """Decoded ASF_Marker_Object; `name` is the table's own name."""
+
+    def __init__(self, buf: bytes, times: array, name_offsets: array, name_lengths: array,
+                 name: str = ""):
+        super().__init__(buf, times, name_offsets, name_lengths)
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"MarkerTable(name={self.name!r}, markers={len(self)})"
+
+    def _entry(self, i: int) -> Marker:
+        return Marker(self.times[i], self._name(i))
+
+
+class ScriptCommandTable(_TimedTable):
+    """Decoded ASF_Script_Command_Object; `types` holds the command type names."""
+
+    def __init__(self, buf: bytes, times: array, name_offsets: array, name_lengths: array,
+                 types: List[str], type_indexes: array):
+        super().__init__(buf, times, name_offsets, name_lengths)
+        self.types = types
+        if self._order is not None:
+            type_indexes = array(type_indexes.typecode, (type_indexes[i] for i in self._order))
+        self._type_indexes = type_indexes
+
+    def __repr__(self) -> str:
+        return f"ScriptCommandTable(types={self.types}, commands={len(self)})"
+
+    def _entry(self, i: int) -> ScriptCommand:
+        index = self._type_indexes[i]
+        command_type = self.types[index] if index < len(self.types) else ""
+        return ScriptCommand(self.times[i], command_type, self._name(i))
+
+
+class RandomAccessSource(Protocol):
+    """
+    Anything the parser can read bytes from at absolute offsets.
+
+    read_at() may return fewer than `length` bytes only at end of file.
+    """
+    name: str
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+
+class FileSource:
+    """
+    Random-access source over a local file, opened on first read.
+
+    Uses os.pread where available, so one instance can serve several threads.
+    """
+
+    def __init__(self, file_path: Union[str, Path]) -> None:
+        self.file_path = Path(file_path)
+        self.name = str(file_path)
+        self._fh: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "FileSource":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def size(self) -> int:
+        if self._fh is not None:
+            return os.fstat(self._fh.fileno()).st_size
+        return self.file_path.stat().st_size
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        with self._lock:
+            if self._fh is None:
+                self._fh = open(self.file_path, 'rb')
+            if not hasattr(os, 'pread'):  # pragma: no cover - Windows
+                self._fh.seek(offset)
+                return self._fh.read(length)
+            fd = self._fh.fileno()
+        return os.pread(fd, length, offset)
+
+    def close(self) -> None:
+        """Close the underlying file handle; later reads reopen it."""
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+class BytesSource:
+    """Random-access source over an in-memory buffer."""
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview], name: str = "<bytes>") -> None:
+        self.name = name
+        self._data = data
+
+    @property
+    def size(self) -> int:
+        return len(self._data)
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        return bytes(self._data[offset:offset + length])
+
+
+class HTTPRangeSource:
+    """
+    Random-access source over HTTP(S) using Range requests.
+
+    Works against any server or object store that honours `Range: bytes=a-b`.
+    Servers that ignore the header are tolerated (the full body is sliced),
+    but every read then costs a full download; wrap in CoalescingSource.
+
+    Attributes:
+        requests: Number of HTTP requests issued so far
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 30.0) -> None:
+        self.name = url
+        self.requests = 0
+        self._headers = dict(headers or {})
+        self._timeout = timeout
+        self._size: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            self.read_at(0, 1)
+        if self._size is None:
+            raise WmaInfoError(f"{self.name}: server did not report a content length")
+        return self._size
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        import urllib.error
+        import urllib.request
+
+        if length <= 0 or (self._size is not None and offset >= self._size):
+            return b""
+
+        headers = dict(self._headers)
+        headers['Range'] = f"bytes={offset}-{offset + length - 1}"
+        request = urllib.request.Request(self.name, headers=headers)
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(request, timeout=self._timeout) as response:
+                status = response.status
+                content_range = response.headers.get('Content-Range')
+                body: bytes = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 416:  # Range Not Satisfiable: offset is past EOF
+                self._set_size_from_range(e.headers.get('Content-Range'))
+                return b""
+            raise
+
+        if status == 206:
+            self._set_size_from_range(content_range)
+            return body[:length]
+
+        # Server ignored the Range header and sent the whole entity
+        self._size = len(body)
+        return body[offset:offset + length]
+
+    def _set_size_from_range(self, content_range: Optional[str]) -> None:
+        """Record the total length from a `bytes a-b/total` header."""
+        if content_range and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1].strip()
+            if total.isdigit():
+                self._size = int(total)
+
+
+class CoalescingSource:
+    """
+    Block cache in front of a slow random-access source.
+
+    Reads are rounded out to `block_size` boundaries, runs of adjacent missing
+    blocks are fetched with a single underlying read, and blocks are kept in an
+    LRU cache. With the default 64 KiB blocks a typical header parse costs one
+    underlying read (two when the header is larger than a block).
+    """
+
+    def __init__(self, source: RandomAccessSource, block_size: int = 65536,
+                 max_blocks: int = 256) -> None:
+        if block_size <= 0 or max_blocks <= 0:
+            raise ValueError("block_size and max_blocks must be positive")
+        self.name = getattr(source, 'name', '')
+        self._source = source
+        self._block_size = block_size
+        self._max_blocks = max_blocks
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return self._source.size
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        # One lock per source: concurrent parses through a shared cache
+        # serialize here instead of corrupting the LRU order
+        with self._lock:
+            return self._read_at_locked(offset, length)
+
+    def _read_at_locked(self, offset: int, length: int) -> bytes:
+
+        bs = self._block_size
+        first = offset // bs
+        last = (offset + length - 1) // bs
+
+        blocks: Dict[int, bytes] = {}
+        missing: List[int] = []
+        for i in range(first, last + 1):
+            cached = self._blocks.get(i)
+            if cached is None:
+                missing.append(i)
+            else:
+                self._blocks.move_to_end(i)
+                blocks[i] = cached
+
+        # Group adjacent missing blocks so each run costs one underlying read
+        run_start = 0
+        for j in range(1, len(missing) + 1):
+            if j == len(missing) or missing[j] != missing[j - 1] + 1:
+                self._fetch_run(missing[run_start], missing[j - 1], blocks)
+                run_start = j
+
+        pieces = []
+        for i in range(first, last + 1):
+            block = blocks.get(i)
+            if block is None:
+                break
+            pieces.append(block)
+            if len(block) < bs:  # End of file
+                break
+
+        start = offset - first * bs
+        return b"".join(pieces)[start:start + length]
+
+    def _fetch_run(self, start: int, end: int, blocks: Dict[int, bytes]) -> None:
+        """Fetch blocks start..end (inclusive) with one underlying read."""
+        bs = self._block_size
+        data = self._source.read_at(start * bs, (end - start + 1) * bs)
+        for i in range(start, end + 1):
+            chunk = data[(i - start) * bs:(i - start + 1) * bs]
+            blocks[i] = chunk
+            self._blocks[i] = chunk
+            if len(self._blocks) > self._max_blocks:
+                self._blocks.popitem(last=False)
+            if len(chunk) < bs:
+                break
+
+    def close(self) -> None:
+        """Drop cached blocks and close the wrapped source if it can be closed."""
+        with self._lock:
+            self._blocks.clear()
+        close = getattr(self._source, 'close', None)
+        if close is not None:
+            close()
+
+
+# ---------------------------------------------------------------------------
+# Stateless parsing core
+#
+# Every decoder takes an immutable buffer holding the complete ASF_Header_Object
+# and an explicit position (absolute file offset, since the header starts the
+# file) and returns its results; nothing here keeps cursor state, so the same
+# buffer can be decoded from any number of threads at once.
+# ---------------------------------------------------------------------------
+
+_OBJECT_HEAD = struct.Struct("<16sQ")
+_HEADER_PREAMBLE = struct.Struct("<16sQIbb")
+_FILE_PROPERTIES = struct.Struct("<16sQQQQQQIIII")
+_STREAM_PROPERTIES = struct.Struct("<16s16sQIIHI")
+_WAVEFORMATEX = struct.Struct("<HHIIHH")
+_VIDEO_MEDIA = struct.Struct("<IIBH")
+_BITMAPINFOHEADER = struct.Struct("<IiiHH4sIiiII")
+_EXTENDED_STREAM_PROPERTIES = struct.Struct("<QQIIIIIIIIHHQHH")
+_MARKER_ENTRY = struct.Struct("<QQHIII")
+_SCRIPT_COMMAND = struct.Struct("<IHH")
+_STREAM_EXTRA_FIELDS = ('average_bitrate', 'data_bitrate', 'buffer_size',
+                        'average_time_per_frame', 'frame_rate')
+_U16_AT = struct.Struct("<H").unpack_from
+_U32_AT = struct.Struct("<I").unpack_from
+_U64_AT = struct.Struct("<Q").unpack_from
+
+# Header decoders read the immutable header or IncrementalParser's growing
+# buffer, and copy anything they keep into bytes
+_Buffer = Union[bytes, bytearray]
+
+_TAG_PATTERN = re.compile(
+    r"(TrackNumber|AlbumTitle|AlbumArtist|Genre|Year|Composer|"
+    r"Mood|Lyrics|BeatsPerMinute)"
+)
+
+
+def _guid_to_str(raw: bytes) -> str:
+    """Convert a 16-byte on-disk GUID to its string form."""
+    if len(raw) != 16:
+        raise ValueError(f"Invalid GUID byte string length: {len(raw)}")
+
+    raw = bytes(raw)
+    return (
+        f"{raw[3::-1].hex()}-{raw[5:3:-1].hex()}-{raw[7:5:-1].hex()}-"
+        f"{raw[8:10].hex()}-{raw[10:].hex()}"
+    ).upper()
+
+
+@lru_cache(maxsize=1024)
+def _guid_to_bytes(guid: str) -> bytes:
+    """Inverse of _guid_to_str(): the on-disk (little-endian) GUID layout."""
+    raw = bytes.fromhex(guid.replace('-', ''))
+    if len(raw) != 16:
+        raise ValueError(f"Invalid GUID string: {guid}")
+    return raw[3::-1] + raw[5:3:-1] + raw[7:5:-1] + raw[8:]
+
+
+def _decode_utf16(data: _Buffer) -> str:
+    """Decode a UTF-16LE binary string."""
+    try:
+        return data.decode('utf-16le', 'ignore').rstrip('\x00')
+    except UnicodeDecodeError:
+        return ""
+
+
+def _filetime_to_unix(file_time: int) -> int:
+    """Convert Windows FILETIME to Unix timestamp."""
+    # Windows FILETIME is 100-nanosecond intervals since January 1, 1601
+    return int((file_time - 116_444_736_000_000_000) / 10_000_000)
+
+
+_KNOWN_GUIDS: Dict[str, str] = {
+    'ASF_Extended_Stream_Properties_Object': '14E6A5CB-C672-4332-8399-A96952065B5A',
+    'ASF_Padding_Object': '1806D474-CADF-4509-A4BA-9AABCB96AAE8',
+    'ASF_Payload_Ext_Syst_Pixel_Aspect_Ratio': '1B1EE554-F9EA-4BC8-821A-376B74E4C4B8',
+    'ASF_Script_Command_Object': '1EFB1A30-0B62-11D0-A39B-00A0C90348F6',
+    'ASF_No_Error_Correction': '20FB5700-5B55-11CF-A8FD-00805F5C442B',
+    'ASF_Content_Branding_Object': '2211B3FA-BD23-11D2-B4B7-00A0C955FC6E',
+    'ASF_Content_Encryption_Object': '2211B3FB-BD23-11D2-B4B7-00A0C955FC6E',
+    'ASF_Digital_Signature_Object': '2211B3FC-BD23-11D2-B4B7-00A0C955FC6E',
+    'ASF_Extended_Content_Encryption_Object': '298AE614-2622-4C17-B935-DAE07EE9289C',
+    'ASF_Simple_Index_Object': '33000890-E5B1-11CF-89F4-00A0C90349CB',
+    'ASF_Degradable_JPEG_Media': '35907DE0-E415-11CF-A917-00805F5C442B',
+    'ASF_Payload_Extension_System_Timecode': '399595EC-8667-4E2D-8FDB-98814CE76C1E',
+    'ASF_Binary_Media': '3AFB65E2-47EF-40F2-AC2C-70A90D71D343',
+    'ASF_Timecode_Index_Object': '3CB73FD0-0C4A-4803-953D-EDF7B6228F0C',
+    'ASF_Metadata_Library_Object': '44231C94-9498-49D1-A141-1D134E457054',
+    'ASF_Reserved_3': '4B1ACBE3-100B-11D0-A39B-00A0C90348F6',
+    'ASF_Reserved_4': '4CFEDB20-75F6-11CF-9C0F-00A0C90349CB',
+    'ASF_Command_Media': '59DACFC0-59E6-11D0-A3AC-00A0C90348F6',
+    'ASF_Header_Extension_Object': '5FBF03B5-A92E-11CF-8EE3-00C00C205365',
+    'ASF_Media_Object_Index_Parameters_Obj': '6B203BAD-3F11-4E84-ACA8-D7613DE2CFA7',
+    'ASF_Header_Object': '75B22630-668E-11CF-A6D9-00AA0062CE6C',
+    'ASF_Content_Description_Object': '75B22633-668E-11CF-A6D9-00AA0062CE6C',
+    'ASF_Error_Correction_Object': '75B22635-668E-11CF-A6D9-00AA0062CE6C',
+    'ASF_Data_Object': '75B22636-668E-11CF-A6D9-00AA0062CE6C',
+    'ASF_Web_Stream_Media_Subtype': '776257D4-C627-41CB-8F81-7AC7FF1C40CC',
+    'ASF_Stream_Bitrate_Properties_Object': '7BF875CE-468D-11D1-8D82-006097C9A2B2',
+    'ASF_Language_List_Object': '7C4346A9-EFE0-4BFC-B229-393EDE415C85',
+    'ASF_Codec_List_Object': '86D15240-311D-11D0-A3A4-00A0C90348F6',
+    'ASF_Reserved_2': '86D15241-311D-11D0-A3A4-00A0C90348F6',
+    'ASF_File_Properties_Object': '8CABDCA1-A947-11CF-8EE4-00C00C205365',
+    'ASF_File_Transfer_Media': '91BD222C-F21C-497A-8B6D-5AA86BFC0185',
+    'ASF_Advanced_Mutual_Exclusion_Object': 'A08649CF-4775-4670-8A16-6E35357566CD',
+    'ASF_Bandwidth_Sharing_Object': 'A69609E6-517B-11D2-B6AF-00C04FD908E9',
+    'ASF_Reserved_1': 'ABD3D211-A9BA-11CF-8EE6-00C00C205365',
+    'ASF_Bandwidth_Sharing_Exclusive': 'AF6060AA-5197-11D2-B6AF-00C04FD908E9',
+    'ASF_Bandwidth_Sharing_Partial': 'AF6060AB-5197-11D2-B6AF-00C04FD908E9',
+    'ASF_JFIF_Media': 'B61BE100-5B4E-11CF-A8FD-00805F5C442B',
+    'ASF_Stream_Properties_Object': 'B7DC0791-A9B7-11CF-8EE6-00C00C205365',
+    'ASF_Video_Media': 'BC19EFC0-5B4D-11CF-A8FD-00805F5C442B',
+    'ASF_Audio_Spread': 'BFC3CD50-618F-11CF-8BB2-00AA00B4E220',
+    'ASF_Metadata_Object': 'C5F8CBEA-5BAF-4877-8467-AA8C44FA4CCA',
+    'ASF_Payload_Ext_Syst_Sample_Duration': 'C6BD9450-867F-4907-83A3-C77921B733AD',
+    'ASF_Group_Mutual_Exclusion_Object': 'D1465A40-5A79-4338-B71B-E36B8FD6C249',
+    'ASF_Extended_Content_Description_Object': 'D2D0A440-E307-11D2-97F0-00A0C95EA850',
+    'ASF_Stream_Prioritization_Object': 'D4FED15B-88D3-454F-81F0-ED5C45999E24',
+    'ASF_Payload_Ext_System_Content_Type': 'D590DC20-07BC-436C-9CF7-F3BBFBF1A4DC',
+    'ASF_Index_Object': 'D6E229D3-35DA-11D1-9034-00A0C90349BE',
+    'ASF_Bitrate_Mutual_Exclusion_Object': 'D6E229DC-35DA-11D1-9034-00A0C90349BE',
+    'ASF_Index_Parameters_Object': 'D6E229DF-35DA-11D1-9034-00A0C90349BE',
+    'ASF_Mutex_Language': 'D6E22A00-35DA-11D1-9034-00A0C90349BE',
+    'ASF_Mutex_Bitrate': 'D6E22A01-35DA-11D1-9034-00A0C90349BE',
+    'ASF_Mutex_Unknown': 'D6E22A02-35DA-11D1-9034-00A0C90349BE',
+    'ASF_Web_Stream_Format': 'DA1E6B13-8359-4050-B398-388E965BF00C',
+    'ASF_Payload_Ext_System_File_Name': 'E165EC0E-19ED-45D7-B4A7-25CBD1E28E9B',
+    'ASF_Marker_Object': 'F487CD01-A951-11CF-8EE6-00C00C205365',
+    'ASF_Timecode_Index_Parameters_Object': 'F55E496D-9797-4B5D-8C8B-604DFE9BFB24',
+    'ASF_Audio_Media': 'F8699E40-5B4D-11CF-A8FD-00805F5C442B',
+    'ASF_Media_Object_Index_Object': 'FEB103F8-12AD-4C64-840F-2A1D2F7AD48C',
+    'ASF_Alt_Extended_Content_Encryption_Obj': 'FF889EF1-ADEE-40DA-9E71-98704BB928CE',
+}
+
+_REVERSE_GUID_MAPPING: Dict[str, str] = {v: k for k, v in _KNOWN_GUIDS.items()}
+# On-disk GUID bytes -> string, so known objects skip the formatting step
+_DISK_GUIDS: Dict[bytes, str] = {
+    _guid_to_bytes(guid): guid for guid in _KNOWN_GUIDS.values()
+}
+
+
+def _guid_at(buf: _Buffer, pos: int) -> str:
+    raw = bytes(buf[pos:pos + 16])
+    return _DISK_GUIDS.get(raw) or _guid_to_str(raw)
+
+
+@dataclass
+class ParsedHeader:
+    """
+    Results of decoding a complete ASF_Header_Object.
+
+    Attributes:
+        header: The raw header object bytes (including its 30-byte preamble)
+        header_objects: ASF objects keyed by name, offsets absolute
+        tags: ID3-like metadata tags
+        info: Non-ID3 file information
+        drm: Whether a content encryption object is present
+        value_locations: Byte-array attribute name -> (offset, length)
+        streams: Every ASF_Stream_Properties_Object, in header order
+        codecs: Entries of the ASF_Codec_List_Object
+        stream_extras: Stream number -> StreamInfo fields decoded from the
+            bitrate and extended stream properties objects
+    """
+    header: bytes
+    header_objects: Dict[str, ASFObject]
+    tags: Dict[str, Any]
+    info: Dict[str, Any]
+    drm: bool = False
+    value_locations: Dict[str, Tuple[int, int]] = dataclasses.field(default_factory=dict)
+    streams: List[StreamInfo] = dataclasses.field(default_factory=list)
+    codecs: List[CodecInfo] = dataclasses.field(default_factory=list)
+    stream_extras: Dict[int, Dict[str, Any]] = dataclasses.field(default_factory=dict)
+
+
+def parse_header_object(data: _Buffer, name: str = "<header>", debug: bool = False,
+                        limits: ParseLimits = DEFAULT_LIMITS) -> ASFObject:
+    """
+    Decode the 30-byte preamble of the ASF_Header_Object.
+
+    Returns:
+        The header object, with `num_objects`, `reserved1` and `reserved2` set
+
+    Raises:
+        WmaInfoError: If `data` does not start with an ASF header
+        MalformedHeaderError: If the header size is smaller than its preamble
+        ParseLimitError: If the size or object count exceeds `limits`
+    """
+    try:
+        raw_guid, object_size, num_objects, reserved1, reserved2 = \
+            _HEADER_PREAMBLE.unpack_from(data, 0)
+        object_id = _guid_to_str(raw_guid)
+        object_id_name = _REVERSE_GUID_MAPPING.get(object_id)
+
+        if not object_id_name:
+            raise WmaInfoError(f"Unknown GUID: {object_id}")
+
+    except (struct.error, ValueError) as e:
+        raise WmaInfoError(f"{name} doesn't appear to have a valid ASF header: {e}")
+
+    if object_size < 30:
+        raise MalformedHeaderError(f"{name}: invalid ASF header size {object_size}")
+    if object_size > limits.max_header_size:
+        raise ParseLimitError(
+            f"{name}: ASF header of {object_size} bytes exceeds the limit of "
+            f"{limits.max_header_size}")
+    if num_objects > limits.max_objects:
+        raise ParseLimitError(
+            f"{name}: ASF header declares {num_objects} objects, over the limit of "
+            f"{limits.max_objects}")
+
+    header_obj = ASFObject(guid=object_id, size=object_size, offset=0, name=object_id_name,
+                           num_objects=num_objects, reserved1=reserved1, reserved2=reserved2)
+
+    if debug:
+        print(f"objectId:      {object_id}")
+        print(f"objectIdName:  {object_id_name}")
+        print(f"objectSize:    {object_size}")
+        print(f"headerObjects: {num_objects}")
+        print(f"reserved1:     {reserved1}")
+        print(f"reserved2:     {reserved2}")
+
+    return header_obj
+
+
+def parse_header(data: bytes, name: str = "<header>", debug: bool = False,
+                 limits: ParseLimits = DEFAULT_LIMITS) -> ParsedHeader:
+    """
+    Decode a complete ASF_Header_Object.
+
+    Every length and count read from the header is checked against the
+    enclosing object and `limits` before it is used, so the work done is
+    bounded by the header size whatever the input.
+
+    Args:
+        data: Bytes from the start of the file through at least the end of
+            the header object (anything after it is ignored)
+        name: File name used in error messages
+        debug: Print each object as it is decoded
+        limits: Bounds for untrusted input
+
+    Raises:
+        TruncatedHeaderError: If `data` ends inside the header
+        MalformedHeaderError: If an object's size or contents are inconsistent
+        ParseLimitError: If the header exceeds `limits`
+        WmaInfoError: If `data` is not an ASF header
+    """
+    header_obj = parse_header_object(data, name, debug, limits)
+    header = bytes(data[:header_obj.size])
+    if len(header) < header_obj.size:
+        raise TruncatedHeaderError(
+            f"{name}: ASF header truncated: {len(header)} of {header_obj.size} bytes")
+    result = ParsedHeader(
+        header=header,
+        header_objects={'ASF_Header_Object': header_obj},
+        tags={},
+        info={},
+    )
+
+    num_objects = header_obj.num_objects or 0
+    pos, decoded = _walk_header_children(header, 30, num_objects, len(header),
+                                         result, name, debug, limits)
+    if decoded < num_objects:
+        raise MalformedHeaderError(
+            f"{name}: ASF header declares {num_objects} objects but only "
+            f"{decoded} fit before offset {pos}")
+
+    return result
+
+
+def _walk_header_children(buf: _Buffer, pos: int, count: int, end: int, result: ParsedHeader,
+                          name: str, debug: bool, limits: ParseLimits) -> Tuple[int, int]:
+    """
+    _decode_header_children() with errors converted to WmaInfoError subclasses
+    naming the file.
+    """
+    try:
+        return _decode_header_children(buf, pos, count, end, result, debug, limits)
+    except (MalformedHeaderError, ParseLimitError) as e:
+        raise type(e)(f"{name}: {e}") from None
+    except (struct.error, ValueError, IndexError) as e:
+        raise MalformedHeaderError(f"{name}: malformed ASF header object: {e}") from None
+
+
+def _decode_header_children(buf: _Buffer, pos: int, count: int, end: int, result: ParsedHeader,
+                            debug: bool = False,
+                            limits: ParseLimits = DEFAULT_LIMITS) -> Tuple[int, int]:
+    """
+    Decode up to `count` consecutive header children lying wholly within `buf`.
+
+    Stops early at the first object that is not complete in `buf` yet; an
+    object reaching past `end` (the end of the header) is an error.
+
+    Returns:
+        (position after the last decoded object, number of objects decoded)
+    """
+    decoded = 0
+    while decoded < count and pos + 24 <= len(buf):
+        raw_guid, object_size = _OBJECT_HEAD.unpack_from(buf, pos)
+        if object_size < 24 or pos + object_size > end:
+            raise MalformedHeaderError(f"invalid object size {object_size} at offset {pos}")
+        if pos + object_size > len(buf):
+            break
+        object_guid = _DISK_GUIDS.get(bytes(raw_guid)) or _guid_to_str(raw_guid)
+        object_name = _REVERSE_GUID_MAPPING.get(object_guid, "Unknown")
+
+        result.header_objects[object_name] = ASFObject(
+            guid=object_guid,
+            size=object_size,
+            offset=pos,
+            name=object_name
+        )
+
+        if debug:
+            print(f"nextObjectGUID: {object_guid}")
+            print(f"nextObjectName: {object_name}")
+            print(f"nextObjectSize: {object_size}")
+
+        _decode_header_child(buf, object_name, pos + 24, pos + object_size, result, debug, limits)
+        pos += object_size
+        decoded += 1
+    return pos, decoded
+
+
+# Smallest valid payload of each object the header walk decodes
+_MIN_PAYLOAD = {
+    'ASF_File_Properties_Object': _FILE_PROPERTIES.size,
+    'ASF_Content_Description_Object': 10,
+    'ASF_Extended_Content_Description_Object': 2,
+    'ASF_Stream_Properties_Object': _STREAM_PROPERTIES.size,
+    'ASF_Stream_Bitrate_Properties_Object': 2,
+    'ASF_Header_Extension_Object': 22,
+    'ASF_Codec_List_Object': 20,
+    'ASF_Marker_Object': 24,
+    'ASF_Script_Command_Object': 20,
+}
+
+
+def _checked(pos: int, length: int, end: int, limits: ParseLimits, what: str) -> int:
+    """Return pos + length once the field is known to fit before `end` and the limits."""
+    if length > limits.max_string_length:
+        raise ParseLimitError(
+            f"{what} of {length} bytes exceeds the limit of {limits.max_string_length}")
+    if pos + length > end:
+        raise MalformedHeaderError(f"{what} at offset {pos} runs past the end of its object")
+    return pos + length
+
+
+def _checked_count(count: int, limits: ParseLimits, what: str) -> int:
+    if count > limits.max_entries:
+        raise ParseLimitError(f"{count} {what} exceed the limit of {limits.max_entries}")
+    return count
+
+
+def _decode_header_child(buf: _Buffer, object_name: str, pos: int, end: int,
+                         result: ParsedHeader, debug: bool = False,
+                         limits: ParseLimits = DEFAULT_LIMITS) -> None:
+    """Decode the payload of one top-level header child, spanning `pos` to `end`."""
+    if end - pos < _MIN_PAYLOAD.get(object_name, 0):
+        raise MalformedHeaderError(f"{object_name} at offset {pos - 24} is too small")
+
+    if object_name == 'ASF_File_Properties_Object':
+        result.info.update(_decode_file_properties(buf, pos, debug))
+    elif object_name == 'ASF_Content_Description_Object':
+        result.tags.update(_decode_content_description(buf, pos, end, limits))
+    elif object_name == 'ASF_Extended_Content_Description_Object':
+        ext_info, locations = _decode_extended_content_description(buf, pos, debug, end, limits)
+        result.value_locations.update(locations)
+
+        # Sort and dispatch info
+        for key, value in ext_info.items():
+            clean_key = key.replace("WM/", "")
+            if _TAG_PATTERN.search(key):
+                result.tags[clean_key] = value
+            else:
+                result.info[clean_key] = value
+    elif object_name == 'ASF_Stream_Properties_Object':
+        _checked_count(len(result.streams) + 1, limits, "streams")
+        result.streams.append(_decode_stream_properties(buf, pos, end, limits))
+        _apply_stream_extras(result)
+    elif object_name == 'ASF_Stream_Bitrate_Properties_Object':
+        for number, bitrate in _decode_stream_bitrates(buf, pos, end, limits):
+            result.stream_extras.setdefault(number, {})['average_bitrate'] = bitrate
+        _apply_stream_extras(result)
+    elif object_name == 'ASF_Header_Extension_Object':
+        _decode_header_extension(buf, pos, end, result, limits)
+        _apply_stream_extras(result)
+    elif object_name == 'ASF_Codec_List_Object':
+        _checked_count(len(result.codecs), limits, "codec entries")
+        result.codecs.extend(_decode_codec_list(buf, pos, end, limits))
+    elif object_name in ('ASF_Content_Encryption_Object',
+                         'ASF_Extended_Content_Encryption_Object'):
+        result.drm = True
+
+
+def _decode_file_properties(buf: _Buffer, pos: int, debug: bool = False) -> Dict[str, Any]:
+    """Decode the ASF_File_Properties_Object payload at `pos`."""
+    (file_id, filesize, creation_date, data_packets, play_duration, send_duration,
+     preroll, flags_raw, min_packet_size, max_packet_size, max_bitrate) = \
+        _FILE_PROPERTIES.unpack_from(buf, pos)
+
+    info: Dict[str, Any] = {}
+    info['fileid_guid'] = _DISK_GUIDS.get(file_id) or _guid_to_str(file_id)
+    info['filesize'] = filesize
+    info['creation_date'] = creation_date
+    info['creation_date_unix'] = _filetime_to_unix(creation_date)
+    info['creation_string'] = time.strftime("%c", time.gmtime(info['creation_date_unix']))
+    info['data_packets'] = data_packets
+    info['play_duration'] = play_duration
+    info['send_duration'] = send_duration
+    info['preroll'] = preroll
+    info['playtime_seconds'] = int(play_duration / 10_000_000 - preroll / 1000)
+    info['broadcast'] = bool(flags_raw & 0x0001)
+    info['seekable'] = bool(flags_raw & 0x0002)
+    info['min_packet_size'] = min_packet_size
+    info['max_packet_size'] = max_packet_size
+    info['max_bitrate'] = max_bitrate
+    info['bitrate'] = max_bitrate / 1000
+
+    if debug:
+        for key, val in info.items():
+            print(f"{key}: {val}")
+
+    return info
+
+
+def _decode_content_description(buf: _Buffer, pos: int, end: Optional[int] = None,
+                                limits: ParseLimits = DEFAULT_LIMITS) -> Dict[str, str]:
+    """Decode the ASF_Content_Description_Object payload at `pos`."""
+    end = len(buf) if end is None else end
+    keys = ["Title", "Author", "Copyright", "Description", "Rating"]
+    lengths = unpack("<5H", buf[pos:pos + 10])
+    pos += 10
+
+    tags = {}
+    for key, length in zip(keys, lengths):
+        if length > 0:
+            next_pos = _checked(pos, length, end, limits, key)
+            tags[key] = _decode_utf16(buf[pos:next_pos])
+            pos = next_pos
+    return tags
+
+
+def _decode_extended_content_description(
+        buf: _Buffer, pos: int, debug: bool = False, end: Optional[int] = None,
+        limits: ParseLimits = DEFAULT_LIMITS
+) -> Tuple[Dict[str, Any], Dict[str, Tuple[int, int]]]:
+    """
+    Decode the ASF_Extended_Content_Description_Object payload at `pos`.
+
+    Returns:
+        (attribute name -> value, byte-array name -> (offset, length))
+    """
+    end = len(buf) if end is None else end
+    ext_info: Dict[str, Any] = {}
+    locations: Dict[str, Tuple[int, int]] = {}
+    content_count = _checked_count(_U16_AT(buf, pos)[0], limits, "attributes")
+    pos += 2
+
+    for _ in range(content_count):
+        base_offset = pos
+        _checked(pos, 2, end, limits, "attribute")
+        name_length = _U16_AT(buf, pos)[0]
+        _checked(pos + 2, name_length + 4, end, limits, "attribute name")
+        name = _decode_utf16(buf[pos + 2:pos + 2 + name_length])
+        pos += 2 + name_length
+        value_type, value_length = unpack("<HH", buf[pos:pos + 4])
+        pos += 4
+        _checked(pos, value_length, end, limits, f"attribute {name!r}")
+        value = buf[pos:pos + value_length]
+
+        # Parse value based on type
+        if value_type <= 1:  # Unicode string
+            if value_type == 1:  # Byte array: remember where it lives
+                locations[name.replace("WM/", "")] = (pos, value_length)
+            decoded: Any = _decode_utf16(value)
+        elif value_type == 2:  # Boolean
+            decoded = unpack("<I", value)[0] != 0
+        elif value_type == 3:  # DWORD
+            decoded = unpack("<I", value)[0]
+        elif value_type == 4:  # QWORD
+            decoded = unpack("<Q", value)[0]
+        elif value_type == 5:  # WORD
+            decoded = unpack("<H", value)[0]
+        else:
+            decoded = bytes(value)  # Raw bytes for unknown types
+        pos += value_length
+
+        if debug:
+            print(f"base_offset:  {base_offset}")
+            print(f"name length:  {name_length}")
+            print(f"name:         {name}")
+            print(f"value type:   {value_type}")
+            print(f"value length: {value_length}")
+            print(f"value:        {decoded}")
+
+        ext_info[name] = decoded
+
+    return ext_info, locations
+
+
+def _decode_stream_properties(buf: _Buffer, pos: int, end: Optional[int] = None,
+                              limits: ParseLimits = DEFAULT_LIMITS) -> StreamInfo:
+    """Decode the ASF_Stream_Properties_Object payload at `pos`."""
+    end = len(buf) if end is None else end
+    (stream_type, error_type, time_offset, type_data_length, error_data_length,
+     flags_raw, _reserved) = _STREAM_PROPERTIES.unpack_from(buf, pos)
+    pos += _STREAM_PROPERTIES.size
+    _checked(pos, type_data_length, end, limits, "type-specific data")
+    _checked(pos + type_data_length, error_data_length, end, limits, "error correction data")
+
+    stream = StreamInfo()
+    stream.stream_type_guid = _DISK_GUIDS.get(stream_type) or _guid_to_str(stream_type)
+    stream.stream_type_name = _REVERSE_GUID_MAPPING.get(stream.stream_type_guid, "Unknown")
+    stream.error_correct_guid = _DISK_GUIDS.get(error_type) or _guid_to_str(error_type)
+    stream.error_correct_name = _REVERSE_GUID_MAPPING.get(stream.error_correct_guid, "Unknown")
+    stream.time_offset = time_offset
+    stream.type_data_length = type_data_length
+    stream.error_data_length = error_data_length
+    stream.stream_number = flags_raw & 0x007F
+    stream.encrypted = bool(flags_raw & 0x8000)
+    stream.type_specific_data = bytes(buf[pos:pos + type_data_length])
+    pos += type_data_length
+    stream.error_correct_data = bytes(buf[pos:pos + error_data_length])
+
+    if stream.stream_type_name == 'ASF_Audio_Media':
+        _decode_audio_media(stream)
+    elif stream.stream_type_name == 'ASF_Video_Media':
+        _decode_video_media(stream)
+    return stream
+
+
+def _decode_audio_media(stream: StreamInfo) -> None:
+    """Fill audio fields from the stream's WAVEFORMATEX type-specific data."""
+    data = stream.type_specific_data
+    if len(data) < 16:
+        return
+
+    (stream.audio_format_tag, stream.audio_channels, stream.audio_sample_rate,
+     avg_bytes_per_sec, stream.audio_block_align, stream.audio_bits_per_sample) = \
+        _WAVEFORMATEX.unpack_from(data, 0)
+    stream.audio_bitrate = avg_bytes_per_sec * 8
+
+    # cbSize counts the codec-specific bytes after the 18-byte structure
+    if len(data) >= 18:
+        extra_size = _U16_AT(data, 16)[0]
+        stream.audio_extra_data = data[18:18 + extra_size]
+
+
+def _decode_video_media(stream: StreamInfo) -> None:
+    """Fill video fields from the stream's BITMAPINFOHEADER type-specific data."""
+    data = stream.type_specific_data
+    if len(data) < _VIDEO_MEDIA.size + _BITMAPINFOHEADER.size:
+        return
+
+    width, height, _flags, format_size = _VIDEO_MEDIA.unpack_from(data, 0)
+    (_bi_size, _bi_width, _bi_height, _planes, bit_count, compression,
+     _image_size, _x_ppm, _y_ppm, _clr_used, _clr_important) = \
+        _BITMAPINFOHEADER.unpack_from(data, _VIDEO_MEDIA.size)
+
+    stream.video_width = width
+    stream.video_height = height
+    stream.video_bits_per_pixel = bit_count
+    stream.video_compression = compression.decode('ascii', 'replace').rstrip('\x00')
+    start = _VIDEO_MEDIA.size + _BITMAPINFOHEADER.size
+    stream.video_extra_data = data[start:_VIDEO_MEDIA.size + format_size]
+
+
+def _apply_stream_extras(result: ParsedHeader) -> None:
+    """Copy decoded bitrate and frame figures onto the matching streams."""
+    for stream in result.streams:
+        for field, value in result.stream_extras.get(stream.stream_number, {}).items():
+            setattr(stream, field, value)
+
+
+def _decode_stream_bitrates(buf: _Buffer, pos: int, end: Optional[int] = None,
+                            limits: ParseLimits = DEFAULT_LIMITS) -> List[Tuple[int, int]]:
+    """Decode the ASF_Stream_Bitrate_Properties_Object payload into (stream, bits/s)."""
+    end = len(buf) if end is None else end
+    count = _checked_count(_U16_AT(buf, pos)[0], limits, "bitrate records")
+    records_end = _checked(pos + 2, count * 6, end, limits, "bitrate records")
+    return [(flags & 0x007F, bitrate)
+            for flags, bitrate in struct.iter_unpack("<HI", buf[pos + 2:records_end])]
+
+
+def _decode_header_extension(buf: _Buffer, pos: int, end: int, result: ParsedHeader,
+                             limits: ParseLimits = DEFAULT_LIMITS) -> None:
+    """Decode the objects nested in the ASF_Header_Extension_Object payload at `pos`."""
+    data_size = _U32_AT(buf, pos + 18)[0]  # After the reserved GUID and WORD
+    pos += 22
+    if pos + data_size > end:
+        raise MalformedHeaderError(f"header extension data at offset {pos} overruns its object")
+    end = pos + data_size
+    for _ in range(limits.max_objects):
+        if pos + 24 > end:
+            return
+        object_size = _U64_AT(buf, pos + 16)[0]
+        if object_size < 24 or pos + object_size > end:
+            raise MalformedHeaderError(
+                f"invalid nested object size {object_size} at offset {pos}")
+        if _guid_at(buf, pos) == _KNOWN_GUIDS['ASF_Extended_Stream_Properties_Object']:
+            _decode_extended_stream_properties(buf, pos + 24, pos + object_size, result, limits)
+        pos += object_size
+    if pos + 24 <= end:
+        raise ParseLimitError(f"header extension holds more than {limits.max_objects} objects")
+
+
+def _decode_extended_stream_properties(buf: _Buffer, pos: int, end: int, result: ParsedHeader,
+                                       limits: ParseLimits = DEFAULT_LIMITS) -> None:
+    """Decode an ASF_Extended_Stream_Properties_Object payload spanning `pos` to `end`."""
+    _checked(pos, _EXTENDED_STREAM_PROPERTIES.size, end, limits, "extended stream properties")
+    (_start_time, _end_time, data_bitrate, buffer_size, _initial_fullness,
+     _alt_bitrate, _alt_buffer_size, _alt_initial_fullness, _max_object_size, _flags,
+     stream_number, _language_index, time_per_frame, name_count, extension_count) = \
+        _EXTENDED_STREAM_PROPERTIES.unpack_from(buf, pos)
+    pos += _EXTENDED_STREAM_PROPERTIES.size
+
+    extras = result.stream_extras.setdefault(stream_number, {})
+    extras['data_bitrate'] = data_bitrate
+    extras['buffer_size'] = buffer_size
+    if time_per_frame:
+        extras['average_time_per_frame'] = time_per_frame
+        extras['frame_rate'] = 10_000_000 / time_per_frame  # 100-ns units
+
+    for _ in range(name_count):  # Language index, length, name
+        _checked(pos, 4, end, limits, "stream name")
+        pos = _checked(pos + 4, _U16_AT(buf, pos + 2)[0], end, limits, "stream name")
+    for _ in range(extension_count):  # GUID, data size, info length, info
+        _checked(pos, 22, end, limits, "payload extension system")
+        pos = _checked(pos + 22, _U32_AT(buf, pos + 18)[0], end, limits,
+                       "payload extension system")
+
+    # Streams absent from the top level carry their properties object here
+    if pos + 24 <= end and \
+            _guid_at(buf, pos) == _KNOWN_GUIDS['ASF_Stream_Properties_Object']:
+        object_end = pos + _U64_AT(buf, pos + 16)[0]
+        if object_end > end or object_end - pos < 24 + _STREAM_PROPERTIES.size:
+            raise MalformedHeaderError(f"invalid embedded stream properties at offset {pos}")
+        _checked_count(len(result.streams) + 1, limits, "streams")
+        result.streams.append(_decode_stream_properties(buf, pos + 24, object_end, limits))
+
+
+def _decode_codec_list(buf: _Buffer, pos: int, end: Optional[int] = None,
+                       limits: ParseLimits = DEFAULT_LIMITS) -> List[CodecInfo]:
+    """Decode the ASF_Codec_List_Object payload at `pos`."""
+    end = len(buf) if end is None else end
+    count = _checked_count(_U32_AT(buf, pos + 16)[0], limits, "codec entries")  # After the GUID
+    pos += 20
+
+    codecs = []
+    for _ in range(count):
+        _checked(pos, 4, end, limits, "codec entry")
+        codec_type, name_length = unpack("<HH", buf[pos:pos + 4])
+        pos += 4
+        next_pos = _checked(pos, name_length * 2 + 2, end, limits, "codec name")
+        name = _decode_utf16(buf[pos:next_pos - 2])  # Lengths are in WCHARs
+        pos = next_pos - 2
+        description_length = _U16_AT(buf, pos)[0]
+        pos += 2
+        next_pos = _checked(pos, description_length * 2 + 2, end, limits, "codec description")
+        description = _decode_utf16(buf[pos:next_pos - 2])
+        pos = next_pos - 2
+        info_length = _U16_AT(buf, pos)[0]
+        pos += 2
+        next_pos = _checked(pos, info_length, end, limits, "codec information")
+        information = bytes(buf[pos:next_pos])
+        pos = next_pos
+        codecs.append(CodecInfo(codec_type, name, description, information))
+    return codecs
+
+
+def _decode_marker_object(buf: bytes, pos: int, end: Optional[int] = None,
+                          limits: ParseLimits = DEFAULT_LIMITS) -> MarkerTable:
+    """Index the ASF_Marker_Object payload at `pos`; descriptions are left undecoded."""
+    end = len(buf) if end is None else end
+    count = _checked_count(_U32_AT(buf, pos + 16)[0], limits, "markers")  # After the GUID
+    name_length = _U16_AT(buf, pos + 22)[0]
+    next_pos = _checked(pos + 24, name_length, end, limits, "marker table name")
+    name = _decode_utf16(buf[pos + 24:next_pos])
+    pos = next_pos
+
+    times, offsets, lengths = array('d'), array('L'), array('L')
+    for _ in range(count):
+        _checked(pos, _MARKER_ENTRY.size, end, limits, "marker")
+        (_offset, presentation_time, _entry_length, _send_time, _flags,
+         description_length) = _MARKER_ENTRY.unpack_from(buf, pos)
+        pos += _MARKER_ENTRY.size
+        times.append(presentation_time / 10_000_000)  # 100-ns units
+        offsets.append(pos)
+        lengths.append(description_length * 2)  # Lengths are in WCHARs
+        pos = _checked(pos, description_length * 2, end, limits, "marker description")
+    return MarkerTable(buf, times, offsets, lengths, name)
+
+
+def _decode_script_commands(buf: bytes, pos: int, end: Optional[int] = None,
+                            limits: ParseLimits = DEFAULT_LIMITS) -> ScriptCommandTable:
+    """Index the ASF_Script_Command_Object payload at `pos`; names are left undecoded."""
+    end = len(buf) if end is None else end
+    command_count, type_count = unpack("<HH", buf[pos + 16:pos + 20])  # After the reserved GUID
+    _checked_count(command_count, limits, "script commands")
+    _checked_count(type_count, limits, "script command types")
+    pos += 20
+
+    types = []
+    for _ in range(type_count):
+        _checked(pos, 2, end, limits, "command type")
+        next_pos = _checked(pos + 2, _U16_AT(buf, pos)[0] * 2, end, limits, "command type")
+        types.append(_decode_utf16(buf[pos + 2:next_pos]))
+        pos = next_pos
+
+    times, offsets, lengths, type_indexes = array('d'), array('L'), array('L'), array('H')
+    for _ in range(command_count):
+        _checked(pos, _SCRIPT_COMMAND.size, end, limits, "script command")
+        presentation_time, type_index, name_length = _SCRIPT_COMMAND.unpack_from(buf, pos)
+        pos += _SCRIPT_COMMAND.size
+        times.append(presentation_time / 1000)  # Milliseconds
+        type_indexes.append(type_index)
+        offsets.append(pos)
+        lengths.append(name_length * 2)
+        pos = _checked(pos, name_length * 2, end, limits, "script command name")
+    return ScriptCommandTable(buf, times, offsets, lengths, types, type_indexes)
+
+
+def _decode_picture(data: bytes) -> Picture:
+    """Decode a WM/Picture attribute value."""
+    try:
+        picture_type = data[0]
+        data_length = _U32_AT(data, 1)[0]
+        pos = 5
+        strings = []
+        for _ in range(2):
+            end = pos
+            while data[end:end + 2] not in (b"\x00\x00", b""):
+                end += 2
+            strings.append(_decode_utf16(data[pos:end]))
+            pos = end + 2
+    except (IndexError, struct.error) as e:
+        raise WmaInfoError(f"Cannot parse WM/Picture: {e}")
+
+    return Picture(
+        mime_type=strings[0],
+        picture_type=picture_type,
+        description=strings[1],
+        data=bytes(data[pos:pos + data_length]),
+    )
+
+
+_HEADER_GUID_BYTES = _guid_to_bytes(_KNOWN_GUIDS['ASF_Header_Object'])
+
+
+class IncrementalParser:
+    """
+    Push-based ASF header decoder for data that arrives in chunks.
+
+    Each top-level header child is decoded as soon as its last byte is fed,
+    using the same decoders as WmaInfo, so the DRM flag and file properties
+    are usually known long before the upload finishes. Nothing past the end
+    of the ASF_Header_Object is buffered.
+
+    Example:
+        parser = IncrementalParser('upload.wma')
+        for chunk in body:
+            if parser.feed(chunk) == 0 or parser.drm:
+                break
+    """
+
+    def __init__(self, name: str = "<stream>", debug: bool = False,
+                 limits: ParseLimits = DEFAULT_LIMITS) -> None:
+        """
+        Args:
+            name: Name used in error messages
+            debug: Print each object as it is decoded
+            limits: Bounds for untrusted input; headers that claim to be
+                larger than limits.max_header_size are rejected up front
+        """
+        self.name = name
+        self.limits = limits
+        self.debug = debug
+        self.bytes_fed = 0
+
+        self._buffer = bytearray()
+        self._header_obj: Optional[ASFObject] = None
+        self._result = ParsedHeader(header=b"", header_objects={}, tags={}, info={})
+        self._pos = 30
+        self._decoded = 0
+
+    def __repr__(self) -> str:
+        return (f"IncrementalParser(name={self.name!r}, buffered={len(self._buffer)}, "
+                f"needed={self.needed})")
+
+    @property
+    def complete(self) -> bool:
+        """True once the whole ASF_Header_Object has been decoded."""
+        return bool(self._result.header)
+
+    @property
+    def needed(self) -> int:
+        """Bytes still missing from the header (0 once complete)."""
+        if self._header_obj is None:
+            return 30 - len(self._buffer)
+        return self._header_obj.size - len(self._buffer)
+
+    @property
+    def drm(self) -> bool:
+        return self._result.drm
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        return self._result.info
+
+    @property
+    def tags(self) -> Dict[str, Any]:
+        return self._result.tags
+
+    @property
+    def header_objects(self) -> Dict[str, ASFObject]:
+        return self._result.header_objects
+
+    @property
+    def streams(self) -> List[StreamInfo]:
+        return self._result.streams
+
+    @property
+    def codecs(self) -> List[CodecInfo]:
+        return self._result.codecs
+
+    def feed(self, chunk: bytes) -> int:
+        """
+        Consume the next chunk of the file.
+
+        Bytes beyond the end of the header are counted but discarded.
+
+        Returns:
+            The number of header bytes still needed; 0 once complete
+
+        Raises:
+            WmaInfoError: If the data is not ASF, or the header is malformed
+        """
+        self.bytes_fed += len(chunk)
+        view = memoryview(chunk)
+        while view and not self.complete:
+            take = self.needed
+            self._buffer += view[:take]
+            view = view[take:]
+            self._advance()
+        return self.needed
+
+    def result(self) -> ParsedHeader:
+        """
+        Return the decoded header.
+
+        Raises:
+            WmaInfoError: If the header is not complete yet
+        """
+        if not self.complete:
+            raise WmaInfoError(
+                f"{self.name}: ASF header incomplete, {self.needed} more bytes needed")
+        return self._result
+
+    def to_wmainfo(self) -> 'WmaInfo':
+        """Build a WmaInfo instance from the completed header."""
+        parsed = self.result()
+        wma = WmaInfo.__new__(WmaInfo)
+        wma._init_attributes(BytesSource(parsed.header, name=self.name), self.debug)
+        wma.limits = self.limits
+        wma._size = self.bytes_fed
+        wma._load(parsed)
+        return wma
+
+    def _advance(self) -> None:
+        """Decode whatever the buffered bytes now allow."""
+        buf = self._buffer
+        if self._header_obj is None:
+            if len(buf) >= 16 and bytes(buf[:16]) != _HEADER_GUID_BYTES:
+                raise WmaInfoError(f"{self.name} doesn't appear to have a valid ASF header")
+            if len(buf) < 30:
+                return
+            header_obj = parse_header_object(buf, self.name, self.debug, self.limits)
+            self._header_obj = header_obj
+            self._result.header_objects['ASF_Header_Object'] = header_obj
+
+        num_objects = self._header_obj.num_objects or 0
+        self._pos, decoded = _walk_header_children(
+            buf, self._pos, num_objects - self._decoded, self._header_obj.size,
+            self._result, self.name, self.debug, self.limits)
+        self._decoded += decoded
+
+        if len(buf) == self._header_obj.size:
+            if self._decoded < num_objects:
+                raise MalformedHeaderError(
+                    f"{self.name}: ASF header declares {num_objects} objects but only "
+                    f"{self._decoded} fit before offset {self._pos}")
+            self._result.header = bytes(buf)
+
+
+_FILE_PROPERTIES_GUID_BYTES = _guid_to_bytes(_KNOWN_GUIDS['ASF_File_Properties_Object'])
+_STREAM_PROPERTIES_GUID_BYTES = _guid_to_bytes(_KNOWN_GUIDS['ASF_Stream_Properties_Object'])
+_AUDIO_MEDIA_GUID_BYTES = _guid_to_bytes(_KNOWN_GUIDS['ASF_Audio_Media'])
+# Stream Properties fixed part followed by the WAVEFORMATEX of audio streams
+_STREAM_RECORD = struct.Struct("<16s16sQIIHIHHIIHH")
+
+# info fields decoded from the ASF_File_Properties_Object, one batch column each
+_FILE_PROPERTIES_FIELDS = (
+    'fileid_guid', 'filesize', 'creation_date', 'creation_date_unix', 'creation_string',
+    'data_packets', 'play_duration', 'send_duration', 'preroll', 'playtime_seconds',
+    'broadcast', 'seekable', 'min_packet_size', 'max_packet_size', 'max_bitrate', 'bitrate',
+)
+
+
+@lru_cache(maxsize=None)
+def _numpy() -> Any:
+    """
+    NumPy and the record dtypes as (numpy, file properties, stream record),
+    or None if NumPy is not installed. Imported on first use only, since
+    importing NumPy costs more than most CLI runs.
+    """
+    try:
+        import numpy
+    except ImportError:  # Optional: only speeds up decode_header_batch()
+        return None
+    file_properties = numpy.dtype([
+        ('file_id', 'V16'), ('filesize', '<u8'), ('creation_date', '<u8'),
+        ('data_packets', '<u8'), ('play_duration', '<u8'), ('send_duration', '<u8'),
+        ('preroll', '<u8'), ('flags', '<u4'), ('min_packet_size', '<u4'),
+        ('max_packet_size', '<u4'), ('max_bitrate', '<u4'),
+    ])
+    stream_record = numpy.dtype([
+        ('stream_type', 'V16'), ('error_type', 'V16'), ('time_offset', '<u8'),
+        ('type_data_length', '<u4'), ('error_data_length', '<u4'), ('flags', '<u2'),
+        ('reserved', '<u4'), ('format_tag', '<u2'), ('channels', '<u2'),
+        ('sample_rate', '<u4'), ('avg_bytes_per_sec', '<u4'), ('block_align', '<u2'),
+        ('bits_per_sample', '<u2'),
+    ])
+    return numpy, file_properties, stream_record
+
+
+@dataclass
+class HeaderBatch:
+    """
+    Columnar results of decode_header_batch().
+
+    Attributes:
+        files: info field -> one value per header, equal to WmaInfo.info[field]
+        streams: StreamInfo field -> one value per stream; the `file` column
+            is the index of the header each stream came from
+    """
+    files: Dict[str, List[Any]]
+    streams: Dict[str, List[Any]]
+
+    def __len__(self) -> int:
+        return len(self.files.get('filesize', ()))
+
+
+def _locate_records(buf: Union[bytes, memoryview], offsets: Sequence[int],
+                    limits: ParseLimits) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Walk each header's children without decoding them.
+
+    Returns:
+        (File Properties payload offset per header, -1 for a header without
+        one; Stream Properties payload offsets; header index per stream)
+    """
+    file_props: List[int] = []
+    streams: List[int] = []
+    stream_files: List[int] = []
+    head = _OBJECT_HEAD.unpack_from
+    preamble = _HEADER_PREAMBLE.unpack_from
+    starts = sorted(offsets)
+    for i, start in enumerate(offsets):
+        if start + 30 > len(buf):
+            raise TruncatedHeaderError(f"header {i} at offset {start} is truncated")
+        guid, header_size, num_objects, _, _ = preamble(buf, start)
+        if guid != _HEADER_GUID_BYTES:
+            raise WmaInfoError(f"header {i} at offset {start} is not an ASF header")
+        if header_size > limits.max_header_size:
+            raise ParseLimitError(f"header {i} declares {header_size} bytes")
+        if num_objects > limits.max_objects:
+            raise ParseLimitError(f"header {i} declares {num_objects} objects")
+        # A record ends where the next one starts, so a bad size cannot read into it
+        following = bisect_right(starts, start)
+        record_end = starts[following] if following < len(starts) else len(buf)
+        end = start + header_size
+        if header_size < 30 or end > record_end:
+            raise MalformedHeaderError(f"header {i}: declared size {header_size} overruns "
+                                       f"its {record_end - start}-byte record")
+        pos = start + 30
+        found = -1
+        for _ in range(num_objects):
+            if pos + 24 > end:
+                raise MalformedHeaderError(f"header {i}: malformed object at offset {pos - start}")
+            raw_guid, size = head(buf, pos)
+            if size < 24 or pos + size > end:
+                raise MalformedHeaderError(f"header {i}: malformed object at offset {pos - start}")
+            if raw_guid == _FILE_PROPERTIES_GUID_BYTES and size >= 24 + _FILE_PROPERTIES.size:
+                found = pos + 24
+            elif raw_guid == _STREAM_PROPERTIES_GUID_BYTES and size >= 24 + _STREAM_PROPERTIES.size:
+                streams.append(pos + 24)
+                stream_files.append(i)
+            pos += size
+        file_props.append(found)
+    return file_props, streams, stream_files
+
+
+def _gather(buf: Union[bytes, memoryview], offsets: List[int], size: int) -> Any:
+    """NumPy byte matrix holding `size` bytes from each offset (zero past the end)."""
+    np = _numpy()[0]
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    index = np.asarray(offsets, dtype=np.int64)[:, None] + np.arange(size)
+    rows = raw[np.minimum(index, len(raw) - 1)]
+    rows[index >= len(raw)] = 0
+    return rows
+
+
+def _file_columns(buf: Union[bytes, memoryview], offsets: List[int],
+                  use_numpy: bool) -> Dict[str, List[Any]]:
+    if use_numpy:
+        np, dtype, _ = _numpy()
+        rec = _gather(buf, offsets, _FILE_PROPERTIES.size).view(dtype)[:, 0]
+        file_ids = [bytes(v) for v in rec['file_id']]
+        creation = rec['creation_date'].tolist()
+        flags = rec['flags']
+        columns = {name: rec[name].tolist() for name in (
+            'filesize', 'data_packets', 'play_duration', 'send_duration', 'preroll',
+            'min_packet_size', 'max_packet_size', 'max_bitrate')}
+        playtime = (rec['play_duration'] / 10_000_000 - rec['preroll'] / 1000).astype(np.int64)
+        columns['playtime_seconds'] = playtime.tolist()
+        columns['broadcast'] = (flags & 0x0001).astype(bool).tolist()
+        columns['seekable'] = (flags & 0x0002).astype(bool).tolist()
+        columns['bitrate'] = (rec['max_bitrate'] / 1000).tolist()
+    else:
+        size = _FILE_PROPERTIES.size
+        rows = _FILE_PROPERTIES.iter_unpack(b"".join(buf[o:o + size] for o in offsets))
+        (file_ids, filesize, creation, data_packets, play_duration, send_duration, preroll,
+         flags, min_packet, max_packet, max_bitrate) = map(list, zip(*rows))
+        columns = {
+            'filesize': filesize, 'data_packets': data_packets,
+            'play_duration': play_duration, 'send_duration': send_duration,
+            'preroll': preroll, 'min_packet_size': min_packet, 'max_packet_size': max_packet,
+            'max_bitrate': max_bitrate,
+            'playtime_seconds': [int(d / 10_000_000 - p / 1000)
+                                 for d, p in zip(play_duration, preroll)],
+            'broadcast': [bool(f & 0x0001) for f in flags],
+            'seekable': [bool(f & 0x0002) for f in flags],
+            'bitrate': [b / 1000 for b in max_bitrate],
+        }
+
+    # Strings and dates go through the per-file helpers, so they match exactly
+    columns['fileid_guid'] = [_DISK_GUIDS.get(g) or _guid_to_str(g) for g in file_ids]
+    columns['creation_date'] = creation
+    columns['creation_date_unix'] = [_filetime_to_unix(c) for c in creation]
+    columns['creation_string'] = [time.strftime("%c", time.gmtime(u))
+                                  for u in columns['creation_date_unix']]
+    return columns
+
+
+def _stream_columns(buf: Union[bytes, memoryview], offsets: List[int], files: List[int],
+                    use_numpy: bool) -> Dict[str, List[Any]]:
+    names = ('stream_type', 'error_type', 'time_offset', 'type_data_length',
+             'error_data_length', 'flags', 'reserved', 'format_tag', 'channels',
+             'sample_rate', 'avg_bytes_per_sec', 'block_align', 'bits_per_sample')
+    size = _STREAM_RECORD.size
+    if use_numpy and offsets:
+        rec = _gather(buf, offsets, size).view(_numpy()[2])[:, 0]
+        raw: Dict[str, List[Any]] = {n: rec[n].tolist() for n in names[2:]}
+        raw['stream_type'] = [bytes(v) for v in rec['stream_type']]
+        raw['error_type'] = [bytes(v) for v in rec['error_type']]
+    else:
+        rows = [_STREAM_RECORD.unpack(bytes(buf[o:o + size]).ljust(size, b"\x00"))
+                for o in offsets]
+        raw = dict(zip(names, map(list, zip(*rows)))) if rows else {n: [] for n in names}
+
+    audio = [t == _AUDIO_MEDIA_GUID_BYTES and n >= 16
+             for t, n in zip(raw['stream_type'], raw['type_data_length'])]
+    type_guids = [_DISK_GUIDS.get(g) or _guid_to_str(g) for g in raw['stream_type']]
+    error_guids = [_DISK_GUIDS.get(g) or _guid_to_str(g) for g in raw['error_type']]
+
+    def audio_only(values: List[Any]) -> List[Any]:
+        return [v if a else None for v, a in zip(values, audio)]
+
+    return {
+        'file': list(files),
+        'stream_number': [f & 0x007F for f in raw['flags']],
+        'stream_type_guid': type_guids,
+        'stream_type_name': [_REVERSE_GUID_MAPPING.get(g, "Unknown") for g in type_guids],
+        'error_correct_guid': error_guids,
+        'error_correct_name': [_REVERSE_GUID_MAPPING.get(g, "Unknown") for g in error_guids],
+        'time_offset': raw['time_offset'],
+        'type_data_length': raw['type_data_length'],
+        'error_data_length': raw['error_data_length'],
+        'encrypted': [bool(f & 0x8000) for f in raw['flags']],
+        'audio_format_tag': audio_only(raw['format_tag']),
+        'audio_channels': audio_only(raw['channels']),
+        'audio_sample_rate': audio_only(raw['sample_rate']),
+        'audio_bitrate': audio_only([b * 8 for b in raw['avg_bytes_per_sec']]),
+        'audio_block_align': audio_only(raw['block_align']),
+        'audio_bits_per_sample': audio_only(raw['bits_per_sample']),
+    }
+
+
+def decode_header_batch(headers: Union[Sequence[bytes], bytes],
+                        offsets: Optional[Sequence[int]] = None,
+                        use_numpy: Optional[bool] = None,
+                        limits: ParseLimits = DEFAULT_LIMITS) -> HeaderBatch:
+    """
+    Decode the fixed-size records of many headers in one pass.
+
+    Each header's children are walked to find its ASF_File_Properties_Object
+    and ASF_Stream_Properties_Objects; the records are then unpacked
+    together, with NumPy structured dtypes when NumPy is installed and
+    struct.iter_unpack otherwise. Column values are identical to the
+    per-file `info` fields and StreamInfo attributes (file fields are None
+    for a header without File Properties and audio fields for non-audio
+    streams; video fields, tags and extension objects are not decoded).
+
+    Args:
+        headers: Header buffers (e.g. WmaInfo._header), or one packed buffer
+            when `offsets` is given (a single buffer without offsets is one header)
+        offsets: Start of each header inside the packed buffer
+        use_numpy: Force (True) or avoid (False) NumPy; default when available
+        limits: Bounds for untrusted input (header size, object counts)
+
+    Raises:
+        WmaInfoError: If a buffer is not an ASF header
+        MalformedHeaderError: If a declared size overruns its record
+        ParseLimitError: If a header exceeds `limits`
+    """
+    if offsets is None:
+        if isinstance(headers, (bytes, bytearray, memoryview)):
+            headers = [bytes(headers)]
+        headers = list(headers)
+        offsets = []
+        pos = 0
+        for header in headers:
+            offsets.append(pos)
+            pos += len(header)
+        buf: Union[bytes, memoryview] = b"".join(headers)
+    else:
+        buf = memoryview(headers).cast('B')  # type: ignore[arg-type]
+
+    try:
+        file_props, streams, stream_files = _locate_records(buf, offsets, limits)
+    except struct.error as e:
+        raise TruncatedHeaderError(f"truncated header in batch: {e}")
+
+    # NumPy is imported only now, and only when it is wanted
+    if use_numpy is None:
+        use_numpy = _numpy() is not None
+    elif use_numpy and _numpy() is None:
+        raise WmaInfoError("NumPy is not installed (pip install wmainfo-py[numpy])")
+
+    present = [i for i, offset in enumerate(file_props) if offset >= 0]
+    if len(present) == len(file_props):
+        files = _file_columns(buf, file_props, use_numpy) if file_props else {}
+    else:
+        # Headers without File Properties get None, like their missing per-file info fields
+        found = _file_columns(buf, [file_props[i] for i in present], use_numpy) if present else {}
+        files = {}
+        for name in _FILE_PROPERTIES_FIELDS:
+            column: List[Any] = [None] * len(file_props)
+            for i, value in zip(present, found.get(name, ())):
+                column[i] = value
+            files[name] = column
+    return HeaderBatch(
+        files=files,
+        streams=_stream_columns(buf, streams, stream_files, use_numpy),
+    )
 
 
 class WmaInfo:
@@ -73,39 +1673,60 @@ class WmaInfo:
         tags: Dictionary of ID3-like metadata tags
         info: Dictionary of non-ID3 file information
         header_objects: Dictionary of ASF header objects
+        index_objects: Top-level objects after the data object (via parse_index_objects())
+        streams: Properties of every stream, including audio/video format details
+        codecs: Entries from the ASF_Codec_List_Object
         stream: Stream properties (populated via parse_stream())
     """
 
-    def __init__(self, file_path: Union[str, Path], debug: bool = False) -> None:
+    def __init__(self, file_path: Union[str, Path, RandomAccessSource],
+                 debug: bool = False, limits: ParseLimits = DEFAULT_LIMITS) -> None:
         """
         Initialize WMA parser and parse the file header.
 
         Args:
-            file_path: Path to the WMA/WMV file
+            file_path: Path to the WMA/WMV file, or a RandomAccessSource
+                (e.g. CoalescingSource(HTTPRangeSource(url))) to parse from
             debug: Enable debug output
+            limits: Bounds on header size, object counts and string lengths
 
         Raises:
-            WmaInfoError: If file cannot be parsed
+            WmaInfoError: If file cannot be parsed (see the subclasses
+                MalformedHeaderError, TruncatedHeaderError and ParseLimitError)
         """
-        self.file_path = Path(file_path)
+        self._init_attributes(file_path, debug)
+        self.limits = limits
+        self._parse_wma_header()
+
+    def _init_attributes(self, file_path: Union[str, Path, RandomAccessSource],
+                         debug: bool) -> None:
+        """Set up an empty, unparsed instance."""
+        if hasattr(file_path, 'read_at'):
+            self._source: RandomAccessSource = file_path  # type: ignore[assignment]
+            self._owns_source = False
+        else:
+            self._source = FileSource(file_path)
+            self._owns_source = True
+        self.file_path = getattr(self._source, 'file_path', None) or Path(self._source.name)
         self.debug = debug
+        self.limits = DEFAULT_LIMITS
 
         # Public attributes
         self.drm: bool = False
         self.tags: Dict[str, Any] = {}
         self.info: Dict[str, Any] = {}
         self.header_objects: Dict[str, ASFObject] = {}
+        self.index_objects: Dict[str, ASFObject] = {}
+        self.streams: List[StreamInfo] = []
+        self.codecs: List[CodecInfo] = []
         self.stream: Optional[StreamInfo] = None
 
         # Private attributes
         self._size: int = 0
-        self._offset: int = 0
-        self._file_offset: int = 30
-        self._header_data: bytes = b""
-        self._guid_mapping: Dict[str, str] = self._get_known_guids()
-        self._reverse_guid_mapping: Dict[str, str] = {v: k for k, v in self._guid_mapping.items()}
-
-        self._parse_wma_header()
+        self._header: bytes = b""
+        self._value_locations: Dict[str, Tuple[int, int]] = {}
+        self._markers: Optional[MarkerTable] = None
+        self._script_commands: Optional[ScriptCommandTable] = None
 
     def __repr__(self) -> str:
         return f"WmaInfo(file_path={self.file_path}, tags={len(self.tags)}, info={len(self.info)})"
@@ -146,7 +1767,7 @@ class WmaInfo:
         All other objects print: "name: GUID size offset"
         """
         for name, obj in self.header_objects.items():
-            if hasattr(obj, 'num_objects'):
+            if obj.num_objects is not None:
                 print(f"{name}: {obj.guid} {obj.size} {obj.num_objects}")
             else:
                 print(f"{name}: {obj.guid} {obj.size} {obj.offset}")
@@ -190,374 +1811,1977 @@ class WmaInfo:
             if 'ASF_Stream_Properties_Object' not in self.header_objects:
                 raise WmaInfoError("No ASF_Stream_Properties_Object found")
 
-            offset = self.header_objects['ASF_Stream_Properties_Object'].offset
-            self._parse_asf_stream_properties_object(offset)
+            obj = self.header_objects['ASF_Stream_Properties_Object']
+            stream = _decode_stream_properties(self._header, obj.offset + 24,
+                                               obj.offset + obj.size, self.limits)
+            # Bitrate and frame figures come from other objects, already decoded
+            for decoded in self.streams:
+                if decoded.stream_number == stream.stream_number:
+                    for field in _STREAM_EXTRA_FIELDS:
+                        setattr(stream, field, getattr(decoded, field))
+            self.stream = stream
         except Exception as e:
             raise WmaInfoError(f"Cannot parse ASF_Stream_Properties_Object: {e}")
 
-    def _parse_wma_header(self) -> None:
-        """Parse the WMA file header."""
-        self._size = self.file_path.stat().st_size
-
-        with open(self.file_path, 'rb') as fh:
-            self._parse_header_object(fh)
-            self._header_data = fh.read(self.header_objects['ASF_Header_Object'].size - 30)
+    def parse_index_objects(self) -> None:
+        """
+        Locate the top-level objects that follow the ASF_Data_Object.
 
-        self._parse_header_contents()
+        These are the index objects (ASF_Simple_Index_Object, ASF_Index_Object,
+        ...). Only their 24-byte object headers are read, so on a remote source
+        this costs a read at the end of the file rather than a full download.
 
-    def _parse_header_object(self, fh: BinaryIO) -> None:
-        """Parse the main ASF header object."""
+        Raises:
+            WmaInfoError: If the ASF_Data_Object header cannot be read
+        """
+        self.index_objects = {}
+        offset = self.header_objects['ASF_Header_Object'].size
         try:
-            object_id = self._byte_string_to_guid(fh.read(16))
-            object_size = unpack("<Q", fh.read(8))[0]
-            header_objects = unpack("<I", fh.read(4))[0]
-            reserved1 = unpack("b", fh.read(1))[0]
-            reserved2 = unpack("b", fh.read(1))[0]
-            object_id_name = self._reverse_guid_mapping.get(object_id)
-
-            if not object_id_name:
-                raise WmaInfoError(f"Unknown GUID: {object_id}")
+            data_object = self._read_object_header(offset)
+            if data_object is None or data_object.name != 'ASF_Data_Object':
+                raise WmaInfoError("No ASF_Data_Object after the header")
+            offset += data_object.size
+
+            for _ in range(self.limits.max_objects):
+                obj = self._read_object_header(offset)
+                if obj is None or obj.size < 24:
+                    break
+                self.index_objects[obj.name or obj.guid] = obj
+                offset += obj.size
+        finally:
+            self._release_source()
+
+    def read_picture(self) -> Optional[Picture]:
+        """
+        Read and decode the WM/Picture attribute, if present.
 
-        except (struct.error, KeyError) as e:
-            raise WmaInfoError(f"{self.file_path} doesn't appear to have a valid ASF header: {e}")
+        The payload is fetched through the same source the header came from.
 
-        if object_size > self._size:
-            raise WmaInfoError("Header size reported larger than file size")
+        Returns:
+            The decoded picture, or None if the file has no WM/Picture
+        """
+        location = self._value_locations.get('Picture')
+        if location is None:
+            return None
+        try:
+            data = self._source.read_at(*location)
+        finally:
+            self._release_source()
+        return _decode_picture(data)
 
-        # Store header object with additional attributes
-        header_obj = ASFObject(
-            guid=object_id,
-            size=object_size,
-            offset=0,
-            name=object_id_name
-        )
-        # Add extra attributes for header object
-        header_obj.num_objects = header_objects
-        header_obj.reserved1 = reserved1
-        header_obj.reserved2 = reserved2
-
-        self.header_objects[object_id_name] = header_obj
-
-        if self.debug:
-            print(f"objectId:      {object_id}")
-            print(f"objectIdName:  {object_id_name}")
-            print(f"objectSize:    {object_size}")
-            print(f"headerObjects: {header_objects}")
-            print(f"reserved1:     {reserved1}")
-            print(f"reserved2:     {reserved2}")
-
-    def _parse_header_contents(self) -> None:
-        """Parse the contents of the header object."""
-        header_obj = self.header_objects['ASF_Header_Object']
-
-        for _ in range(header_obj.num_objects):
-            next_object = self._read_and_increment_offset(16)
-            next_object_text = self._byte_string_to_guid(next_object)
-            next_object_size = self._parse_64bit_string(self._read_and_increment_offset(8))
-            next_object_name = self._reverse_guid_mapping.get(next_object_text, "Unknown")
-
-            self.header_objects[next_object_name] = ASFObject(
-                guid=next_object_text,
-                size=next_object_size,
-                offset=self._file_offset,
-                name=next_object_name
-            )
-            self._file_offset += next_object_size
-
-            if self.debug:
-                print(f"nextObjectGUID: {next_object_text}")
-                print(f"nextObjectName: {next_object_name}")
-                print(f"nextObjectSize: {next_object_size}")
-
-            # Parse specific object contents
-            if next_object_name == 'ASF_File_Properties_Object':
-                self._parse_asf_file_properties_object()
-            elif next_object_name == 'ASF_Content_Description_Object':
-                self._parse_asf_content_description_object()
-            elif next_object_name == 'ASF_Extended_Content_Description_Object':
-                self._parse_asf_extended_content_description_object()
-            elif next_object_name in ('ASF_Content_Encryption_Object',
-                                      'ASF_Extended_Content_Encryption_Object'):
-                self.drm = True
-            else:
-                # Skip unknown object content
-                self._offset += next_object_size - 24
-
-    def _parse_asf_file_properties_object(self) -> None:
-        """Parse ASF File Properties Object."""
-        file_id = self._read_and_increment_offset(16)
-        self.info['fileid_guid'] = self._byte_string_to_guid(file_id)
-        self.info['filesize'] = int(self._parse_64bit_string(self._read_and_increment_offset(8)))
-        self.info['creation_date'] = unpack("<Q", self._read_and_increment_offset(8))[0]
-        self.info['creation_date_unix'] = self._file_time_to_unix_time(self.info['creation_date'])
-        self.info['creation_string'] = time.strftime("%c", time.gmtime(self.info['creation_date_unix']))
-        self.info['data_packets'] = unpack("<Q", self._read_and_increment_offset(8))[0]
-        self.info['play_duration'] = self._parse_64bit_string(self._read_and_increment_offset(8))
-        self.info['send_duration'] = self._parse_64bit_string(self._read_and_increment_offset(8))
-        self.info['preroll'] = unpack("<Q", self._read_and_increment_offset(8))[0]
-        self.info['playtime_seconds'] = int(
-            self.info['play_duration'] / 10_000_000 - self.info['preroll'] / 1000
-        )
+    def markers(self) -> MarkerTable:
+        """
+        Return the ASF_Marker_Object entries (chapters), sorted by time.
 
-        flags_raw = unpack("<I", self._read_and_increment_offset(4))[0]
-        self.info['broadcast'] = bool(flags_raw & 0x0001)
-        self.info['seekable'] = bool(flags_raw & 0x0002)
-
-        self.info['min_packet_size'] = unpack("<I", self._read_and_increment_offset(4))[0]
-        self.info['max_packet_size'] = unpack("<I", self._read_and_increment_offset(4))[0]
-        self.info['max_bitrate'] = unpack("<I", self._read_and_increment_offset(4))[0]
-        self.info['bitrate'] = self.info['max_bitrate'] / 1000
-
-        if self.debug:
-            for key, val in self.info.items():
-                print(f"{key}: {val}")
-
-    def _parse_asf_content_description_object(self) -> None:
-        """Parse ASF Content Description Object."""
-        lengths = {}
-        keys = ["Title", "Author", "Copyright", "Description", "Rating"]
-
-        # Read the lengths of each key
-        for key in keys:
-            lengths[key] = unpack("<H", self._read_and_increment_offset(2))[0]
-
-        # Read the data based on length
-        for key in keys:
-            if lengths[key] > 0:
-                self.tags[key] = self._decode_binary_string(
-                    self._read_and_increment_offset(lengths[key])
-                )
+        The table is built from the header buffer on first use and cached;
+        `markers().at(t)` finds the marker at or before `t` seconds.
 
-    def _parse_asf_extended_content_description_object(self) -> None:
-        """Parse ASF Extended Content Description Object."""
-        ext_info = {}
-        content_count = unpack("<H", self._read_and_increment_offset(2))[0]
-
-        for _ in range(content_count):
-            ext = {}
-            ext['base_offset'] = self._offset + 30
-            ext['name_length'] = unpack("<H", self._read_and_increment_offset(2))[0]
-            ext['name'] = self._decode_binary_string(
-                self._read_and_increment_offset(ext['name_length'])
-            )
-            ext['value_type'] = unpack("<H", self._read_and_increment_offset(2))[0]
-            ext['value_length'] = unpack("<H", self._read_and_increment_offset(2))[0]
-
-            value = self._read_and_increment_offset(ext['value_length'])
-
-            # Parse value based on type
-            if ext['value_type'] <= 1:  # Unicode string
-                ext['value'] = self._decode_binary_string(value)
-            elif ext['value_type'] == 2:  # Boolean
-                ext['value'] = unpack("<I", value)[0] != 0
-            elif ext['value_type'] == 3:  # DWORD
-                ext['value'] = unpack("<I", value)[0]
-            elif ext['value_type'] == 4:  # QWORD
-                ext['value'] = self._parse_64bit_string(value)
-            elif ext['value_type'] == 5:  # WORD
-                ext['value'] = unpack("<H", value)[0]
-            else:
-                ext['value'] = value  # Raw bytes for unknown types
+        Raises:
+            WmaInfoError: If the object is malformed, or the raw header is
+                unavailable (e.g. after from_bytes())
+        """
+        if self._markers is None:
+            self._markers = self._decode_table(
+                'ASF_Marker_Object', _decode_marker_object,
+                lambda: MarkerTable(b"", array('d'), array('L'), array('L')))
+        return self._markers
 
-            if self.debug:
-                print(f"base_offset:  {ext['base_offset']}")
-                print(f"name length:  {ext['name_length']}")
-                print(f"name:         {ext['name']}")
-                print(f"value type:   {ext['value_type']}")
-                print(f"value length: {ext['value_length']}")
-                print(f"value:        {ext['value']}")
+    def script_commands(self) -> ScriptCommandTable:
+        """
+        Return the ASF_Script_Command_Object entries, sorted by time.
 
-            ext_info[ext['name']] = ext['value']
+        Built lazily like markers().
 
-        # Sort and dispatch info
-        tag_pattern = re.compile(
-            r"(TrackNumber|AlbumTitle|AlbumArtist|Genre|Year|Composer|"
-            r"Mood|Lyrics|BeatsPerMinute)"
-        )
+        Raises:
+            WmaInfoError: If the object is malformed, or the raw header is unavailable
+        """
+        if self._script_commands is None:
+            self._script_commands = self._decode_table(
+                'ASF_Script_Command_Object', _decode_script_commands,
+                lambda: ScriptCommandTable(b"", array('d'), array('L'), array('L'),
+                                           [], array('H')))
+        return self._script_commands
+
+    def _decode_table(self, object_name: str, decoder: Any, empty: Any) -> Any:
+        obj = self.header_objects.get(object_name)
+        if obj is None:
+            return empty()
+        if not self._header:
+            raise WmaInfoError(f"Raw header data is not available to read {object_name}")
+        try:
+            return decoder(self._header, obj.offset + 24, obj.offset + obj.size, self.limits)
+        except (MalformedHeaderError, ParseLimitError) as e:
+            raise type(e)(f"Cannot parse {object_name}: {e}") from None
+        except (struct.error, ValueError) as e:
+            raise MalformedHeaderError(f"Cannot parse {object_name}: {e}") from None
 
-        for key, value in ext_info.items():
-            clean_key = key.replace("WM/", "")
-            if tag_pattern.search(key):
-                self.tags[clean_key] = value
-            else:
-                self.info[clean_key] = value
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return the parse results as plain Python data.
 
-    def _parse_asf_stream_properties_object(self, offset: int) -> None:
-        """Parse ASF Stream Properties Object."""
-        self._offset = offset - 30  # Adjust offset
-        self.stream = StreamInfo()
+        The result holds only builtin types (values from the file may be
+        bytes) and can be turned back into an instance with from_dict().
+        Raw header bytes and parser state are not included.
+        """
+        return {
+            'version': SERIAL_VERSION,
+            'file_path': str(self.file_path),
+            'drm': self.drm,
+            'tags': dict(self.tags),
+            'info': dict(self.info),
+            'header_objects': {
+                name: _object_to_dict(obj) for name, obj in self.header_objects.items()
+            },
+            'index_objects': {
+                name: _object_to_dict(obj) for name, obj in self.index_objects.items()
+            },
+            'stream': dict(vars(self.stream)) if self.stream else None,
+            'streams': [dict(vars(stream)) for stream in self.streams],
+            'codecs': [dict(vars(codec)) for codec in self.codecs],
+            'value_locations': {
+                name: list(location) for name, location in self._value_locations.items()
+            },
+        }
 
-        stream_type = self._read_and_increment_offset(16)
-        self.stream.stream_type_guid = self._byte_string_to_guid(stream_type)
-        self.stream.stream_type_name = self._reverse_guid_mapping.get(
-            self.stream.stream_type_guid, "Unknown"
-        )
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WmaInfo":
+        """
+        Rebuild an instance from the output of to_dict() without touching the file.
 
-        error_type = self._read_and_increment_offset(16)
-        self.stream.error_correct_guid = self._byte_string_to_guid(error_type)
-        self.stream.error_correct_name = self._reverse_guid_mapping.get(
-            self.stream.error_correct_guid, "Unknown"
-        )
+        Raises:
+            WmaInfoError: If the data was written by an incompatible version
+        """
+        if data.get('version') != SERIAL_VERSION:
+            raise WmaInfoError(f"Unsupported serialization version: {data.get('version')}")
+
+        wma = cls.__new__(cls)
+        wma._init_attributes(data['file_path'], debug=False)
+        wma.drm = data['drm']
+        wma.tags = dict(data['tags'])
+        wma.info = dict(data['info'])
+        wma.header_objects = {
+            name: _object_from_dict(name, obj) for name, obj in data['header_objects'].items()
+        }
+        wma.index_objects = {
+            name: _object_from_dict(name, obj) for name, obj in data['index_objects'].items()
+        }
+        if data['stream'] is not None:
+            wma.stream = StreamInfo(**data['stream'])
+        wma.streams = [StreamInfo(**stream) for stream in data.get('streams', [])]
+        wma.codecs = [CodecInfo(**codec) for codec in data.get('codecs', [])]
+        wma._value_locations = {
+            name: (location[0], location[1])
+            for name, location in data.get('value_locations', {}).items()
+        }
+        return wma
 
-        self.stream.time_offset = unpack("<Q", self._read_and_increment_offset(8))[0]
-        self.stream.type_data_length = unpack("<I", self._read_and_increment_offset(4))[0]
-        self.stream.error_data_length = unpack("<I", self._read_and_increment_offset(4))[0]
+    def to_bytes(self) -> bytes:
+        """
+        Encode the parse results in the compact versioned binary format.
 
-        flags_raw = unpack("<H", self._read_and_increment_offset(2))[0]
-        self.stream.stream_number = flags_raw & 0x007F
-        self.stream.encrypted = bool(flags_raw & 0x8000)
+        Tags, info, the object indexes, stream info and the locations of
+        lazily read values are stored; GUIDs are kept as 16 raw bytes and
+        object names are recovered from them. All values go into one row,
+        packed with a single struct chosen by their one-byte type tags.
+        """
+        tags, info = self.tags, self.info
+        key_ids = bytes(map(_SERIAL_KEY_IDS.get, chain(tags, info), repeat(0)))
+        objects = [*self.header_objects.values(), *self.index_objects.values()]
+        streams = self.streams if self.stream is None else [self.stream, *self.streams]
+
+        row: List[Any] = [str(self.file_path)]
+        row += [key for key, key_id in zip(chain(tags, info), key_ids) if not key_id]
+        row += tags.values()
+        row += info.values()
+        row += chain.from_iterable(map(_object_extras, objects))
+        row += chain.from_iterable(map(_stream_values, streams))
+        row += chain.from_iterable(map(_codec_values, self.codecs))
+        for name, (offset, length) in self._value_locations.items():
+            row += (name, offset, length)
+
+        out = bytearray(_SERIAL_HEADER.pack(SERIAL_MAGIC, SERIAL_VERSION, int(self.drm)))
+        out += _SERIAL_COUNTS.pack(len(tags), len(info), len(self.header_objects),
+                                   len(self.index_objects), self.stream is not None,
+                                   len(self.streams), len(self.codecs),
+                                   len(self._value_locations))
+        out += key_ids
+        out += b"".join([_OBJECT.pack(_guid_to_bytes(obj.guid), obj.size, obj.offset)
+                         for obj in objects])
+        _encode_row(out, row)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WmaInfo":
+        """
+        Rebuild an instance from the output of to_bytes().
 
-        # Skip reserved field
-        self._read_and_increment_offset(4)
+        Raises:
+            WmaInfoError: If the data is truncated, corrupt or from an
+                incompatible version
+        """
+        try:
+            magic, version, drm = _SERIAL_HEADER.unpack_from(data, 0)
+            if magic != SERIAL_MAGIC or version != SERIAL_VERSION:
+                raise WmaInfoError(f"Unsupported serialization format: {magic!r} v{version}")
+            (n_tags, n_info, n_header, n_index, has_stream, n_streams, n_codecs,
+             n_locations) = _SERIAL_COUNTS.unpack_from(data, _SERIAL_HEADER.size)
+            pos = _SERIAL_HEADER.size + _SERIAL_COUNTS.size
+            key_ids = data[pos:pos + n_tags + n_info]
+            pos += n_tags + n_info
+            end = pos + (n_header + n_index) * _OBJECT.size
+            if end > len(data):
+                raise ValueError("unexpected end of data")
+            records = list(_OBJECT.iter_unpack(data[pos:end]))
+            row, pos = _decode_row(data, end)
+
+            n_named = key_ids.count(0)
+            n_stream_rows = has_stream + n_streams
+            width = len(_STREAM_FIELDS)
+            if len(row) != (1 + n_named + n_tags + n_info + 3 * len(records)
+                            + width * n_stream_rows + 4 * n_codecs + 3 * n_locations):
+                raise ValueError("row length does not match the section counts")
+            if max(key_ids, default=0) > len(_SERIAL_KEYS):
+                raise ValueError(f"unknown key id {max(key_ids)}")
+
+            wma = cls.__new__(cls)
+            wma._init_attributes(row[0], debug=False)
+            wma.drm = bool(drm)
+            named = iter(row[1:1 + n_named])
+            keys = [_SERIAL_KEYS[key_id - 1] if key_id else next(named) for key_id in key_ids]
+            i = 1 + n_named
+            wma.tags = dict(zip(keys[:n_tags], row[i:i + n_tags]))
+            i += n_tags
+            wma.info = dict(zip(keys[n_tags:], row[i:i + n_info]))
+            i += n_info
+
+            for n, (raw_guid, size, offset) in enumerate(records):
+                guid = _DISK_GUIDS.get(raw_guid) or _guid_to_str(raw_guid)
+                obj = ASFObject(guid, size, offset, _REVERSE_GUID_MAPPING.get(guid, "Unknown"),
+                                *row[i:i + 3])
+                i += 3
+                objects = wma.header_objects if n < n_header else wma.index_objects
+                objects[obj.name or obj.guid] = obj
+
+            streams = [StreamInfo(*row[j:j + width])
+                       for j in range(i, i + width * n_stream_rows, width)]
+            i += width * n_stream_rows
+            if has_stream:
+                wma.stream = streams.pop(0)
+            wma.streams = streams
+            wma.codecs = [CodecInfo(*row[j:j + 4]) for j in range(i, i + 4 * n_codecs, 4)]
+            i += 4 * n_codecs
+            wma._value_locations = {
+                row[j]: (row[j + 1], row[j + 2]) for j in range(i, i + 3 * n_locations, 3)}
+        except (struct.error, UnicodeDecodeError, ValueError, TypeError, IndexError) as e:
+            raise WmaInfoError(f"Corrupt serialized WmaInfo: {e}")
+        return wma
+
+    @classmethod
+    def from_pack(cls, pack: "HeaderPack", path: Union[str, Path], debug: bool = False,
+                  limits: ParseLimits = DEFAULT_LIMITS) -> "WmaInfo":
+        """
+        Parse a file's header from a HeaderPack rather than the file itself.
 
-        self.stream.type_specific_data = self._read_and_increment_offset(
-            self.stream.type_data_length
-        )
-        self.stream.error_correct_data = self._read_and_increment_offset(
-            self.stream.error_data_length
-        )
+        The result is the same as WmaInfo(path) when the file was packed,
+        including parse_index_objects(), but no media is read.
 
-        if self.stream.stream_type_name == 'ASF_Audio_Media':
-            self._parse_asf_audio_media_object()
+        Raises:
+            KeyError: If the path is not in the pack
+            WmaInfoError: If the packed header cannot be parsed
+        """
+        return cls(pack.source(path), debug, limits)
 
-    def _parse_asf_audio_media_object(self) -> None:
-        """Parse ASF Audio Media Object."""
-        if not self.stream or not self.stream.type_specific_data:
-            return
+    def header_fingerprint(self) -> str:
+        """
+        Hash the header objects, ignoring ASF_Padding_Object.
 
-        data = self.stream.type_specific_data[:16]
-        if len(data) >= 16:
-            self.stream.audio_channels = unpack("<H", data[2:4])[0]
-            self.stream.audio_sample_rate = unpack("<I", data[4:8])[0]
-            self.stream.audio_bitrate = unpack("<I", data[8:12])[0] * 8
-            self.stream.audio_bits_per_sample = unpack("<H", data[14:16])[0]
+        Copies of a file share a fingerprint even if a tag editor has moved
+        padding around; any change to tags or properties changes it.
 
-    @staticmethod
-    def _decode_binary_string(data: bytes) -> str:
-        """Decode a UTF-16LE binary string."""
-        try:
-            return data.decode('utf-16le', 'ignore').rstrip('\x00')
-        except UnicodeDecodeError:
-            return ""
+        Returns:
+            Hex digest (BLAKE2b, 128-bit)
 
-    def _read_and_increment_offset(self, size: int) -> bytes:
-        """Read data from header and increment offset."""
-        value = self._header_data[self._offset:self._offset + size]
-        self._offset += size
-        return value
+        Raises:
+            WmaInfoError: If the raw header is unavailable (e.g. after from_bytes())
+        """
+        if not self._header:
+            raise WmaInfoError("Raw header data is not available for fingerprinting")
+
+        import hashlib
+
+        padding_guid = _KNOWN_GUIDS['ASF_Padding_Object']
+        data = self._header
+        digest = hashlib.blake2b(digest_size=16)
+        pos = 30
+        while pos + 24 <= len(data):
+            raw_guid, size = _OBJECT_HEAD.unpack_from(data, pos)
+            if size < 24:
+                break
+            if _DISK_GUIDS.get(raw_guid) != padding_guid:
+                digest.update(data[pos:pos + size])
+            pos += size
+        digest.update(data[pos:])
+        return digest.hexdigest()
 
-    @staticmethod
-    def _byte_string_to_guid(byte_string: bytes) -> str:
-        """Convert a 16-byte string to GUID format."""
-        if len(byte_string) != 16:
-            raise ValueError(f"Invalid GUID byte string length: {len(byte_string)}")
-
-        b = unpack("16B", byte_string)
-
-        guid = (
-            f"{b[3]:02X}{b[2]:02X}{b[1]:02X}{b[0]:02X}-"
-            f"{b[5]:02X}{b[4]:02X}-"
-            f"{b[7]:02X}{b[6]:02X}-"
-            f"{b[8]:02X}{b[9]:02X}-"
-            f"{b[10]:02X}{b[11]:02X}{b[12]:02X}{b[13]:02X}{b[14]:02X}{b[15]:02X}"
+    def _parse_wma_header(self) -> None:
+        """Read the header through the source and decode it."""
+        try:
+            preamble = self._source.read_at(0, 30)
+            header_obj = parse_header_object(preamble, str(self.file_path), limits=self.limits)
+            self._size = self._source.size
+            if header_obj.size > self._size:
+                raise TruncatedHeaderError("Header size reported larger than file size")
+
+            data = preamble + self._source.read_at(30, header_obj.size - 30)
+        finally:
+            self._release_source()
+
+        self._load(parse_header(data, str(self.file_path), self.debug, self.limits))
+
+    def _load(self, parsed: ParsedHeader) -> None:
+        """Take over the results of the stateless header decoder."""
+        self.drm = parsed.drm
+        self.tags = parsed.tags
+        self.info = parsed.info
+        self.header_objects = parsed.header_objects
+        self.streams = parsed.streams
+        self.codecs = parsed.codecs
+        self._header = parsed.header
+        self._value_locations = parsed.value_locations
+
+    def _release_source(self) -> None:
+        """Close the source between reads if this instance opened it."""
+        if self._owns_source:
+            self._source.close()  # type: ignore[attr-defined]
+
+    def _read_object_header(self, offset: int) -> Optional[ASFObject]:
+        """Read the GUID and size of the top-level object at `offset`."""
+        data = self._source.read_at(offset, 24)
+        if len(data) < 24:
+            return None
+        guid = _guid_at(data, 0)
+        return ASFObject(
+            guid=guid,
+            size=_U64_AT(data, 16)[0],
+            offset=offset,
+            name=_REVERSE_GUID_MAPPING.get(guid, "Unknown")
         )
 
-        return guid
+    # Helpers kept as static methods for backwards compatibility
+    _decode_binary_string = staticmethod(_decode_utf16)
+    _byte_string_to_guid = staticmethod(_guid_to_str)
+    _file_time_to_unix_time = staticmethod(_filetime_to_unix)
 
     @staticmethod
     def _parse_64bit_string(data: bytes) -> int:
         """Parse a 64-bit little-endian integer."""
         return unpack('<Q', data)[0]
 
-    @staticmethod
-    def _file_time_to_unix_time(file_time: int) -> int:
-        """Convert Windows FILETIME to Unix timestamp."""
-        # Windows FILETIME is 100-nanosecond intervals since January 1, 1601
-        return int((file_time - 116_444_736_000_000_000) / 10_000_000)
-
     @staticmethod
     def _get_known_guids() -> Dict[str, str]:
         """Return dictionary of known ASF GUIDs."""
+        return dict(_KNOWN_GUIDS)
+
+
+# Compact binary serialization (WmaInfo.to_bytes / from_bytes)
+SERIAL_MAGIC = b"WMAI"
+SERIAL_VERSION = 2
+
+_SERIAL_HEADER = struct.Struct("<4sBB")
+_U32 = struct.Struct("<I")
+# Tags, info, header objects, index objects, has primary stream, streams,
+# codecs and value locations
+_SERIAL_COUNTS = struct.Struct("<IIIIBIII")
+_OBJECT = struct.Struct("<16sQQ")
+
+# Well-known tag/info keys are written as a one-byte index (part of the format;
+# only ever append to this tuple)
+_SERIAL_KEYS = (
+    'Title', 'Author', 'Copyright', 'Description', 'Rating',
+    'TrackNumber', 'AlbumTitle', 'AlbumArtist', 'Genre', 'Year', 'Composer',
+    'Mood', 'Lyrics', 'BeatsPerMinute',
+    'fileid_guid', 'filesize', 'creation_date', 'creation_date_unix', 'creation_string',
+    'data_packets', 'play_duration', 'send_duration', 'preroll', 'playtime_seconds',
+    'broadcast', 'seekable', 'min_packet_size', 'max_packet_size', 'max_bitrate', 'bitrate',
+    'IsVBR', 'Picture', 'EncodingTime', 'MediaPrimaryClassID', 'WMFSDKVersion',
+    'WMFSDKNeeded', 'ProviderStyle', 'Provider', 'Publisher', 'UniqueFileIdentifier',
+)
+_SERIAL_KEY_IDS: Dict[str, int] = {key: i + 1 for i, key in enumerate(_SERIAL_KEYS)}
+
+# Value type tags; a row's tags select its struct layout (str and bytes store
+# their length there, with the payloads following the packed block)
+_T_NONE, _T_BOOL, _T_INT, _T_UINT, _T_FLOAT, _T_STR, _T_BYTES = range(7)
+_TAG_FORMATS = {_T_NONE: '', _T_BOOL: '?', _T_INT: 'q', _T_UINT: 'Q', _T_FLOAT: 'd',
+                _T_STR: 'I', _T_BYTES: 'I'}
+_TYPE_TAGS: Dict[type, int] = {type(None): _T_NONE, bool: _T_BOOL, int: _T_INT,
+                               float: _T_FLOAT, str: _T_STR, bytes: _T_BYTES,
+                               bytearray: _T_BYTES}
+_STREAM_FIELDS = tuple(f.name for f in dataclasses.fields(StreamInfo))
+_stream_values = attrgetter(*_STREAM_FIELDS)
+_object_extras = attrgetter('num_objects', 'reserved1', 'reserved2')
+_codec_values = attrgetter('codec_type', 'name', 'description', 'information')
+
+
+def _object_to_dict(obj: ASFObject) -> Dict[str, Any]:
+    """Convert an ASFObject (and header-object extras) to a plain dict."""
+    result = {'guid': obj.guid, 'size': obj.size, 'offset': obj.offset}
+    for extra in ('num_objects', 'reserved1', 'reserved2'):
+        if getattr(obj, extra) is not None:
+            result[extra] = getattr(obj, extra)
+    return result
+
+
+def _object_from_dict(name: str, data: Dict[str, Any]) -> ASFObject:
+    """Inverse of _object_to_dict()."""
+    obj = ASFObject(guid=data['guid'], size=data['size'], offset=data['offset'], name=name)
+    for extra in ('num_objects', 'reserved1', 'reserved2'):
+        if extra in data:
+            setattr(obj, extra, data[extra])
+    return obj
+
+
+# Struct, then positions of the fixed-size, str and bytes values
+_RowLayout = Tuple[struct.Struct, Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]
+
+
+@lru_cache(maxsize=512)
+def _row_layout(signature: bytes) -> _RowLayout:
+    """
+    Struct for a row's type tags, and the positions of its fixed-size, str
+    and bytes values (None values are not stored).
+
+    The struct holds the fixed-size values, the UTF-8 size of all strings,
+    each string's length in characters, then each bytes value's length.
+    """
+    formats = []
+    fixed: List[int] = []
+    texts: List[int] = []
+    blobs: List[int] = []
+    for i, tag in enumerate(signature):
+        if tag not in _TAG_FORMATS:
+            raise ValueError(f"unknown value tag {tag}")
+        if tag == _T_STR:
+            texts.append(i)
+        elif tag == _T_BYTES:
+            blobs.append(i)
+        elif tag != _T_NONE:
+            formats.append(_TAG_FORMATS[tag])
+            fixed.append(i)
+    layout = '<' + ''.join(formats) + 'I' * (1 + len(texts) + len(blobs))
+    return struct.Struct(layout), tuple(fixed), tuple(texts), tuple(blobs)
+
+
+def _pack_row(signature: bytes, values: Sequence[Any]) -> bytes:
+    """Packed block and payloads for `values` laid out by `signature`."""
+    layout, fixed, texts, blobs = _row_layout(signature)
+    get = values.__getitem__
+    strings = list(map(get, texts))
+    text = "".join(strings).encode('utf-8')
+    raw = list(map(get, blobs))
+    return b"".join((layout.pack(*map(get, fixed), len(text), *map(len, strings), *map(len, raw)),
+                     text, *raw))
+
+
+def _encode_row(out: bytearray, values: Sequence[Any]) -> None:
+    """Append values as a count, their type tags, one packed block and the str/bytes payloads."""
+    try:
+        signature = bytes(map(_TYPE_TAGS.__getitem__, map(type, values)))
+    except KeyError as e:
+        raise WmaInfoError(f"Cannot serialize value of type {e.args[0].__name__}") from None
+    try:
+        block = _pack_row(signature, values)
+    except struct.error:
+        # Rare: an int beyond int64 (e.g. a QWORD attribute) is stored as uint64
+        signature = bytes(_T_UINT if type(value) is int and value >= 2**63 else tag
+                          for value, tag in zip(values, signature))
+        try:
+            block = _pack_row(signature, values)
+        except struct.error as e:
+            raise WmaInfoError(f"Cannot serialize value: {e}") from None
+    out += _U32.pack(len(values))
+    out += signature
+    out += block
+
+
+def _decode_row(data: bytes, pos: int) -> Tuple[List[Any], int]:
+    """Decode a row written by _encode_row(); returns (values, new_pos)."""
+    count = _U32.unpack_from(data, pos)[0]
+    pos += 4
+    signature = data[pos:pos + count]
+    if len(signature) < count:
+        raise ValueError("unexpected end of data")
+    layout, fixed, texts, blobs = _row_layout(bytes(signature))
+    unpacked = layout.unpack_from(data, pos + count)
+    pos += count + layout.size
+
+    values: List[Any] = [None] * count
+    for i, value in zip(fixed, unpacked):
+        values[i] = value
+    lengths = iter(unpacked[len(fixed):])
+    text_size = next(lengths)
+    text = data[pos:pos + text_size].decode('utf-8')
+    pos += text_size
+    start = 0
+    for i, length in zip(texts, lengths):
+        values[i] = text[start:start + length]
+        start += length
+    for i, length in zip(blobs, lengths):
+        values[i] = data[pos:pos + length]
+        pos += length
+    if pos > len(data) or start != len(text):
+        raise ValueError("unexpected end of data")
+    return values, pos
+
+
+@dataclass
+class ScanResult:
+    """
+    Outcome of parsing one file in a batch scan.
+
+    For archive members, `path` is the archive and `member` the name inside it.
+    """
+    path: Path
+    wma: Optional[WmaInfo] = None
+    error: Optional[Exception] = None
+    member: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.wma is not None
+
+
+def _scan_one(path: Union[str, Path]) -> ScanResult:
+    try:
+        return ScanResult(Path(path), wma=WmaInfo(path))
+    except (WmaInfoError, OSError) as e:
+        return ScanResult(Path(path), error=e)
+
+
+def _map_threaded(func: Any, items: Iterable[Any], workers: int) -> Iterator[Any]:
+    """map() in input order, over a bounded look-ahead of `workers` threads."""
+    # The look-ahead keeps memory flat for very long item streams
+    if workers <= 0:
+        yield from map(func, items)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import islice
+
+    item_iter = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(islice(item_iter, workers * 64))
+            if not batch:
+                break
+            yield from pool.map(func, batch)
+
+
+def scan(paths: Iterable[Union[str, Path]], workers: int = 0) -> Iterator[ScanResult]:
+    """
+    Parse many files, yielding one ScanResult per path in input order.
+
+    Parse failures (WmaInfoError, OSError) are reported on the result rather
+    than raised, so one bad file does not stop the batch.
+
+    Args:
+        paths: Files to parse; consumed lazily
+        workers: Number of threads to parse with (0 parses in the caller)
+    """
+    return _map_threaded(_scan_one, paths, workers)
+
+
+DEFAULT_EXTENSIONS = ('.wma', '.wmv', '.asf')
+
+
+@lru_cache(maxsize=None)
+def _archive_errors() -> Tuple[Type[Exception], ...]:
+    """Errors that make one archive member unreadable; imports the archive modules on first use."""
+    import tarfile
+    import zipfile
+    import zlib
+    return (WmaInfoError, OSError, EOFError, zlib.error, zipfile.BadZipFile, tarfile.TarError)
+
+
+def _scan_member(archive: Path, member: str, fileobj: Any, size: int) -> ScanResult:
+    """Feed a member's header bytes, and nothing more, to an IncrementalParser."""
+    try:
+        parser = IncrementalParser(f"{archive}/{member}")
+        while parser.needed:
+            chunk = fileobj.read(parser.needed)
+            if not chunk:
+                raise TruncatedHeaderError(f"{parser.name}: ends inside the ASF header")
+            parser.feed(chunk)
+        wma = parser.to_wmainfo()
+        wma._size = size
+        return ScanResult(archive, wma=wma, member=member)
+    except _archive_errors() as e:
+        return ScanResult(archive, error=e, member=member)
+
+
+def scan_archive(archive: Union[str, Path],
+                 extensions: Optional[Iterable[str]] = DEFAULT_EXTENSIONS) -> Iterator[ScanResult]:
+    """
+    Parse the media files inside a zip or tar archive without extracting it.
+
+    Only each member's header bytes are read: zip members and uncompressed
+    tar members are reached by seeking, compressed tars are streamed once
+    from start to end. Results come in archive order, with the archive as
+    `path` and the member name as `member`; index objects and pictures are
+    not available on the returned instances. A truncated or corrupt tar
+    ends with a failed result for the archive itself (`member` is None).
+
+    Args:
+        archive: Path to a .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz file
+        extensions: Member name suffixes to parse (None parses every file)
+
+    Raises:
+        WmaInfoError: If `archive` is neither a zip nor a tar archive
+    """
+    import tarfile
+    import zipfile
+
+    archive = Path(archive)
+    suffixes = tuple(e.lower() for e in extensions) if extensions else None
+
+    def wanted(name: str) -> bool:
+        return suffixes is None or name.lower().endswith(suffixes)
+
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not wanted(info.filename):
+                    continue
+                # ZipFile.open() also raises these for encrypted members and unsupported methods
+                try:
+                    fileobj = zf.open(info)
+                except _archive_errors() + (RuntimeError, NotImplementedError) as e:
+                    yield ScanResult(archive, error=e, member=info.filename)
+                    continue
+                with fileobj:
+                    yield _scan_member(archive, info.filename, fileobj, info.file_size)
+        return
+
+    try:
+        # Random access when uncompressed; a single forward pass otherwise
+        tf = tarfile.open(archive, mode='r:')
+    except tarfile.ReadError:
+        try:
+            tf = tarfile.open(archive, mode='r|*')
+        except tarfile.ReadError as e:
+            raise WmaInfoError(f"{archive} is not a zip or tar archive: {e}")
+
+    with tf:
+        members = iter(tf)
+        while True:
+            try:
+                member = next(members)
+            except StopIteration:
+                break
+            except _archive_errors() as e:
+                # Truncated or corrupt past this point: nothing further can be read
+                yield ScanResult(archive, error=WmaInfoError(f"{archive} is damaged: {e}"))
+                break
+            if not member.isfile() or not wanted(member.name):
+                continue
+            extracted = tf.extractfile(member)
+            if extracted is None:
+                yield ScanResult(archive, error=WmaInfoError(f"{member.name}: cannot be read"),
+                                 member=member.name)
+                continue
+            yield _scan_member(archive, member.name, extracted, member.size)
+
+
+# (st_size, st_mtime_ns, st_ino): changes whenever a file is rewritten
+StatSignature = Tuple[int, int, int]
+
+
+def _walk_entries(root: Union[str, Path], stats: Optional['DiscoveryStats'] = None,
+                  unreadable: Optional[List[str]] = None) -> Iterator[os.DirEntry]:
+    """
+    Iteratively walk `root` with os.scandir, yielding regular-file entries.
+
+    Directories that cannot be listed are appended to `unreadable`.
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            it = os.scandir(directory)
+        except OSError:
+            if stats is not None:
+                stats.errors += 1
+            if unreadable is not None:
+                unreadable.append(directory)
+            continue
+        if stats is not None:
+            stats.directories += 1
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        yield entry
+                except OSError:
+                    continue
+
+
+def _walk_files(root: Union[str, Path], extensions: Optional[Iterable[str]],
+                unreadable: Optional[List[str]] = None
+                ) -> Iterator[Tuple[str, Optional[StatSignature]]]:
+    """
+    Iteratively walk `root` with os.scandir, yielding (path, stat signature).
+
+    The signature is None for files that could not be stat()ed.
+    """
+    suffixes = tuple(e.lower() for e in extensions) if extensions else None
+    for entry in _walk_entries(root, unreadable=unreadable):
+        if suffixes is None or entry.name.lower().endswith(suffixes):
+            try:
+                st = entry.stat()
+            except OSError:
+                yield entry.path, None
+                continue
+            yield entry.path, (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+@dataclass
+class DiscoveryStats:
+    """Traversal counters, updated live while discover() runs."""
+    directories: int = 0
+    files: int = 0
+    candidates: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.candidates} ASF files among {self.files} files in "
+                f"{self.directories} directories, {self.elapsed:.2f}s "
+                f"({self.files_per_second:,.0f} files/s)")
+
+
+def _sniff_asf(path: str) -> Optional[bool]:
+    """True if `path` starts with the ASF_Header_Object GUID; None if unreadable."""
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 16) == _HEADER_GUID_BYTES
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def discover(root: Union[str, Path], workers: int = 0, batch_size: int = 256,
+             stats: Optional[DiscoveryStats] = None) -> Iterator[str]:
+    """
+    Find ASF files under `root` by content rather than by extension.
+
+    The tree is walked iteratively with os.scandir and every regular file's
+    first 16 bytes are compared with the ASF_Header_Object GUID, so misnamed
+    and extensionless files are found too. Files are sniffed in batches
+    (on a thread pool when `workers` > 0) and matches are yielded as each
+    batch completes, in traversal order, ready to feed straight into scan().
+
+    Args:
+        root: Directory to walk
+        workers: Threads used to sniff each batch (0 sniffs in the caller)
+        batch_size: Files per sniffing batch
+        stats: Optional DiscoveryStats to update with traversal throughput
+
+    Example:
+        stats = DiscoveryStats()
+        for result in scan(discover('/srv/media', workers=8, stats=stats), workers=8):
+            ...
+        print(stats)
+    """
+    from itertools import islice
+
+    stats = stats if stats is not None else DiscoveryStats()
+    start = time.perf_counter()
+    entries = _walk_entries(root, stats)
+    pool = None
+    if workers > 0:
+        from concurrent.futures import ThreadPoolExecutor
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        while True:
+            batch = [entry.path for entry in islice(entries, batch_size)]
+            if not batch:
+                break
+            sniffed = pool.map(_sniff_asf, batch) if pool else map(_sniff_asf, batch)
+            matches = []
+            for path, is_asf in zip(batch, sniffed):
+                if is_asf is None:
+                    stats.errors += 1
+                elif is_asf:
+                    matches.append(path)
+            stats.files += len(batch)
+            stats.candidates += len(matches)
+            stats.elapsed = time.perf_counter() - start
+            yield from matches
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        stats.elapsed = time.perf_counter() - start
+
+
+@dataclass
+class IndexUpdate:
+    """Counts from one LibraryIndex.update() run."""
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+
+class LibraryIndex:
+    """
+    Persistent, incrementally updated index of parsed files (SQLite).
+
+    Each row holds a file's stat signature and its parse result in the
+    WmaInfo.to_bytes() encoding (or the parse error). update() walks a tree
+    and reparses only new or modified files; unchanged files are never opened.
+
+    Usage:
+        with LibraryIndex('library.db') as index:
+            stats = index.update('/srv/media')
+            wma = index.get('/srv/media/song.wma')
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path     TEXT PRIMARY KEY,
+            size     INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode    INTEGER NOT NULL,
+            data     BLOB,
+            error    TEXT
+        )
+    """
+
+    def __init__(self, db_path: Union[str, Path]) -> None:
+        import sqlite3
+
+        self.db_path = Path(db_path)
+        self._db = sqlite3.connect(str(self.db_path))
+        self._db.execute(self._SCHEMA)
+        # Rows encoded by another serialization version are reparsed by the next update()
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SERIAL_VERSION:
+            self._db.execute("DELETE FROM files")
+            self._db.execute(f"PRAGMA user_version = {SERIAL_VERSION}")
+        self._db.commit()
+
+    def __enter__(self) -> "LibraryIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        count: int = self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        return count
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+    def update(self, root: Union[str, Path],
+               extensions: Optional[Iterable[str]] = DEFAULT_EXTENSIONS,
+               workers: int = 0, batch_size: int = 1000) -> IndexUpdate:
+        """
+        Bring the index up to date with the files under `root`.
+
+        Args:
+            root: Directory to walk
+            extensions: File suffixes to consider (None for every file)
+            workers: Threads used to parse new/modified files
+            batch_size: Rows written per transaction
+
+        Returns:
+            Counts of added, updated, removed, unchanged and failed files
+        """
+        root_str = os.path.abspath(os.fspath(root))
+        prefix = root_str.rstrip(os.sep) + os.sep
+        known = self._signatures_under(prefix)
+        stats = IndexUpdate()
+        # scan() preserves input order, so results line up with this queue
+        pending: "deque[Tuple[str, StatSignature]]" = deque()
+        unreadable: List[str] = []
+
+        def changed_paths() -> Iterator[str]:
+            for path, signature in _walk_files(root_str, extensions, unreadable):
+                previous = known.pop(path, None)
+                if signature is None:
+                    # A transient stat() failure: keep whatever is cached
+                    stats.failed += 1
+                    continue
+                if previous == signature:
+                    stats.unchanged += 1
+                    continue
+                if previous is None:
+                    stats.added += 1
+                else:
+                    stats.updated += 1
+                pending.append((path, signature))
+                yield path
+
+        rows: List[Tuple[str, int, int, int, Optional[bytes], Optional[str]]] = []
+        for result in scan(changed_paths(), workers=workers):
+            path, (size, mtime_ns, inode) = pending.popleft()
+            if result.wma is not None:
+                rows.append((path, size, mtime_ns, inode, result.wma.to_bytes(), None))
+            else:
+                stats.failed += 1
+                rows.append((path, size, mtime_ns, inode, None, str(result.error)))
+            if len(rows) >= batch_size:
+                self._write(rows)
+                rows = []
+        self._write(rows)
+
+        # Whatever was not seen during the walk has been deleted, unless it
+        # sits in a directory that could not be listed this time
+        prefixes = tuple(d.rstrip(os.sep) + os.sep for d in unreadable)
+        removed = [p for p in known if not p.startswith(prefixes)] if prefixes else list(known)
+        stats.removed = len(removed)
+        with self._db:
+            self._db.executemany("DELETE FROM files WHERE path = ?", ((p,) for p in removed))
+        return stats
+
+    def get(self, path: Union[str, Path]) -> Optional[WmaInfo]:
+        """
+        Return the indexed parse result for `path`.
+
+        Returns:
+            The result, or None if the path is not indexed or failed to parse
+        """
+        row = self._db.execute(
+            "SELECT data FROM files WHERE path = ?", (os.path.abspath(os.fspath(path)),)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return WmaInfo.from_bytes(row[0])
+
+    def errors(self) -> Iterator[Tuple[str, str]]:
+        """Yield (path, error message) for files that failed to parse."""
+        yield from self._db.execute("SELECT path, error FROM files WHERE error IS NOT NULL")
+
+    def __iter__(self) -> Iterator[Tuple[str, WmaInfo]]:
+        """Yield (path, WmaInfo) for every successfully parsed file."""
+        for path, data in self._db.execute(
+                "SELECT path, data FROM files WHERE data IS NOT NULL ORDER BY path"):
+            yield path, WmaInfo.from_bytes(data)
+
+    def _signatures_under(self, prefix: str) -> Dict[str, StatSignature]:
+        # Range scan on the primary key: every path that starts with `prefix`
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
         return {
-            'ASF_Extended_Stream_Properties_Object': '14E6A5CB-C672-4332-8399-A96952065B5A',
-            'ASF_Padding_Object': '1806D474-CADF-4509-A4BA-9AABCB96AAE8',
-            'ASF_Payload_Ext_Syst_Pixel_Aspect_Ratio': '1B1EE554-F9EA-4BC8-821A-376B74E4C4B8',
-            'ASF_Script_Command_Object': '1EFB1A30-0B62-11D0-A39B-00A0C90348F6',
-            'ASF_No_Error_Correction': '20FB5700-5B55-11CF-A8FD-00805F5C442B',
-            'ASF_Content_Branding_Object': '2211B3FA-BD23-11D2-B4B7-00A0C955FC6E',
-            'ASF_Content_Encryption_Object': '2211B3FB-BD23-11D2-B4B7-00A0C955FC6E',
-            'ASF_Digital_Signature_Object': '2211B3FC-BD23-11D2-B4B7-00A0C955FC6E',
-            'ASF_Extended_Content_Encryption_Object': '298AE614-2622-4C17-B935-DAE07EE9289C',
-            'ASF_Simple_Index_Object': '33000890-E5B1-11CF-89F4-00A0C90349CB',
-            'ASF_Degradable_JPEG_Media': '35907DE0-E415-11CF-A917-00805F5C442B',
-            'ASF_Payload_Extension_System_Timecode': '399595EC-8667-4E2D-8FDB-98814CE76C1E',
-            'ASF_Binary_Media': '3AFB65E2-47EF-40F2-AC2C-70A90D71D343',
-            'ASF_Timecode_Index_Object': '3CB73FD0-0C4A-4803-953D-EDF7B6228F0C',
-            'ASF_Metadata_Library_Object': '44231C94-9498-49D1-A141-1D134E457054',
-            'ASF_Reserved_3': '4B1ACBE3-100B-11D0-A39B-00A0C90348F6',
-            'ASF_Reserved_4': '4CFEDB20-75F6-11CF-9C0F-00A0C90349CB',
-            'ASF_Command_Media': '59DACFC0-59E6-11D0-A3AC-00A0C90348F6',
-            'ASF_Header_Extension_Object': '5FBF03B5-A92E-11CF-8EE3-00C00C205365',
-            'ASF_Media_Object_Index_Parameters_Obj': '6B203BAD-3F11-4E84-ACA8-D7613DE2CFA7',
-            'ASF_Header_Object': '75B22630-668E-11CF-A6D9-00AA0062CE6C',
-            'ASF_Content_Description_Object': '75B22633-668E-11CF-A6D9-00AA0062CE6C',
-            'ASF_Error_Correction_Object': '75B22635-668E-11CF-A6D9-00AA0062CE6C',
-            'ASF_Data_Object': '75B22636-668E-11CF-A6D9-00AA0062CE6C',
-            'ASF_Web_Stream_Media_Subtype': '776257D4-C627-41CB-8F81-7AC7FF1C40CC',
-            'ASF_Stream_Bitrate_Properties_Object': '7BF875CE-468D-11D1-8D82-006097C9A2B2',
-            'ASF_Language_List_Object': '7C4346A9-EFE0-4BFC-B229-393EDE415C85',
-            'ASF_Codec_List_Object': '86D15240-311D-11D0-A3A4-00A0C90348F6',
-            'ASF_Reserved_2': '86D15241-311D-11D0-A3A4-00A0C90348F6',
-            'ASF_File_Properties_Object': '8CABDCA1-A947-11CF-8EE4-00C00C205365',
-            'ASF_File_Transfer_Media': '91BD222C-F21C-497A-8B6D-5AA86BFC0185',
-            'ASF_Advanced_Mutual_Exclusion_Object': 'A08649CF-4775-4670-8A16-6E35357566CD',
-            'ASF_Bandwidth_Sharing_Object': 'A69609E6-517B-11D2-B6AF-00C04FD908E9',
-            'ASF_Reserved_1': 'ABD3D211-A9BA-11CF-8EE6-00C00C205365',
-            'ASF_Bandwidth_Sharing_Exclusive': 'AF6060AA-5197-11D2-B6AF-00C04FD908E9',
-            'ASF_Bandwidth_Sharing_Partial': 'AF6060AB-5197-11D2-B6AF-00C04FD908E9',
-            'ASF_JFIF_Media': 'B61BE100-5B4E-11CF-A8FD-00805F5C442B',
-            'ASF_Stream_Properties_Object': 'B7DC0791-A9B7-11CF-8EE6-00C00C205365',
-            'ASF_Video_Media': 'BC19EFC0-5B4D-11CF-A8FD-00805F5C442B',
-            'ASF_Audio_Spread': 'BFC3CD50-618F-11CF-8BB2-00AA00B4E220',
-            'ASF_Metadata_Object': 'C5F8CBEA-5BAF-4877-8467-AA8C44FA4CCA',
-            'ASF_Payload_Ext_Syst_Sample_Duration': 'C6BD9450-867F-4907-83A3-C77921B733AD',
-            'ASF_Group_Mutual_Exclusion_Object': 'D1465A40-5A79-4338-B71B-E36B8FD6C249',
-            'ASF_Extended_Content_Description_Object': 'D2D0A440-E307-11D2-97F0-00A0C95EA850',
-            'ASF_Stream_Prioritization_Object': 'D4FED15B-88D3-454F-81F0-ED5C45999E24',
-            'ASF_Payload_Ext_System_Content_Type': 'D590DC20-07BC-436C-9CF7-F3BBFBF1A4DC',
-            'ASF_Index_Object': 'D6E229D3-35DA-11D1-9034-00A0C90349BE',
-            'ASF_Bitrate_Mutual_Exclusion_Object': 'D6E229DC-35DA-11D1-9034-00A0C90349BE',
-            'ASF_Index_Parameters_Object': 'D6E229DF-35DA-11D1-9034-00A0C90349BE',
-            'ASF_Mutex_Language': 'D6E22A00-35DA-11D1-9034-00A0C90349BE',
-            'ASF_Mutex_Bitrate': 'D6E22A01-35DA-11D1-9034-00A0C90349BE',
-            'ASF_Mutex_Unknown': 'D6E22A02-35DA-11D1-9034-00A0C90349BE',
-            'ASF_Web_Stream_Format': 'DA1E6B13-8359-4050-B398-388E965BF00C',
-            'ASF_Payload_Ext_System_File_Name': 'E165EC0E-19ED-45D7-B4A7-25CBD1E28E9B',
-            'ASF_Marker_Object': 'F487CD01-A951-11CF-8EE6-00C00C205365',
-            'ASF_Timecode_Index_Parameters_Object': 'F55E496D-9797-4B5D-8C8B-604DFE9BFB24',
-            'ASF_Audio_Media': 'F8699E40-5B4D-11CF-A8FD-00805F5C442B',
-            'ASF_Media_Object_Index_Object': 'FEB103F8-12AD-4C64-840F-2A1D2F7AD48C',
-            'ASF_Alt_Extended_Content_Encryption_Obj': 'FF889EF1-ADEE-40DA-9E71-98704BB928CE',
+            path: (size, mtime_ns, inode)
+            for path, size, mtime_ns, inode in self._db.execute(
+                "SELECT path, size, mtime_ns, inode FROM files WHERE path >= ? AND path < ?",
+                (prefix, upper),
+            )
+        }
+
+    def _write(self, rows: List[Tuple[Any, ...]]) -> None:
+        if rows:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+
+
+# Header pack files: raw header bytes of many files, re-parsed via mmap
+PACK_MAGIC = b"WMAP"
+PACK_INDEX_MAGIC = b"WMAX"
+PACK_VERSION = 1
+
+_PACK_PREAMBLE = struct.Struct("<4sB3x")
+_PACK_ENTRY = struct.Struct("<QQHH")   # pack offset, file size, path length, extents
+_PACK_EXTENT = struct.Struct("<QI")    # offset in the original file, length
+
+_PackEntry = Tuple[int, int, Tuple[Tuple[int, int], ...]]
+
+
+def _header_extents(source: RandomAccessSource, include_index: bool,
+                    limits: ParseLimits) -> List[Tuple[int, bytes]]:
+    """
+    Read the bytes WmaInfo needs from a file, as (offset, data) extents.
+
+    That is the ASF_Header_Object, the ASF_Data_Object's 24-byte head, and
+    the heads (or, with `include_index`, the whole) of every object after
+    the data, exactly as parse_index_objects() walks them.
+    """
+    preamble = source.read_at(0, 30)
+    header_obj = parse_header_object(preamble, source.name, limits=limits)
+    if header_obj.size > source.size:
+        raise TruncatedHeaderError("Header size reported larger than file size")
+
+    head = preamble + source.read_at(30, header_obj.size - 30 + 24)
+    extents = [(0, head)]
+    if len(head) < header_obj.size + 24 or \
+            _guid_at(head, header_obj.size) != _KNOWN_GUIDS['ASF_Data_Object']:
+        return extents
+
+    offset = header_obj.size + _U64_AT(head, header_obj.size + 16)[0]
+    for _ in range(limits.max_objects):
+        obj_head = source.read_at(offset, 24)
+        if len(obj_head) < 24:
+            if obj_head:
+                extents.append((offset, obj_head))
+            break
+        size = _U64_AT(obj_head, 16)[0]
+        if include_index and 24 < size <= limits.max_header_size:
+            obj_head += source.read_at(offset + 24, size - 24)
+        extents.append((offset, obj_head))
+        if size < 24:
+            break
+        offset += size
+    return extents
+
+
+def _read_pack_index(data: bytes) -> Tuple[Dict[str, _PackEntry], int]:
+    """
+    Decode a pack index, keeping the latest entry for each path.
+
+    Returns:
+        (entries, length of the valid prefix); a torn final entry from an
+        interrupted write is ignored
+    """
+    if data[:_PACK_PREAMBLE.size] != _PACK_PREAMBLE.pack(PACK_INDEX_MAGIC, PACK_VERSION):
+        raise WmaInfoError("Not a header pack index, or an unsupported version")
+    entries: Dict[str, _PackEntry] = {}
+    pos = _PACK_PREAMBLE.size
+    while pos + _PACK_ENTRY.size <= len(data):
+        offset, size, path_len, count = _PACK_ENTRY.unpack_from(data, pos)
+        end = pos + _PACK_ENTRY.size + path_len + count * _PACK_EXTENT.size
+        if end > len(data):
+            break
+        path = data[pos + _PACK_ENTRY.size:pos + _PACK_ENTRY.size + path_len].decode('utf-8')
+        extents = tuple(_PACK_EXTENT.iter_unpack(data[end - count * _PACK_EXTENT.size:end]))
+        entries.pop(path, None)  # Re-added paths move to the end
+        entries[path] = (offset, size, extents)
+        pos = end
+    return entries, pos
+
+
+def _check_pack_preamble(path: Path, magic: bytes) -> None:
+    """Raise WmaInfoError unless `path` is missing, empty, or starts with a current preamble."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(_PACK_PREAMBLE.size)
+    except FileNotFoundError:
+        return
+    if head and head != _PACK_PREAMBLE.pack(magic, PACK_VERSION):
+        raise WmaInfoError(f"{path}: not a header pack, or an unsupported version")
+
+
+class HeaderPackWriter:
+    """
+    Append-only writer for a header pack.
+
+    A pack stores the raw ASF_Header_Object (plus the data object head and,
+    optionally, the index objects) of many files back to back in
+    `<pack_path>`, with an offset index in `<pack_path>.idx`. Reprocessing a
+    whole archive with a newer parser then reads only the pack, through
+    HeaderPack and WmaInfo.from_pack(). Adding a path again supersedes its
+    earlier entry.
+
+    Attributes:
+        added: Number of files added through this writer
+
+    Usage:
+        with HeaderPackWriter('library.pack') as pack:
+            failures = pack.extend(discover('/srv/media'), workers=8)
+    """
+
+    def __init__(self, pack_path: Union[str, Path], limits: ParseLimits = DEFAULT_LIMITS) -> None:
+        self.pack_path = Path(pack_path)
+        self.index_path = Path(f"{pack_path}.idx")
+        self.limits = limits
+        self.added = 0
+        # Check both files before opening either for append, so nothing is written on failure
+        _check_pack_preamble(self.pack_path, PACK_MAGIC)
+        _check_pack_preamble(self.index_path, PACK_INDEX_MAGIC)
+        self._pack = open(self.pack_path, 'ab')
+        self._index = open(self.index_path, 'a+b')
+        if self._pack.tell() == 0:
+            self._pack.write(_PACK_PREAMBLE.pack(PACK_MAGIC, PACK_VERSION))
+        if self._index.tell() == 0:
+            self._index.write(_PACK_PREAMBLE.pack(PACK_INDEX_MAGIC, PACK_VERSION))
+        else:
+            # Drop a torn entry left by an interrupted write
+            self._index.seek(0)
+            _, valid = _read_pack_index(self._index.read())
+            self._index.truncate(valid)
+        self._index.seek(0, os.SEEK_END)
+
+    def __enter__(self) -> "HeaderPackWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush and close the pack and its index."""
+        self._pack.close()
+        self._index.close()
+
+    def add(self, file_path: Union[str, Path, RandomAccessSource],
+            include_index: bool = False) -> int:
+        """
+        Copy one file's header bytes into the pack.
+
+        Args:
+            file_path: Path (stored as an absolute path) or RandomAccessSource
+                (stored under its name)
+            include_index: Also copy the objects after the ASF_Data_Object
+
+        Returns:
+            Number of bytes added to the pack
+
+        Raises:
+            WmaInfoError: If the file is not a readable ASF file
+            OSError: If the file cannot be read
+        """
+        path, size, extents = self._read(file_path, include_index)
+        return self._append(path, size, extents)
+
+    def extend(self, paths: Iterable[Union[str, Path]], include_index: bool = False,
+               workers: int = 0) -> List[Tuple[str, str]]:
+        """
+        Add many files, in order, reading them from `workers` threads.
+
+        Returns:
+            (path, error message) for each file that could not be added
+        """
+        def read(path: Union[str, Path]) -> Tuple[Optional[Tuple[str, str]], Any]:
+            try:
+                return None, self._read(path, include_index)
+            except (WmaInfoError, OSError) as e:
+                return (os.fspath(path), str(e)), None
+
+        failures = []
+        for failure, item in _map_threaded(read, paths, workers):
+            if failure is not None:
+                failures.append(failure)
+            else:
+                self._append(*item)
+        return failures
+
+    def _read(self, file_path: Union[str, Path, RandomAccessSource],
+              include_index: bool) -> Tuple[str, int, List[Tuple[int, bytes]]]:
+        if hasattr(file_path, 'read_at'):
+            source: RandomAccessSource = file_path  # type: ignore[assignment]
+            return source.name, source.size, _header_extents(source, include_index, self.limits)
+
+        path = os.path.abspath(os.fspath(file_path))
+        source = FileSource(path)
+        try:
+            return path, source.size, _header_extents(source, include_index, self.limits)
+        finally:
+            source.close()
+
+    def _append(self, path: str, size: int, extents: List[Tuple[int, bytes]]) -> int:
+        # Adjacent reads (e.g. consecutive index objects) become one extent
+        merged: List[List[Any]] = []
+        for offset, data in extents:
+            if merged and merged[-1][0] + merged[-1][1] == offset \
+                    and merged[-1][1] + len(data) <= 0xFFFFFFFF:
+                merged[-1][1] += len(data)
+            else:
+                merged.append([offset, len(data)])
+
+        record = b"".join(data for _, data in extents)
+        offset = self._pack.tell()
+        self._pack.write(record)
+        self._pack.flush()  # Data before index: a crash never indexes missing bytes
+
+        encoded = path.encode('utf-8')
+        entry = bytearray(_PACK_ENTRY.pack(offset, size, len(encoded), len(merged)))
+        entry += encoded
+        for extent in merged:
+            entry += _PACK_EXTENT.pack(*extent)
+        self._index.write(entry)
+        self._index.flush()
+        self.added += 1
+        return len(record)
+
+
+class PackSource:
+    """
+    Random-access source over one file's bytes inside a header pack.
+
+    Offsets are those of the original file; reading bytes the pack does not
+    hold (such as the media data) raises WmaInfoError.
+    """
+
+    def __init__(self, buffer: Any, name: str, size: int, offset: int,
+                 extents: Sequence[Tuple[int, int]]) -> None:
+        self.name = name
+        self.file_path = Path(name)
+        self._buffer = buffer
+        self._size = size
+        self._extents = []
+        for start, length in extents:
+            self._extents.append((start, length, offset))
+            offset += length
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def read_at(self, offset: int, length: int) -> bytes:
+        if length <= 0 or offset >= self._size:
+            return b""
+        for start, extent_len, pos in self._extents:
+            end = start + extent_len
+            if start <= offset < end and (offset + length <= end or end >= self._size):
+                pos += offset - start
+                return bytes(self._buffer[pos:pos + min(length, end - offset)])
+        raise WmaInfoError(f"{self.name}: bytes {offset}-{offset + length} are not in the pack")
+
+
+class HeaderPack:
+    """
+    Memory-mapped reader for a pack written by HeaderPackWriter.
+
+    Iterating yields the stored paths in the order they were added. Entries
+    appended after the pack was opened are not visible until it is reopened.
+
+    Usage:
+        with HeaderPack('library.pack') as pack:
+            for path in pack:
+                wma = WmaInfo.from_pack(pack, path)
+    """
+
+    def __init__(self, pack_path: Union[str, Path]) -> None:
+        import mmap
+
+        self.pack_path = Path(pack_path)
+        with open(f"{pack_path}.idx", 'rb') as f:
+            entries, _ = _read_pack_index(f.read())
+        with open(self.pack_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:_PACK_PREAMBLE.size] != _PACK_PREAMBLE.pack(PACK_MAGIC, PACK_VERSION):
+            self._map.close()
+            raise WmaInfoError(f"{pack_path}: not a header pack, or an unsupported version")
+
+        # Ignore entries whose bytes are missing (pack truncated after a crash)
+        mapped = len(self._map)
+        self._entries = {
+            path: entry for path, entry in entries.items()
+            if entry[0] + sum(length for _, length in entry[2]) <= mapped
         }
 
+    def __enter__(self) -> "HeaderPack":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: object) -> bool:
+        return self._key(path) is not None  # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def close(self) -> None:
+        """Unmap the pack."""
+        self._map.close()
+
+    def source(self, path: Union[str, Path]) -> PackSource:
+        """
+        Return a random-access source over the packed bytes of `path`.
+
+        Raises:
+            KeyError: If the path is not in the pack
+        """
+        key = self._key(path)
+        if key is None:
+            raise KeyError(os.fspath(path))
+        offset, size, extents = self._entries[key]
+        return PackSource(self._map, key, size, offset, extents)
+
+    def decode_batch(self, use_numpy: Optional[bool] = None,
+                     limits: ParseLimits = DEFAULT_LIMITS) -> HeaderBatch:
+        """decode_header_batch() over every header in the pack, in iteration order."""
+        offsets = [offset for offset, _, _ in self._entries.values()]
+        return decode_header_batch(self._map, offsets, use_numpy, limits)  # type: ignore[arg-type]
+
+    def _key(self, path: Union[str, Path]) -> Optional[str]:
+        key = os.fspath(path)
+        if key in self._entries:
+            return key
+        key = os.path.abspath(key)
+        return key if key in self._entries else None
+
+
+@dataclass
+class DuplicateReport:
+    """
+    Groups of files that look like copies of each other.
+
+    Attributes:
+        by_file_id: fileid_guid -> paths sharing it (same encode, possibly re-tagged)
+        by_fingerprint: header fingerprint -> paths with identical headers
+        scanned: Number of files parsed
+        failed: Number of files that could not be parsed
+    """
+    by_file_id: Dict[str, List[Path]] = dataclasses.field(default_factory=dict)
+    by_fingerprint: Dict[str, List[Path]] = dataclasses.field(default_factory=dict)
+    scanned: int = 0
+    failed: int = 0
+
+
+def find_duplicates(paths: Iterable[Union[str, Path]], workers: int = 0) -> DuplicateReport:
+    """
+    Find duplicate and re-tagged copies in one streaming pass.
+
+    Only headers are read: files are grouped by the File Properties
+    `fileid_guid` and by header_fingerprint(). Only groups with more than
+    one member are reported.
+
+    Args:
+        paths: Files to check; consumed lazily
+        workers: Threads used for parsing (see scan())
+    """
+    by_file_id: Dict[str, List[Path]] = {}
+    by_fingerprint: Dict[str, List[Path]] = {}
+    report = DuplicateReport()
+
+    for result in scan(paths, workers=workers):
+        if result.wma is None:
+            report.failed += 1
+            continue
+        report.scanned += 1
+        file_id = result.wma.info.get('fileid_guid')
+        if file_id:
+            by_file_id.setdefault(file_id, []).append(result.path)
+        by_fingerprint.setdefault(result.wma.header_fingerprint(), []).append(result.path)
+
+    report.by_file_id = {k: v for k, v in by_file_id.items() if len(v) > 1}
+    report.by_fingerprint = {k: v for k, v in by_fingerprint.items() if len(v) > 1}
+    return report
+
+
+_NUMBER_PREFIX = re.compile(r"\s*(-?\d+(?:\.\d+)?)")
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _normalize_text(value: Any) -> Optional[str]:
+    """Normalize a tag value for case- and width-insensitive equality."""
+    import unicodedata
+
+    if value is None or isinstance(value, bytes):
+        return None
+    text = " ".join(unicodedata.normalize('NFKC', str(value)).casefold().split())
+    return text or None
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """Coerce numeric-ish tag values ("7/12", "2001-05-03", 128.0) to float."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_PREFIX.match(value)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+# Maps every nonzero byte to 1, so bytes.find() can skip zeros at C speed
+_NONZERO_FLAGS = bytes([0] + [1] * 255)
+_BYTE_BITS = tuple(tuple(b for b in range(8) if byte >> b & 1) for byte in range(256))
+
+
+def _bitmap(ids: Iterable[int], size: int) -> int:
+    """Pack document ids below `size` into an int with bit i set for id i."""
+    buf = bytearray((size >> 3) + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def _bitmap_ids(bitmap: int) -> List[int]:
+    """Inverse of _bitmap(): the set bits in ascending order."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, 'little')
+    flags = data.translate(_NONZERO_FLAGS)
+    ids: List[int] = []
+    pos = flags.find(1)
+    while pos >= 0:
+        base = pos << 3
+        ids.extend([base + b for b in _BYTE_BITS[data[pos]]])
+        pos = flags.find(1, pos + 1)
+    return ids
+
+
+class TagIndex:
+    """
+    In-memory index over batch results for conjunctive tag queries.
+
+    Text fields get inverted postings (normalized value -> ascending doc ids);
+    numeric fields get a value-sorted array for range lookups. Both also keep
+    a per-document column, so a query whose most selective criterion is small
+    checks the rest per candidate. Larger queries AND one bitmap per criterion
+    instead: text bitmaps are built from the postings on first use, and
+    numeric ranges come from cumulative bitmaps at checkpoints along the
+    sorted array, so neither costs a Python loop per matching document.
+
+    Usage:
+        index = TagIndex.from_results(scan(paths))
+        index.query(AlbumArtist='Artist X', BeatsPerMinute=(120, None))
+    """
+
+    TEXT_FIELDS = ('Title', 'Author', 'AlbumTitle', 'AlbumArtist', 'Genre',
+                   'Composer', 'Mood', 'Copyright')
+    NUMERIC_FIELDS = ('Year', 'TrackNumber', 'BeatsPerMinute', 'playtime_seconds', 'bitrate')
+    # Below this many candidates, checking each one beats building bitmaps
+    BITMAP_THRESHOLD = 1024
+
+    def __init__(self, text_fields: Iterable[str] = TEXT_FIELDS,
+                 numeric_fields: Iterable[str] = NUMERIC_FIELDS) -> None:
+        self.paths: List[Path] = []
+        self._postings: Dict[str, Dict[str, "array[int]"]] = {f: {} for f in text_fields}
+        self._text_columns: Dict[str, List[Optional[str]]] = {f: [] for f in text_fields}
+        self._numeric_columns: Dict[str, "array[float]"] = {
+            f: array('d') for f in numeric_fields
+        }
+        self._sorted: Dict[str, Tuple["array[float]", "array[int]"]] = {}
+        self._text_bitmaps: Dict[Tuple[str, str], int] = {}
+        self._checkpoints: Dict[str, Tuple["array[int]", List[int]]] = {}
+
+    @classmethod
+    def from_results(cls, results: Iterable[Any], **kwargs: Any) -> "TagIndex":
+        """
+        Build an index from scan() results or (path, WmaInfo) pairs.
+
+        Failed ScanResults are skipped.
+        """
+        index = cls(**kwargs)
+        for item in results:
+            if isinstance(item, ScanResult):
+                if item.wma is not None:
+                    index.add(item.path, item.wma)
+            else:
+                index.add(*item)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def add(self, path: Union[str, Path], wma: WmaInfo) -> int:
+        """
+        Index one parsed file; values are looked up in `tags`, then `info`.
+
+        Returns:
+            The document id assigned to the file
+        """
+        doc_id = len(self.paths)
+        self.paths.append(Path(path))
+
+        for field, postings in self._postings.items():
+            value = _normalize_text(self._lookup(wma, field))
+            self._text_columns[field].append(value)
+            if value is not None:
+                ids = postings.get(value)
+                if ids is None:
+                    ids = postings[value] = array('l')
+                ids.append(doc_id)
+
+        nan = float('nan')
+        for field, column in self._numeric_columns.items():
+            number = _to_number(self._lookup(wma, field))
+            column.append(nan if number is None else number)
+
+        self._sorted.clear()
+        self._text_bitmaps.clear()
+        self._checkpoints.clear()
+        return doc_id
+
+    def query(self, **criteria: Any) -> List[Path]:
+        """
+        Return the paths matching every criterion, in insertion order.
+
+        Text fields match on normalized equality. Numeric fields take a
+        number for equality or an inclusive (low, high) tuple where either
+        bound may be None.
+
+        Raises:
+            ValueError: If a criterion names a field that is not indexed
+        """
+        return [self.paths[i] for i in self.query_ids(**criteria)]
+
+    def query_ids(self, **criteria: Any) -> List[int]:
+        """Like query(), but returns document ids."""
+        text_checks: List[Tuple[str, str, "array[int]"]] = []
+        range_checks: List[Tuple[str, float, float, int, int]] = []
+        best: Optional["array[int]"] = None
+        best_size = len(self.paths) + 1
+        best_sorted = True
+
+        for field, wanted in criteria.items():
+            if field in self._postings:
+                value = _normalize_text(wanted)
+                ids = None if value is None else self._postings[field].get(value)
+                if value is None or ids is None:
+                    return []
+                text_checks.append((field, value, ids))
+                if len(ids) < best_size:
+                    best, best_size, best_sorted = ids, len(ids), True
+            elif field in self._numeric_columns:
+                low, high = wanted if isinstance(wanted, tuple) else (wanted, wanted)
+                low = float('-inf') if low is None else float(low)
+                high = float('inf') if high is None else float(high)
+                values, ids = self._sorted_column(field)
+                start = bisect_left(values, low)
+                end = bisect_right(values, high)
+                if start >= end:
+                    return []
+                range_checks.append((field, low, high, start, end))
+                if end - start < best_size:
+                    best, best_size, best_sorted = ids[start:end], end - start, False
+            else:
+                raise ValueError(f"Field is not indexed: {field}")
+
+        if best is None:
+            return list(range(len(self.paths)))
+        if len(criteria) > 1 and best_size > self.BITMAP_THRESHOLD:
+            return self._intersect(text_checks, range_checks)
+
+        candidates: Iterable[int] = best
+        if len(criteria) > 1:
+            for field, text, _ in text_checks:
+                column = self._text_columns[field]
+                candidates = [i for i in candidates if column[i] == text]
+                if not candidates:
+                    return []
+            for field, low, high, _, _ in range_checks:
+                numbers = self._numeric_columns[field]
+                candidates = [i for i in candidates if low <= numbers[i] <= high]
+                if not candidates:
+                    return []
+        # Postings are in doc-id order already; range slices are in value order
+        return list(candidates) if best_sorted else sorted(candidates)
+
+    def _intersect(self, text_checks: List[Tuple[str, str, "array[int]"]],
+                   range_checks: List[Tuple[str, float, float, int, int]]) -> List[int]:
+        """AND the bitmaps of every criterion, smallest first."""
+        bitmaps: List[Tuple[int, Callable[[], int]]] = [
+            (len(ids), partial(self._text_bitmap, field, text, ids))
+            for field, text, ids in text_checks
+        ]
+        bitmaps += [(end - start, partial(self._range_bitmap, field, start, end))
+                    for field, _, _, start, end in range_checks]
+        bitmaps.sort(key=itemgetter(0))
+
+        result = -1
+        for _, bitmap in bitmaps:
+            result &= bitmap()
+            if not result:
+                return []
+        return _bitmap_ids(result)
+
+    def _text_bitmap(self, field: str, value: str, ids: "array[int]") -> int:
+        """Bitmap of a text posting, built on first use."""
+        key = (field, value)
+        bitmap = self._text_bitmaps.get(key)
+        if bitmap is None:
+            bitmap = self._text_bitmaps[key] = _bitmap(ids, len(self.paths))
+        return bitmap
+
+    def _range_bitmap(self, field: str, start: int, end: int) -> int:
+        """Bitmap of the documents at positions [start, end) of the sorted column."""
+        return self._prefix_bitmap(field, end) & ~self._prefix_bitmap(field, start)
+
+    def _prefix_bitmap(self, field: str, rank: int) -> int:
+        """
+        Bitmap of the first `rank` documents in value order: the nearest
+        checkpoint, with the few documents between it and `rank` added or
+        removed one by one.
+        """
+        ids = self._sorted_column(field)[1]
+        marks, bitmaps = self._checkpoints_for(field)
+        k = bisect_right(marks, rank) - 1
+        if marks[k] == rank:
+            return bitmaps[k]
+        if k + 1 < len(marks) and marks[k + 1] - rank < rank - marks[k]:
+            return bitmaps[k + 1] & ~_bitmap(ids[rank:marks[k + 1]], len(self.paths))
+        return bitmaps[k] | _bitmap(ids[marks[k]:rank], len(self.paths))
+
+    def _checkpoints_for(self, field: str) -> Tuple["array[int]", List[int]]:
+        """
+        Cumulative bitmaps along a numeric field's sorted array, built on first
+        use. Checkpoints sit on boundaries between distinct values, where range
+        lookups start and end, and at most about 256 are kept per field.
+        """
+        cached = self._checkpoints.get(field)
+        if cached is None:
+            values, ids = self._sorted_column(field)
+            step = max(len(ids) >> 8, 1)
+            marks, bitmaps = array('l', [0]), [0]
+            buf = bytearray((len(self.paths) >> 3) + 1)
+            for rank, i in enumerate(ids, 1):
+                buf[i >> 3] |= 1 << (i & 7)
+                at_boundary = rank == len(ids) or values[rank] != values[rank - 1]
+                if at_boundary and rank - marks[-1] >= step:
+                    marks.append(rank)
+                    bitmaps.append(int.from_bytes(buf, 'little'))
+            if marks[-1] != len(ids):
+                marks.append(len(ids))
+                bitmaps.append(int.from_bytes(buf, 'little'))
+            cached = self._checkpoints[field] = (marks, bitmaps)
+        return cached
+
+    def _sorted_column(self, field: str) -> Tuple["array[float]", "array[int]"]:
+        """Value-sorted (values, doc ids) for a numeric field, built on first use."""
+        cached = self._sorted.get(field)
+        if cached is None:
+            column = self._numeric_columns[field]
+            order = sorted((i for i, v in enumerate(column) if v == v), key=column.__getitem__)
+            cached = (array('d', (column[i] for i in order)), array('l', order))
+            self._sorted[field] = cached
+        return cached
+
+    @staticmethod
+    def _lookup(wma: WmaInfo, field: str) -> Any:
+        value = wma.tags.get(field)
+        return wma.info.get(field) if value is None else value
+
+
+def _private_socket_dir() -> str:
+    """Per-user directory under the temp directory, used when $XDG_RUNTIME_DIR is unset."""
+    import tempfile
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f"wmainfo-{uid}")
+
+
+def default_socket_path() -> str:
+    """
+    Socket used by `wmainfo serve`: $WMAINFO_SOCKET, else wmainfo.sock in
+    $XDG_RUNTIME_DIR, else in a private wmainfo-<uid> directory under the
+    temp directory (created mode 0700 by the server).
+    """
+    env = os.environ.get('WMAINFO_SOCKET')
+    if env:
+        return env
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    return os.path.join(runtime_dir or _private_socket_dir(), 'wmainfo.sock')
+
+
+def _make_private_dir(directory: str) -> None:
+    """Create directory mode 0700, or check that an existing one is ours and private."""
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if (not stat.S_ISDIR(st.st_mode) or st.st_mode & 0o077
+            or (hasattr(os, 'getuid') and st.st_uid != os.getuid())):
+        raise WmaInfoError(f"{directory} is not a private directory owned by this user")
+
+
+def _check_socket_owner(path: str) -> None:
+    """Refuse a socket that another user created (e.g. to impersonate the server)."""
+    if not hasattr(os, 'getuid'):
+        return
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is not a socket owned by this user")
+
+
+@lru_cache(maxsize=None)
+def _socket_server_class() -> Any:
+    """
+    Build the Unix socket server class on first use, so that importing the
+    module (and querying a server) does not import socketserver.
+    """
+    import socketserver
+
+    class _RequestHandler(socketserver.StreamRequestHandler):
+        """Answer one JSON request per line until the client disconnects."""
+
+        server: "_MetadataSocketServer"
+
+        def handle(self) -> None:
+            for line in self.rfile:
+                if line.strip():
+                    self.wfile.write(self.server.metadata.handle_line(line) + b"\n")
+                    self.wfile.flush()
+
+    class _MetadataSocketServer(socketserver.ThreadingUnixStreamServer):
+        """Unix socket server that hands each line to its MetadataServer."""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: str, metadata: "MetadataServer") -> None:
+            self.metadata = metadata
+            super().__init__(socket_path, _RequestHandler)
+
+    return _MetadataSocketServer
+
+
+class MetadataServer:
+    """
+    Long-running metadata service over a local Unix socket.
+
+    Each request is a JSON object on one line, either {"path": "..."} or
+    {"paths": [...]}, answered by one JSON line. A file's result is
+    {"path": ..., "data": base64 of WmaInfo.to_bytes()} or
+    {"path": ..., "error": message}; a batch is wrapped as {"results": [...]}.
+    Results are kept in an LRU cache keyed by path and stat signature, so an
+    unchanged file is parsed once for the life of the process.
+
+    Usage:
+        with MetadataServer() as server:
+            server.serve_forever()
+    """
+
+    def __init__(self, socket_path: Optional[Union[str, Path]] = None, cache_size: int = 4096):
+        """
+        Args:
+            socket_path: Where to listen (default: default_socket_path())
+            cache_size: Maximum number of cached results
+
+        Raises:
+            WmaInfoError: If another server is already listening on the socket,
+                or something other than a socket is at its path
+        """
+        self.socket_path = os.fspath(socket_path or default_socket_path())
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Tuple[StatSignature, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.socket_path)
+        if directory == _private_socket_dir():
+            _make_private_dir(directory)
+
+        try:
+            st = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(st.st_mode):
+                raise WmaInfoError(f"{self.socket_path} exists and is not a socket")
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.socket_path)
+            except OSError:
+                os.unlink(self.socket_path)  # Left behind by a dead server
+            else:
+                raise WmaInfoError(f"A server is already listening on {self.socket_path}")
+
+        self._server = _socket_server_class()(self.socket_path, self)
+        os.chmod(self.socket_path, 0o600)
+
+    def __enter__(self) -> 'MetadataServer':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def serve_forever(self) -> None:
+        """Handle requests until shutdown() is called from another thread."""
+        self._server.serve_forever()
+
+    def shutdown(self) -> None:
+        self._server.shutdown()
+
+    def close(self) -> None:
+        """Stop listening and remove the socket file."""
+        self._server.server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, path: str) -> Dict[str, Any]:
+        """Return the response object for one file, from the cache when it is current."""
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            return {'path': path, 'error': str(e)}
+        signature = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached[0] == signature:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        result = _scan_one(path)
+        if result.wma is not None:
+            response = {'path': path,
+                        'data': base64.b64encode(result.wma.to_bytes()).decode('ascii')}
+        else:
+            response = {'path': path, 'error': str(result.error)}
+
+        with self._lock:
+            self._cache[path] = (signature, response)
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return response
+
+    def handle_line(self, line: bytes) -> bytes:
+        """Answer one request line."""
+        try:
+            request = json.loads(line)
+            if 'paths' in request:
+                response: Dict[str, Any] = {
+                    'results': [self.lookup(str(p)) for p in request['paths']]}
+            else:
+                response = self.lookup(str(request['path']))
+        except (ValueError, TypeError, KeyError) as e:
+            response = {'error': f"bad request: {e}"}
+        return json.dumps(response).encode('utf-8')
+
+
+def _result_from_response(response: Dict[str, Any]) -> ScanResult:
+    path = Path(response['path'])
+    if 'data' in response:
+        return ScanResult(path, wma=WmaInfo.from_bytes(base64.b64decode(response['data'])))
+    return ScanResult(path, error=WmaInfoError(response['error']))
+
+
+def query_server(paths: Iterable[Union[str, Path]],
+                 socket_path: Optional[Union[str, Path]] = None,
+                 timeout: float = 30.0) -> List[ScanResult]:
+    """
+    Ask a running `wmainfo serve` process to parse files.
+
+    Paths are made absolute before sending, since the server's working
+    directory may differ.
+
+    Raises:
+        OSError: If no server is listening (callers fall back to parsing locally);
+            PermissionError if the socket belongs to another user
+    """
+    request = {'paths': [os.path.abspath(p) for p in paths]}
+    path = os.fspath(socket_path or default_socket_path())
+    _check_socket_owner(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("wmainfo server closed the connection")
+    return [_result_from_response(r) for r in json.loads(line)['results']]
+
+
+def _serve_main(argv: List[str]) -> None:
+    """`wmainfo serve`: run the metadata server in the foreground."""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='wmainfo serve',
+                                     description='Serve WMA/WMV metadata over a Unix socket')
+    parser.add_argument('--socket', default=None,
+                        help=f'Socket path (default: {default_socket_path()})')
+    parser.add_argument('--cache-size', type=int, default=4096, help='Cached results to keep')
+    args = parser.parse_args(argv)
+
+    try:
+        with MetadataServer(args.socket, cache_size=args.cache_size) as server:
+            print(f"Listening on {server.socket_path}")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    except WmaInfoError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _pack_main(argv: List[str]) -> None:
+    """`wmainfo pack`: append the headers of files and directory trees to a pack."""
+    import argparse
+    from itertools import chain
+
+    parser = argparse.ArgumentParser(prog='wmainfo pack',
+                                     description='Copy ASF headers into a header pack')
+    parser.add_argument('pack', help='Pack file to create or append to (index: PACK.idx)')
+    parser.add_argument('paths', nargs='+', help='Files, or directories to search')
+    parser.add_argument('--index', action='store_true',
+                        help='Also copy the index objects after the media data')
+    parser.add_argument('--workers', type=int, default=8, help='Reader threads')
+    args = parser.parse_args(argv)
+
+    paths = chain.from_iterable(
+        discover(path, workers=args.workers) if os.path.isdir(path) else (path,)
+        for path in args.paths
+    )
+    try:
+        with HeaderPackWriter(args.pack) as pack:
+            failures = pack.extend(paths, include_index=args.index, workers=args.workers)
+    except (WmaInfoError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    for path, error in failures:
+        print(f"{path}: {error}", file=sys.stderr)
+    print(f"Packed {pack.added:,} headers into {args.pack}, {len(failures)} failed")
+    if failures:
+        sys.exit(1)
+
 
 def main():
     """Command-line interface for WMA info."""
-    import sys
     import argparse
 
-    parser = argparse.ArgumentParser(description='Parse WMA/WMV file metadata')
+    if sys.argv[1:2] == ['serve']:
+        _serve_main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ['pack']:
+        _pack_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description='Parse WMA/WMV file metadata',
+        epilog="Run 'wmainfo serve' to keep a warm server; later calls query it when available. "
+               "Run 'wmainfo pack' to copy headers into a pack for fast reprocessing.")
     parser.add_argument('file', help='Path to WMA/WMV file')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     parser.add_argument('--no-info', action='store_true', help='Skip file info output')
     parser.add_argument('--no-tags', action='store_true', help='Skip tags output')
     parser.add_argument('--no-objects', action='store_true', help='Skip objects output')
     parser.add_argument('--stream', action='store_true', help='Parse and show stream info')
+    parser.add_argument('--socket', default=None, help='Server socket to query first')
+    parser.add_argument('--local', action='store_true', help="Don't query a running server")
 
     args = parser.parse_args()
 
     try:
-        wma = WmaInfo(args.file, debug=args.debug)
+        wma = None
+        if not (args.local or args.debug):
+            try:
+                result = query_server([args.file], args.socket)[0]
+            except OSError:
+                pass  # No server running: parse locally
+            else:
+                if result.error is not None:
+                    raise result.error
+                wma = result.wma
+        if wma is None:
+            wma = WmaInfo(args.file, debug=args.debug)
 
         if not args.no_info:
             print("### Info ###\n")
@@ -575,13 +3799,20 @@ def main():
             print()
 
         if args.stream:
-            print("### Stream ###\n")
-            wma.parse_stream()
-            if wma.stream:
-                for attr, value in vars(wma.stream).items():
+            if not wma.streams:
+                wma.parse_stream()  # Raises the usual "not found" error
+            for stream in wma.streams:
+                print(f"### Stream {stream.stream_number} ###\n")
+                for attr, value in vars(stream).items():
                     if value is not None and not attr.startswith('_'):
                         print(f"{attr}: {value}")
-            print()
+                print()
+
+            if wma.codecs:
+                print("### Codecs ###\n")
+                for codec in wma.codecs:
+                    print(f"{codec.type_name}: {codec.name} ({codec.description})")
+                print()
 
         if wma.has_drm():
             print("WARNING: This file has DRM protection")
@@ -1,7 +1,14 @@
 """Type stubs for wmainfo module."""
 
+from abc import ABC
+from array import array
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional, Union, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple, Union, Any
+
+
+SERIAL_MAGIC: bytes
+SERIAL_VERSION: int
 
 
 class WmaInfoError(Exception):
@@ -9,39 +16,350 @@ class WmaInfoError(Exception):
     ...
 
 
+class MalformedHeaderError(WmaInfoError):
+    """The header's structure is inconsistent: bad object sizes, overruns."""
+    ...
+
+
+class TruncatedHeaderError(MalformedHeaderError):
+    """The data ends before the header does."""
+    ...
+
+
+class ParseLimitError(WmaInfoError):
+    """The header exceeds one of the configured ParseLimits."""
+    ...
+
+
+@dataclass(frozen=True)
+class ParseLimits:
+    """Bounds on the work done for one header, for untrusted input."""
+    max_header_size: int = ...
+    max_objects: int = ...
+    max_entries: int = ...
+    max_string_length: int = ...
+
+
+DEFAULT_LIMITS: ParseLimits
+
+
+@dataclass
 class ASFObject:
     """Represents an ASF object with its properties."""
     guid: str
     size: int
     offset: int
-    name: Optional[str]
+    name: Optional[str] = None
+    num_objects: Optional[int] = None
+    reserved1: Optional[int] = None
+    reserved2: Optional[int] = None
+
+
+@dataclass
+class StreamInfo:
+    """Container for stream properties."""
+    stream_type_guid: str = ""
+    stream_type_name: str = ""
+    error_correct_guid: str = ""
+    error_correct_name: str = ""
+    time_offset: int = 0
+    type_data_length: int = 0
+    error_data_length: int = 0
+    stream_number: int = 0
+    encrypted: bool = False
+    type_specific_data: bytes = b""
+    error_correct_data: bytes = b""
+    audio_channels: Optional[int] = None
+    audio_sample_rate: Optional[int] = None
+    audio_bitrate: Optional[int] = None
+    audio_bits_per_sample: Optional[int] = None
+    audio_format_tag: Optional[int] = None
+    audio_block_align: Optional[int] = None
+    audio_extra_data: Optional[bytes] = None
+    video_width: Optional[int] = None
+    video_height: Optional[int] = None
+    video_bits_per_pixel: Optional[int] = None
+    video_compression: Optional[str] = None
+    video_extra_data: Optional[bytes] = None
+    average_bitrate: Optional[int] = None
+    data_bitrate: Optional[int] = None
+    buffer_size: Optional[int] = None
+    average_time_per_frame: Optional[int] = None
+    frame_rate: Optional[float] = None
+
+
+@dataclass
+class CodecInfo:
+    """Entry from the ASF_Codec_List_Object."""
+    codec_type: int
+    name: str
+    description: str
+    information: bytes = b""
+
+    @property
+    def type_name(self) -> str: ...
+
+
+@dataclass
+class Picture:
+    """Attached picture decoded from a WM/Picture attribute."""
+    mime_type: str
+    picture_type: int
+    description: str
+    data: bytes
+
+
+@dataclass
+class Marker:
+    """One entry of the ASF_Marker_Object (e.g. a chapter)."""
+    time: float
+    name: str
+
+
+@dataclass
+class ScriptCommand:
+    """One entry of the ASF_Script_Command_Object."""
+    time: float
+    type: str
+    command: str
+
+
+class _TimedTable(ABC):
+    """Time-sorted entries backed by the header buffer."""
+    times: array
+
+    def __init__(self, buf: bytes, times: array, name_offsets: array, name_lengths: array) -> None: ...
+
+    def __len__(self) -> int: ...
+
+    def __iter__(self) -> Iterator[Any]: ...
+
+    def __getitem__(self, i: int) -> Any: ...
+
+    def index_at(self, t: float) -> int: ...
+
+    def at(self, t: float) -> Any: ...
+
+    def between(self, start: float, end: float) -> List[Any]: ...
+
+
+class MarkerTable(_TimedTable):
+    """Decoded ASF_Marker_Object, sorted by time."""
+    name: str
 
     def __init__(
             self,
-            guid: str,
-            size: int,
-            offset: int,
-            name: Optional[str] = None
+            buf: bytes,
+            times: array,
+            name_offsets: array,
+            name_lengths: array,
+            name: str = ...
     ) -> None: ...
 
+    def __iter__(self) -> Iterator[Marker]: ...
 
-class StreamInfo:
-    """Container for stream properties."""
-    stream_type_guid: str
-    stream_type_name: str
-    error_correct_guid: str
-    error_correct_name: str
-    time_offset: int
-    type_data_length: int
-    error_data_length: int
-    stream_number: int
-    encrypted: bool
-    type_specific_data: bytes
-    error_correct_data: bytes
-    audio_channels: Optional[int]
-    audio_sample_rate: Optional[int]
-    audio_bitrate: Optional[int]
-    audio_bits_per_sample: Optional[int]
+    def __getitem__(self, i: int) -> Marker: ...
+
+    def at(self, t: float) -> Optional[Marker]: ...
+
+    def between(self, start: float, end: float) -> List[Marker]: ...
+
+
+class ScriptCommandTable(_TimedTable):
+    """Decoded ASF_Script_Command_Object, sorted by time."""
+    types: List[str]
+
+    def __init__(
+            self,
+            buf: bytes,
+            times: array,
+            name_offsets: array,
+            name_lengths: array,
+            types: List[str],
+            type_indexes: array
+    ) -> None: ...
+
+    def __iter__(self) -> Iterator[ScriptCommand]: ...
+
+    def __getitem__(self, i: int) -> ScriptCommand: ...
+
+    def at(self, t: float) -> Optional[ScriptCommand]: ...
+
+    def between(self, start: float, end: float) -> List[ScriptCommand]: ...
+
+
+class RandomAccessSource(Protocol):
+    """Anything the parser can read bytes from at absolute offsets."""
+    name: str
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+
+class FileSource:
+    """Random-access source over a local file, opened on first read."""
+    file_path: Path
+    name: str
+
+    def __init__(self, file_path: Union[str, Path]) -> None: ...
+
+    def __enter__(self) -> FileSource: ...
+
+    def __exit__(self, *exc: Any) -> None: ...
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+    def close(self) -> None: ...
+
+
+class BytesSource:
+    """Random-access source over an in-memory buffer."""
+    name: str
+
+    def __init__(
+            self,
+            data: Union[bytes, bytearray, memoryview],
+            name: str = ...
+    ) -> None: ...
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+
+class HTTPRangeSource:
+    """Random-access source over HTTP(S) using Range requests."""
+    name: str
+    requests: int
+
+    def __init__(
+            self,
+            url: str,
+            headers: Optional[Dict[str, str]] = None,
+            timeout: float = 30.0
+    ) -> None: ...
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+
+class CoalescingSource:
+    """Block cache in front of a slow random-access source."""
+    name: str
+
+    def __init__(
+            self,
+            source: RandomAccessSource,
+            block_size: int = 65536,
+            max_blocks: int = 256
+    ) -> None: ...
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+    def close(self) -> None: ...
+
+
+@dataclass
+class ParsedHeader:
+    """Results of decoding a complete ASF_Header_Object."""
+    header: bytes
+    header_objects: Dict[str, ASFObject]
+    tags: Dict[str, Any]
+    info: Dict[str, Any]
+    drm: bool = False
+    value_locations: Dict[str, Tuple[int, int]] = ...
+    streams: List[StreamInfo] = ...
+    codecs: List[CodecInfo] = ...
+    stream_extras: Dict[int, Dict[str, Any]] = ...
+
+
+def parse_header_object(
+        data: Union[bytes, bytearray],
+        name: str = ...,
+        debug: bool = False,
+        limits: ParseLimits = ...
+) -> ASFObject: ...
+
+
+def parse_header(
+        data: bytes,
+        name: str = ...,
+        debug: bool = False,
+        limits: ParseLimits = ...
+) -> ParsedHeader: ...
+
+
+class IncrementalParser:
+    """Push-based ASF header decoder for data that arrives in chunks."""
+    name: str
+    debug: bool
+    limits: ParseLimits
+    bytes_fed: int
+
+    def __init__(
+            self,
+            name: str = ...,
+            debug: bool = False,
+            limits: ParseLimits = ...
+    ) -> None: ...
+
+    @property
+    def complete(self) -> bool: ...
+
+    @property
+    def needed(self) -> int: ...
+
+    @property
+    def drm(self) -> bool: ...
+
+    @property
+    def info(self) -> Dict[str, Any]: ...
+
+    @property
+    def tags(self) -> Dict[str, Any]: ...
+
+    @property
+    def header_objects(self) -> Dict[str, ASFObject]: ...
+
+    @property
+    def streams(self) -> List[StreamInfo]: ...
+
+    @property
+    def codecs(self) -> List[CodecInfo]: ...
+
+    def feed(self, chunk: bytes) -> int: ...
+
+    def result(self) -> ParsedHeader: ...
+
+    def to_wmainfo(self) -> WmaInfo: ...
+
+
+@dataclass
+class HeaderBatch:
+    """Columnar results of decode_header_batch()."""
+    files: Dict[str, List[Any]]
+    streams: Dict[str, List[Any]]
+
+    def __len__(self) -> int: ...
+
+
+def decode_header_batch(
+        headers: Union[Sequence[bytes], bytes],
+        offsets: Optional[Sequence[int]] = None,
+        use_numpy: Optional[bool] = None,
+        limits: ParseLimits = ...
+) -> HeaderBatch: ...
 
 
 class WmaInfo:
@@ -49,16 +367,21 @@ class WmaInfo:
 
     file_path: Path
     debug: bool
+    limits: ParseLimits
     drm: bool
     tags: Dict[str, Any]
     info: Dict[str, Any]
     header_objects: Dict[str, ASFObject]
+    index_objects: Dict[str, ASFObject]
+    streams: List[StreamInfo]
+    codecs: List[CodecInfo]
     stream: Optional[StreamInfo]
 
     def __init__(
             self,
-            file_path: Union[str, Path],
-            debug: bool = False
+            file_path: Union[str, Path, RandomAccessSource],
+            debug: bool = False,
+            limits: ParseLimits = ...
     ) -> None: ...
 
     def has_drm(self) -> bool: ...
@@ -75,5 +398,279 @@ class WmaInfo:
 
     def parse_stream(self) -> None: ...
 
+    def parse_index_objects(self) -> None: ...
+
+    def read_picture(self) -> Optional[Picture]: ...
+
+    def markers(self) -> MarkerTable: ...
+
+    def script_commands(self) -> ScriptCommandTable: ...
+
+    def header_fingerprint(self) -> str: ...
+
+    def to_dict(self) -> Dict[str, Any]: ...
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> WmaInfo: ...
+
+    def to_bytes(self) -> bytes: ...
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> WmaInfo: ...
+
+    @classmethod
+    def from_pack(
+            cls,
+            pack: HeaderPack,
+            path: Union[str, Path],
+            debug: bool = False,
+            limits: ParseLimits = ...
+    ) -> WmaInfo: ...
+
+
+@dataclass
+class ScanResult:
+    """Outcome of parsing one file in a batch scan."""
+    path: Path
+    wma: Optional[WmaInfo] = None
+    error: Optional[Exception] = None
+    member: Optional[str] = None
+
+    @property
+    def ok(self) -> bool: ...
+
+
+def scan(paths: Iterable[Union[str, Path]], workers: int = 0) -> Iterator[ScanResult]: ...
+
+
+DEFAULT_EXTENSIONS: Tuple[str, ...]
+
+
+def scan_archive(
+        archive: Union[str, Path],
+        extensions: Optional[Iterable[str]] = ...
+) -> Iterator[ScanResult]: ...
+
+StatSignature = Tuple[int, int, int]
+
+
+@dataclass
+class DiscoveryStats:
+    """Traversal counters, updated live while discover() runs."""
+    directories: int = 0
+    files: int = 0
+    candidates: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def files_per_second(self) -> float: ...
+
+
+def discover(
+        root: Union[str, Path],
+        workers: int = 0,
+        batch_size: int = 256,
+        stats: Optional[DiscoveryStats] = None
+) -> Iterator[str]: ...
+
+
+@dataclass
+class IndexUpdate:
+    """Counts from one LibraryIndex.update() run."""
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+
+class LibraryIndex:
+    """Persistent, incrementally updated index of parsed files (SQLite)."""
+    db_path: Path
+
+    def __init__(self, db_path: Union[str, Path]) -> None: ...
+
+    def __enter__(self) -> LibraryIndex: ...
+
+    def __exit__(self, *exc: Any) -> None: ...
+
+    def __len__(self) -> int: ...
+
+    def __iter__(self) -> Iterator[Tuple[str, WmaInfo]]: ...
+
+    def close(self) -> None: ...
+
+    def update(
+            self,
+            root: Union[str, Path],
+            extensions: Optional[Iterable[str]] = ...,
+            workers: int = 0,
+            batch_size: int = 1000
+    ) -> IndexUpdate: ...
+
+    def get(self, path: Union[str, Path]) -> Optional[WmaInfo]: ...
+
+    def errors(self) -> Iterator[Tuple[str, str]]: ...
+
+
+PACK_MAGIC: bytes
+PACK_INDEX_MAGIC: bytes
+PACK_VERSION: int
+
+
+class HeaderPackWriter:
+    """Append-only writer for a header pack."""
+    pack_path: Path
+    index_path: Path
+    limits: ParseLimits
+    added: int
+
+    def __init__(self, pack_path: Union[str, Path], limits: ParseLimits = ...) -> None: ...
+
+    def __enter__(self) -> HeaderPackWriter: ...
+
+    def __exit__(self, *exc: Any) -> None: ...
+
+    def close(self) -> None: ...
+
+    def add(
+            self,
+            file_path: Union[str, Path, RandomAccessSource],
+            include_index: bool = False
+    ) -> int: ...
+
+    def extend(
+            self,
+            paths: Iterable[Union[str, Path]],
+            include_index: bool = False,
+            workers: int = 0
+    ) -> List[Tuple[str, str]]: ...
+
+
+class PackSource:
+    """Random-access source over one file's bytes inside a header pack."""
+    name: str
+    file_path: Path
+
+    def __init__(
+            self,
+            buffer: Any,
+            name: str,
+            size: int,
+            offset: int,
+            extents: Sequence[Tuple[int, int]]
+    ) -> None: ...
+
+    @property
+    def size(self) -> int: ...
+
+    def read_at(self, offset: int, length: int) -> bytes: ...
+
+
+class HeaderPack:
+    """Memory-mapped reader for a pack written by HeaderPackWriter."""
+    pack_path: Path
+
+    def __init__(self, pack_path: Union[str, Path]) -> None: ...
+
+    def __enter__(self) -> HeaderPack: ...
+
+    def __exit__(self, *exc: Any) -> None: ...
+
+    def __len__(self) -> int: ...
+
+    def __contains__(self, path: object) -> bool: ...
+
+    def __iter__(self) -> Iterator[str]: ...
+
+    def close(self) -> None: ...
+
+    def source(self, path: Union[str, Path]) -> PackSource: ...
+
+    def decode_batch(
+            self,
+            use_numpy: Optional[bool] = None,
+            limits: ParseLimits = ...
+    ) -> HeaderBatch: ...
+
+
+@dataclass
+class DuplicateReport:
+    """Groups of files that look like copies of each other."""
+    by_file_id: Dict[str, List[Path]] = ...
+    by_fingerprint: Dict[str, List[Path]] = ...
+    scanned: int = 0
+    failed: int = 0
+
+
+def find_duplicates(
+        paths: Iterable[Union[str, Path]],
+        workers: int = 0
+) -> DuplicateReport: ...
+
+
+class TagIndex:
+    """In-memory index over batch results for conjunctive tag queries."""
+    TEXT_FIELDS: Tuple[str, ...]
+    NUMERIC_FIELDS: Tuple[str, ...]
+    BITMAP_THRESHOLD: int
+    paths: List[Path]
+
+    def __init__(
+            self,
+            text_fields: Iterable[str] = ...,
+            numeric_fields: Iterable[str] = ...
+    ) -> None: ...
+
+    @classmethod
+    def from_results(cls, results: Iterable[Any], **kwargs: Any) -> TagIndex: ...
+
+    def __len__(self) -> int: ...
+
+    def add(self, path: Union[str, Path], wma: WmaInfo) -> int: ...
+
+    def query(self, **criteria: Any) -> List[Path]: ...
+
+    def query_ids(self, **criteria: Any) -> List[int]: ...
+
+
+def default_socket_path() -> str: ...
+
+
+class MetadataServer:
+    """Long-running metadata service over a local Unix socket."""
+    socket_path: str
+    cache_size: int
+    hits: int
+    misses: int
+
+    def __init__(
+            self,
+            socket_path: Optional[Union[str, Path]] = None,
+            cache_size: int = 4096
+    ) -> None: ...
+
+    def __enter__(self) -> MetadataServer: ...
+
+    def __exit__(self, *exc_info: Any) -> None: ...
+
+    def serve_forever(self) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+    def close(self) -> None: ...
+
+    def lookup(self, path: str) -> Dict[str, Any]: ...
+
+    def handle_line(self, line: bytes) -> bytes: ...
+
+
+def query_server(
+        paths: Iterable[Union[str, Path]],
+        socket_path: Optional[Union[str, Path]] = None,
+        timeout: float = 30.0
+) -> List[ScanResult]: ...
+
 
 def main() -> None: ...